@@ -0,0 +1,93 @@
+"""Throughput do parser de legendas num VTT automático de 10 horas.
+
+Compara o parser antigo (arquivo inteiro em memória, split e re.sub por linha)
+com o texto corrido de ``subtitle_parser.parse_subtitle_stream`` (lido em
+pedaços) e com as cues com tempos de ``iter_cues`` (linha a linha). Reporta
+MB/s, cues/s, pico de memória alocada (tracemalloc) e o tamanho do texto gerado.
+
+    python benchmarks/bench_subtitle_parser.py --hours 10
+"""
+import argparse
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from fixtures import write_rolling_vtt
+from subtitle_parser import iter_cues, parse_subtitle_stream
+
+
+def legacy_parse_vtt_file(path: Path) -> str:
+    """Implementação anterior de parse_subtitle_file + parse_vtt, para comparação."""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    text_lines = []
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('WEBVTT') or '-->' in line or line.startswith('NOTE'):
+            continue
+        if line.isdigit():
+            continue
+        line = re.sub(r'<[^>]*>', '', line)
+        if line:
+            text_lines.append(line)
+    return ' '.join(text_lines)
+
+
+def streaming_parse_vtt_file(path: Path) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_subtitle_stream(f)
+
+
+def cues_parse_vtt_file(path: Path) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return ' '.join(cue.text for cue in iter_cues(f))
+
+
+def measure(func, path: Path, repeticoes: int = 3) -> dict:
+    # Tempo e memória em passadas separadas: o tracemalloc distorce o tempo
+    duracao = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        texto = func(path)
+        duracao = min(duracao, time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    func(path)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'segundos': duracao, 'pico_mb': pico / 2**20, 'texto_mb': len(texto.encode('utf-8')) / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_rolling_vtt(Path(tmp) / 'fixture.vtt', hours=args.hours)
+        tamanho_mb = path.stat().st_size / 2**20
+        with open(path, encoding='utf-8') as f:
+            cues = sum(1 for _ in iter_cues(f, dedupe=False))
+
+        resultados = {
+            'legado': measure(legacy_parse_vtt_file, path),
+            'incremental': measure(streaming_parse_vtt_file, path),
+            'cues': measure(cues_parse_vtt_file, path),
+        }
+
+    print(f"Fixture: {args.hours:g} h, {tamanho_mb:.1f} MB, {cues} cues\n")
+    print(f"{'parser':<12} {'tempo':>8} {'MB/s':>8} {'cues/s':>10} {'pico mem':>10} {'texto':>9}")
+    for nome, r in resultados.items():
+        print(f"{nome:<12} {r['segundos']:>7.2f}s {tamanho_mb / r['segundos']:>8.1f} "
+              f"{cues / r['segundos']:>10.0f} {r['pico_mb']:>8.1f}MB {r['texto_mb']:>7.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,416 @@
+"""Suíte de benchmarks offline dos caminhos críticos.
+
+Cada cenário roda num processo próprio (para o pico de RSS ser só dele) contra
+o YouTube falso de ``fake_youtube.py`` e o yt-dlp falso de ``stub_ytdlp.py``.
+Reporta throughput, latência p50/p99 por operação e pico de RSS.
+
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --scenario single_video --latency 50 --rate-429 0.05
+    python benchmarks/bench_suite.py --json base.json
+    python benchmarks/bench_suite.py --baseline base.json   # sai com código 1 se houver regressão
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(ROOT_DIR))
+
+from fake_youtube import FakeYouTubeServer, video_ids
+from fixtures import build_srt, build_vtt
+from stub_ytdlp import make_stub_ytdlp
+
+
+class Medidor:
+    """Acumula latências por operação (thread-safe) e o tempo total de parede."""
+
+    def __init__(self):
+        self.latencias: List[float] = []
+        self.falhas = 0
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self.segundos = 0.0
+
+    def registrar(self, latencia: float, ok: bool = True):
+        with self._lock:
+            self.latencias.append(latencia)
+            if not ok:
+                self.falhas += 1
+
+    def medir(self, func: Callable, *args, ok: Callable = bool):
+        inicio = time.perf_counter()
+        resultado = func(*args)
+        self.registrar(time.perf_counter() - inicio, ok(resultado))
+        return resultado
+
+    def cronometrar(self, func: Callable) -> Callable:
+        """Envolve ``func`` para registrar cada chamada (para métodos chamados pelo código medido)."""
+        def medido(*args, **kwargs):
+            return self.medir(lambda: func(*args, **kwargs))
+        return medido
+
+    def finalizar(self) -> 'Medidor':
+        self.segundos = time.perf_counter() - self._inicio
+        return self
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil pelo método nearest-rank."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))]
+
+
+def pico_rss_mb() -> float:
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS, bytes
+    return pico / 2**20 if sys.platform == 'darwin' else pico / 1024
+
+
+def ids_mistos(n: int, sem_legenda: float) -> List[str]:
+    """IDs do YouTube falso; uma fração ``sem_legenda`` deles cai no fallback do yt-dlp."""
+    ids = video_ids(n)
+    a_cada = round(1 / sem_legenda) if sem_legenda > 0 else 0
+    if a_cada:
+        for i in range(0, n, a_cada):
+            ids[i] = video_ids(i + 1, prefix='nocap')[i]
+    return ids
+
+
+def urls_de(ids: Iterable[str]) -> List[str]:
+    return [f"https://www.youtube.com/watch?v={video_id}" for video_id in ids]
+
+
+@contextlib.contextmanager
+def youtube_falso(args, tmp: Path):
+    """Sobe o YouTube falso, aponta a youtube-transcript-api para ele e põe o yt-dlp falso no PATH."""
+    from youtube_transcript_api import _transcripts
+
+    server = FakeYouTubeServer(latency=args.latency / 1000, jitter=args.jitter / 1000,
+                               rate_429=args.rate_429, failure_rate=args.failure_rate,
+                               recorded_dir=args.recorded_dir).start()
+    watch_url_original = _transcripts.WATCH_URL
+    _transcripts.WATCH_URL = server.watch_url
+    stub = make_stub_ytdlp(tmp / 'bin')
+    os.environ['PATH'] = f"{tmp / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}"
+    try:
+        yield server, stub
+    finally:
+        _transcripts.WATCH_URL = watch_url_original
+        server.stop()
+
+
+def novo_downloader(tmp: Path, stub: str, **kwargs):
+    from youtube_transcript import YouTubeTranscriptDownloader
+    return YouTubeTranscriptDownloader(output_dir=str(tmp / 'saida'), delay=0, ytdlp_path=stub,
+                                       ytdlp_backend='subprocess', **kwargs)
+
+
+# --- Cenários -----------------------------------------------------------------
+
+def cenario_single_video(args, tmp: Path) -> Medidor:
+    with youtube_falso(args, tmp) as (_, stub):
+        downloader = novo_downloader(tmp, stub)
+        medidor = Medidor()
+        for url in urls_de(ids_mistos(args.videos, args.sem_legenda)):
+            medidor.medir(downloader.download_single_video, url)
+        return medidor.finalizar()
+
+
+def cenario_adaptive(args, tmp: Path) -> Medidor:
+    """Lote recorrente: a primeira passada monta o histórico; só a segunda é medida."""
+    from outcome_store import OutcomeStore
+
+    with youtube_falso(args, tmp) as (_, stub):
+        downloader = novo_downloader(tmp, stub, outcomes=OutcomeStore(tmp / 'outcomes.sqlite3', seed=0))
+        urls = urls_de(ids_mistos(args.videos, args.sem_legenda))
+        for url in urls:
+            downloader.download_single_video(url)
+        medidor = Medidor()
+        for url in urls:
+            medidor.medir(downloader.download_single_video, url)
+        return medidor.finalizar()
+
+
+def cenario_process_file(args, tmp: Path) -> Medidor:
+    with youtube_falso(args, tmp) as (_, stub):
+        downloader = novo_downloader(tmp, stub, concurrency=args.concurrency)
+        arquivo = tmp / 'urls.txt'
+        arquivo.write_text('\n'.join(urls_de(ids_mistos(args.videos, args.sem_legenda))))
+
+        medidor = Medidor()
+        downloader.download_single_video = medidor.cronometrar(downloader.download_single_video)
+        downloader.process_urls_from_file(str(arquivo))
+        return medidor.finalizar()
+
+
+def cenario_proxy_pool(args, tmp: Path) -> Medidor:
+    """Lote saindo por ``--proxies`` proxies (YouTubes falsos), cada um limitado a ``--proxy-rate``.
+
+    ops/s deve crescer com o número de proxies.
+    """
+    from proxy_pool import ProxyPool
+
+    with youtube_falso(args, tmp) as (_, stub), contextlib.ExitStack() as pilha:
+        proxies = [pilha.enter_context(FakeYouTubeServer(latency=args.latency / 1000, jitter=args.jitter / 1000))
+                   for _ in range(args.proxies)]
+        pool = ProxyPool([proxy.base_url for proxy in proxies], rate=args.proxy_rate)
+        downloader = novo_downloader(tmp, stub, concurrency=args.concurrency, proxy_pool=pool)
+
+        medidor = Medidor()
+        downloader.download_single_video = medidor.cronometrar(downloader.download_single_video)
+        downloader.process_urls(urls_de(ids_mistos(args.videos, args.sem_legenda)))
+        return medidor.finalizar()
+
+
+def cenario_async(args, tmp: Path) -> Medidor:
+    from youtube_transcript_async import AsyncYouTubeTranscriptDownloader
+
+    async def rodar(server, stub, medidor):
+        async with AsyncYouTubeTranscriptDownloader(
+                output_dir=str(tmp / 'saida'), delay=0, concurrency=args.concurrency,
+                ytdlp_path=stub, watch_url=server.watch_url) as downloader:
+            original = downloader.download_single_video
+
+            async def medido(url):
+                inicio = time.perf_counter()
+                resultado = await original(url)
+                medidor.registrar(time.perf_counter() - inicio, bool(resultado))
+                return resultado
+
+            downloader.download_single_video = medido
+            await downloader.process_urls(urls_de(ids_mistos(args.videos, args.sem_legenda)))
+
+    with youtube_falso(args, tmp) as (server, stub):
+        medidor = Medidor()
+        asyncio.run(rodar(server, stub, medidor))
+        return medidor.finalizar()
+
+
+def _cenario_parser(args, tmp: Path, nome: str, conteudo: str) -> Medidor:
+    from youtube_transcript import YouTubeTranscriptDownloader
+
+    downloader = YouTubeTranscriptDownloader(output_dir=str(tmp / 'saida'), delay=0)
+    arquivo = tmp / nome
+    arquivo.write_text(conteudo, encoding='utf-8')
+    medidor = Medidor()
+    for _ in range(args.repeticoes):
+        medidor.medir(downloader.parse_subtitle_file, arquivo)
+    return medidor.finalizar()
+
+
+def cenario_parse_vtt(args, tmp: Path) -> Medidor:
+    return _cenario_parser(args, tmp, 'legenda.pt.vtt', build_vtt(args.cues))
+
+
+def cenario_parse_srt(args, tmp: Path) -> Medidor:
+    return _cenario_parser(args, tmp, 'legenda.pt.srt', build_srt(args.cues))
+
+
+def cenario_process_transcript_data(args, tmp: Path) -> Medidor:
+    from youtube_transcript import YouTubeTranscriptDownloader
+
+    downloader = YouTubeTranscriptDownloader(output_dir=str(tmp / 'saida'), delay=0)
+    dados = [{'text': f'frase número {i}\nda legenda  de teste', 'start': i * 2.0, 'duration': 2.0}
+             for i in range(args.cues)]
+    medidor = Medidor()
+    for _ in range(args.repeticoes):
+        medidor.medir(downloader.process_transcript_data, dados)
+    return medidor.finalizar()
+
+
+def cenario_helpers(args, tmp: Path) -> Medidor:
+    """clean_filename e extract_video_id, uma operação por chamada."""
+    from youtube_transcript import YouTubeTranscriptDownloader
+
+    downloader = YouTubeTranscriptDownloader(output_dir=str(tmp / 'saida'), delay=0)
+    urls = [
+        'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+        'https://youtu.be/dQw4w9WgXcQ?t=30',
+        'https://www.youtube.com/embed/dQw4w9WgXcQ',
+        'https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ&list=PL123',
+        'https://example.com/sem-video',
+    ]
+    titulos = ['Aula 01: Introdução à Álgebra | Parte 1/3', 'vídeo "especial" <ao vivo>?', 'a' * 200]
+    medidor = Medidor()
+    for i in range(args.repeticoes * 100):
+        medidor.medir(downloader.extract_video_id, urls[i % len(urls)], ok=lambda _: True)
+        medidor.medir(downloader.clean_filename, titulos[i % len(titulos)], ok=lambda _: True)
+    return medidor.finalizar()
+
+
+def _app_flask(tmp: Path):
+    """Importa o monolito com cache e saída em ``tmp`` e yt-dlp via subprocesso (o falso)."""
+    os.environ['TRANSCRIPT_CACHE_PATH'] = str(tmp / 'cache.sqlite3')
+    os.environ['TRANSCRIPT_SEARCH_INDEX_PATH'] = str(tmp / 'search.sqlite3')
+    sys.path.insert(0, str(ROOT_DIR / 'monolito'))
+    import youtube_transcript_downloader as monolito
+
+    app = monolito.create_app(monolito.YouTubeTranscriptDownloader(
+        output_dir=str(tmp / 'saida'), delay=0, ytdlp_backend='subprocess'))
+    return app.test_client()
+
+
+def cenario_flask(args, tmp: Path) -> Medidor:
+    with youtube_falso(args, tmp):
+        client = _app_flask(tmp)
+        urls = urls_de(ids_mistos(args.videos, args.sem_legenda))
+        ok = lambda resposta: resposta.status_code == 200 and resposta.get_json().get('success', True)
+
+        medidor = Medidor()
+        for url in urls:
+            medidor.medir(lambda: client.post('/api/process-single', json={'url': url}), ok=ok)
+        # Os lotes viram jobs em background: mede o envio e espera todos terminarem
+        job_ids = []
+        for inicio in range(0, len(urls), 10):
+            lote = urls[inicio:inicio + 10]
+            resposta = medidor.medir(lambda: client.post('/api/process-multiple', json={'urls': lote}),
+                                     ok=lambda r: r.status_code == 202)
+            if resposta.status_code == 202:
+                job_ids.append(resposta.get_json()['job_id'])
+        for job_id in job_ids:
+            while client.get(f'/api/jobs/{job_id}').get_json()['status'] in ('queued', 'running'):
+                time.sleep(0.05)
+        for _ in range(args.repeticoes):
+            medidor.medir(lambda: client.get('/api/health'), ok=lambda r: r.status_code == 200)
+        return medidor.finalizar()
+
+
+CENARIOS: Dict[str, Callable] = {
+    'single_video': cenario_single_video,
+    'adaptive': cenario_adaptive,
+    'process_file': cenario_process_file,
+    'proxy_pool': cenario_proxy_pool,
+    'async': cenario_async,
+    'parse_vtt': cenario_parse_vtt,
+    'parse_srt': cenario_parse_srt,
+    'process_transcript_data': cenario_process_transcript_data,
+    'helpers': cenario_helpers,
+    'flask': cenario_flask,
+}
+
+
+# --- Execução e relatório -----------------------------------------------------
+
+def rodar_cenario(nome: str, args) -> Dict:
+    """Executa um cenário no processo atual (chamado no processo filho)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            medidor = CENARIOS[nome](args, Path(tmp))
+    ops = len(medidor.latencias)
+    return {
+        'ops': ops,
+        'falhas': medidor.falhas,
+        'segundos': medidor.segundos,
+        'ops_s': ops / medidor.segundos if medidor.segundos else 0.0,
+        'p50_ms': percentil(medidor.latencias, 50) * 1000,
+        'p99_ms': percentil(medidor.latencias, 99) * 1000,
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def rodar_isolado(nome: str) -> Dict:
+    """Roda o cenário num processo filho e lê o resultado em JSON."""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        destino = f.name
+    try:
+        cmd = [sys.executable, __file__, *sys.argv[1:], '--run-one', nome, '--result-file', destino]
+        processo = subprocess.run(cmd, capture_output=True, text=True)
+        if processo.returncode != 0:
+            return {'erro': (processo.stderr.strip().splitlines() or ['falhou'])[-1]}
+        return json.loads(Path(destino).read_text())
+    finally:
+        os.unlink(destino)
+
+
+def comparar(resultados: Dict, baseline: Dict, tolerancia: float) -> List[str]:
+    """Regressões: throughput menor ou p99 maior que a baseline além da tolerância."""
+    regressoes = []
+    for nome, atual in resultados.items():
+        base = baseline.get('cenarios', {}).get(nome)
+        if not base or 'erro' in atual or 'erro' in base:
+            continue
+        if atual['ops_s'] < base['ops_s'] * (1 - tolerancia):
+            regressoes.append(f"{nome}: throughput {base['ops_s']:.1f} -> {atual['ops_s']:.1f} ops/s")
+        if atual['p99_ms'] > base['p99_ms'] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p99 {base['p99_ms']:.2f} -> {atual['p99_ms']:.2f} ms")
+    return regressoes
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks offline do YouTube Transcript Downloader")
+    parser.add_argument('--scenario', action='append', choices=sorted(CENARIOS),
+                        help="Cenário a rodar (repita para vários; padrão: todos)")
+    parser.add_argument('--videos', type=int, default=50, help="Vídeos nos cenários de rede")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--proxies', type=int, default=3, help="Proxies no cenário proxy_pool")
+    parser.add_argument('--proxy-rate', type=float, default=10, help="Vídeos/s por proxy no cenário proxy_pool")
+    parser.add_argument('--latency', type=float, default=20, help="Latência do YouTube falso (ms)")
+    parser.add_argument('--jitter', type=float, default=5, help="Variação da latência (ms)")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Fração de respostas 429")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fração de respostas 500")
+    parser.add_argument('--sem-legenda', type=float, default=0.1,
+                        help="Fração de vídeos sem legenda na API (usam o yt-dlp falso)")
+    parser.add_argument('--recorded-dir', help="Respostas gravadas para o YouTube falso")
+    parser.add_argument('--cues', type=int, default=2000, help="Cues por legenda nos cenários de parsing")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--json', help="Salva os resultados neste arquivo")
+    parser.add_argument('--baseline', help="Compara com resultados salvos por --json")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="Piora relativa aceita antes de acusar regressão")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.run_one:
+        Path(args.result_file).write_text(json.dumps(rodar_cenario(args.run_one, args)))
+        return 0
+
+    nomes = args.scenario or list(CENARIOS)
+    print(f"{'cenário':<26}{'ops':>6}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}{'falhas':>8}")
+    resultados = {}
+    for nome in nomes:
+        r = resultados[nome] = rodar_isolado(nome)
+        if 'erro' in r:
+            print(f"{nome:<26} ERRO: {r['erro']}")
+            continue
+        print(f"{nome:<26}{r['ops']:>6}{r['ops_s']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['pico_rss_mb']:>9.1f}{r['falhas']:>8}")
+
+    if args.json:
+        parametros = {k: v for k, v in vars(args).items() if k not in ('run_one', 'result_file', 'json', 'baseline')}
+        Path(args.json).write_text(json.dumps({'parametros': parametros, 'cenarios': resultados}, indent=2))
+        print(f"\n💾 Resultados salvos em {args.json}")
+
+    if args.baseline:
+        regressoes = comparar(resultados, json.loads(Path(args.baseline).read_text()), args.tolerancia)
+        if regressoes:
+            print("\n❌ Regressões em relação à baseline:")
+            for regressao in regressoes:
+                print(f"   - {regressao}")
+            return 1
+        print("\n✅ Sem regressões em relação à baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Memória por 1.000 cues: lista de dicts (formato atual) vs CompactTranscript.
+
+A representação atual é a que fica viva durante o processamento: a lista
+[{'text', 'start', 'duration'}] devolvida pela youtube-transcript-api mais a
+lista de strings limpas montada por ``process_transcript_data``.
+
+    python benchmarks/bench_transcript_model.py --cues 100000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from transcript_model import CompactTranscript
+
+PALAVRAS = "o rato roeu a roupa do rei de roma e a rainha ficou muito brava com ele".split()
+
+
+def gerar_dados(n: int) -> list:
+    """Trechos no formato da youtube-transcript-api, com textos distintos por cue."""
+    dados = []
+    for i in range(n):
+        inicio = i % len(PALAVRAS)
+        texto = ' '.join(PALAVRAS[inicio:] + PALAVRAS[:inicio][:3]) + f" {i}"
+        dados.append({'text': texto, 'start': i * 2.5, 'duration': 2.4})
+    return dados
+
+
+def representacao_atual(n: int):
+    dados = gerar_dados(n)
+    limpos = [' '.join(entry['text'].split()) for entry in dados]
+    return dados, limpos
+
+
+def representacao_compacta(n: int):
+    return CompactTranscript.from_api(gerar_dados(n))
+
+
+def medir(func, n: int) -> dict:
+    """Memória retida pelo resultado (tracemalloc) e tempo de construção."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    resultado = func(n)
+    retido = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del resultado
+
+    inicio = time.perf_counter()
+    func(n)
+    return {'retido': retido, 'segundos': time.perf_counter() - inicio}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cues', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    por_mil = args.cues / 1000
+    print(f"{args.cues} cues\n")
+    print(f"{'representação':<22}{'KB/1000 cues':>14}{'total MB':>10}{'tempo':>9}")
+    resultados = {}
+    for nome, func in (('lista de dicts', representacao_atual),
+                       ('CompactTranscript', representacao_compacta)):
+        r = medir(func, args.cues)
+        resultados[nome] = r
+        print(f"{nome:<22}{r['retido'] / 1024 / por_mil:>14.1f}{r['retido'] / 2**20:>10.1f}{r['segundos']:>8.2f}s")
+
+    razao = resultados['lista de dicts']['retido'] / max(1, resultados['CompactTranscript']['retido'])
+    print(f"\nCompactTranscript usa {razao:.1f}x menos memória")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Compara o yt-dlp em processo com o caminho via subprocesso.
+
+Usa o extrator falso de ``benchmarks/yt_dlp_plugins`` nos dois backends, então
+nenhuma requisição vai para o YouTube. Mede tempo de parede e de CPU (processo
+atual + filhos) por vídeo em ``download_with_ytdlp``.
+
+    python benchmarks/bench_ytdlp_backend.py --videos 20
+"""
+import argparse
+import contextlib
+import io
+import resource
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from youtube_transcript import YouTubeTranscriptDownloader
+
+
+def cpu_time() -> float:
+    """CPU do processo atual mais a dos filhos já finalizados."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def make_ytdlp_wrapper(directory: Path) -> str:
+    """Cria um executável 'yt-dlp' que roda o yt-dlp real com o extrator falso."""
+    wrapper = directory / 'yt-dlp'
+    wrapper.write_text(
+        '#!/bin/sh\n'
+        f'PYTHONPATH="{BENCH_DIR}" exec "{sys.executable}" -m yt_dlp "$@"\n'
+    )
+    wrapper.chmod(wrapper.stat().st_mode | stat.S_IEXEC)
+    return str(wrapper)
+
+
+def run(downloader: YouTubeTranscriptDownloader, videos: int) -> dict:
+    ids = [f"bench{i:06d}" for i in range(videos)]
+    falhas = 0
+
+    wall_start, cpu_start = time.perf_counter(), cpu_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for video_id in ids:
+            if not downloader.download_with_ytdlp(f"https://www.youtube.com/watch?v={video_id}", video_id):
+                falhas += 1
+    wall, cpu = time.perf_counter() - wall_start, cpu_time() - cpu_start
+
+    return {'wall_ms': wall / videos * 1000, 'cpu_ms': cpu / videos * 1000, 'falhas': falhas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--videos', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        wrapper = make_ytdlp_wrapper(tmp)
+
+        resultados = {
+            'subprocess': run(YouTubeTranscriptDownloader(
+                output_dir=str(tmp / 'sub'), ytdlp_path=wrapper, ytdlp_backend='subprocess'), args.videos),
+            'inprocess': run(YouTubeTranscriptDownloader(
+                output_dir=str(tmp / 'inproc'), ytdlp_backend='inprocess'), args.videos),
+        }
+
+    print(f"{'backend':<12} {'wall/vídeo':>12} {'CPU/vídeo':>12} {'falhas':>8}")
+    for nome, r in resultados.items():
+        print(f"{nome:<12} {r['wall_ms']:>9.1f} ms {r['cpu_ms']:>9.1f} ms {r['falhas']:>8}")
+    ganho = resultados['subprocess']['wall_ms'] / max(resultados['inprocess']['wall_ms'], 1e-9)
+    print(f"\nEm processo: {ganho:.1f}x mais rápido por vídeo")
+
+
+if __name__ == '__main__':
+    main()
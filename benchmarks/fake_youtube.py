@@ -0,0 +1,231 @@
+"""Servidor local que faz o papel do YouTube nos benchmarks.
+
+Responde ``/watch?v=<id>`` (página com o JSON de legendas, usada na listagem)
+e ``/api/timedtext`` (XML da transcrição). As respostas vêm de gravações em
+``recorded_dir``, quando existirem, ou são geradas por ``fixtures``. Latência,
+respostas 429, páginas de captcha (status 200) e falhas 500 são configuráveis
+para simular a rede real.
+
+Convenções de ID (11 caracteres, como no YouTube):
+    nocap...  vídeo sem legendas (força o fallback do yt-dlp)
+    gone...   vídeo indisponível (removido/privado; o yt-dlp falso também falha)
+    manual... legendas manuais em vez de automáticas
+    qualquer outro: legendas automáticas em pt e en
+    O canal do vídeo é ``UC`` + os 5 primeiros caracteres do ID (ex.: UCnocap).
+
+Uso avulso:
+    python benchmarks/fake_youtube.py --port 8765 --latency 50 --rate-429 0.05
+    python benchmarks/fake_youtube.py --record VIDEO_ID --recorded-dir gravacoes/
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+from fixtures import build_timedtext_xml, build_watch_page
+
+YOUTUBE_ROOT = 'https://www.youtube.com'
+RECAPTCHA_PAGE = '<html><body><div class="g-recaptcha"></div></body></html>'
+# Sem "playabilityStatus" nem legendas: a youtube-transcript-api levanta VideoUnavailable
+UNAVAILABLE_PAGE = '<html><body><div id="player-unavailable">Video unavailable</div></body></html>'
+
+
+def video_ids(n: int, prefix: str = 'v') -> List[str]:
+    """IDs de 11 caracteres no formato aceito por ``extract_video_id``."""
+    return [f"{prefix}{i:0{11 - len(prefix)}d}" for i in range(n)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'FakeYouTubeServer'
+    # Keep-alive, como o YouTube: clientes com pool reaproveitam a conexão. Cabeçalho e
+    # corpo saem em writes separados; sem TCP_NODELAY o delayed ACK somaria ~40 ms
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        fake = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        rota = url.path
+
+        atraso = fake.latency + (random.uniform(0, fake.jitter) if fake.jitter else 0)
+        if atraso:
+            time.sleep(atraso)
+
+        if rota not in ('/watch', '/api/timedtext') or 'v' not in query:
+            return self._send(404, 'not found', rota)
+
+        sorteio = fake.sortear()
+        if sorteio < fake.rate_429:
+            return self._send(429, RECAPTCHA_PAGE, rota)
+        if sorteio < fake.rate_429 + fake.failure_rate:
+            return self._send(500, 'erro simulado', rota)
+        # Como o YouTube: a página de captcha chega com status 200
+        if rota == '/watch' and sorteio < fake.rate_429 + fake.failure_rate + fake.captcha_rate:
+            return self._send(200, RECAPTCHA_PAGE, rota)
+
+        video_id = query['v'][0]
+        if rota == '/watch':
+            body = fake.watch_page(video_id)
+        else:
+            body = fake.timedtext(video_id, query.get('lang', ['pt'])[0])
+        self._send(200, body, rota)
+
+    def _send(self, status: int, body: str, rota: str):
+        self.server.contar(rota, status)
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeYouTubeServer(ThreadingHTTPServer):
+    """Servidor HTTP em thread própria com o comportamento configurável do YouTube.
+
+    ``latency``/``jitter`` em segundos por requisição; ``rate_429``,
+    ``failure_rate`` e ``captcha_rate`` são probabilidades (0 a 1) de responder
+    429, 500 ou a página de captcha com status 200 (só na listagem).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 rate_429: float = 0.0, failure_rate: float = 0.0,
+                 recorded_dir: Optional[Union[str, Path]] = None, cues: int = 200, seed: int = 0,
+                 captcha_rate: float = 0.0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.failure_rate = failure_rate
+        self.captcha_rate = captcha_rate
+        self.recorded_dir = Path(recorded_dir) if recorded_dir else None
+        self.requests: Counter = Counter()
+        # Conexões TCP aceitas (com keep-alive, bem menos que as requisições)
+        self.connections = 0
+
+        self._timedtext = build_timedtext_xml(cues)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    @property
+    def watch_url(self) -> str:
+        """Modelo de URL no formato de ``WATCH_URL`` da youtube-transcript-api."""
+        return self.base_url + '/watch?v={video_id}'
+
+    def start(self) -> 'FakeYouTubeServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> 'FakeYouTubeServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def sortear(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def contar(self, rota: str, status: int):
+        with self._lock:
+            self.requests[(rota, status)] += 1
+
+    def _recorded(self, *partes: str) -> Optional[str]:
+        if self.recorded_dir is None:
+            return None
+        arquivo = self.recorded_dir.joinpath(*partes)
+        if not arquivo.exists():
+            return None
+        # Gravações apontam para o YouTube real; reescreve para este servidor
+        return arquivo.read_text(encoding='utf-8').replace(YOUTUBE_ROOT, self.base_url)
+
+    def watch_page(self, video_id: str) -> str:
+        gravado = self._recorded('watch', f'{video_id}.html')
+        if gravado is not None:
+            return gravado
+        if video_id.startswith('gone'):
+            return UNAVAILABLE_PAGE
+        canal = f'UC{video_id[:5]}'
+        if video_id.startswith('nocap'):
+            return build_watch_page(video_id, self.base_url, languages=(), channel_id=canal)
+        kind = '' if video_id.startswith('manual') else 'asr'
+        return build_watch_page(video_id, self.base_url, kind=kind, channel_id=canal)
+
+    def timedtext(self, video_id: str, lang: str) -> str:
+        gravado = self._recorded('timedtext', f'{video_id}.{lang}.xml')
+        return gravado if gravado is not None else self._timedtext
+
+
+def record(video_id: str, recorded_dir: Path, languages=('pt', 'en')):
+    """Grava a página /watch e as transcrições de um vídeo real para replay."""
+    import requests
+    from youtube_transcript_api._transcripts import TranscriptListFetcher
+
+    session = requests.Session()
+    html = session.get(f'{YOUTUBE_ROOT}/watch?v={video_id}', headers={'Accept-Language': 'en-US'}).text
+    (recorded_dir / 'watch').mkdir(parents=True, exist_ok=True)
+    (recorded_dir / 'watch' / f'{video_id}.html').write_text(html, encoding='utf-8')
+
+    (recorded_dir / 'timedtext').mkdir(parents=True, exist_ok=True)
+    for transcript in TranscriptListFetcher(session).fetch(video_id):
+        if transcript.language_code in languages:
+            xml = session.get(transcript._url).text
+            (recorded_dir / 'timedtext' / f'{video_id}.{transcript.language_code}.xml').write_text(xml, encoding='utf-8')
+    print(f"💾 Gravado {video_id} em {recorded_dir}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube falso para benchmarks")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help="Latência por requisição (ms)")
+    parser.add_argument('--jitter', type=float, default=0, help="Variação aleatória da latência (ms)")
+    parser.add_argument('--rate-429', type=float, default=0, help="Fração de respostas 429")
+    parser.add_argument('--failure-rate', type=float, default=0, help="Fração de respostas 500")
+    parser.add_argument('--captcha-rate', type=float, default=0,
+                        help="Fração de páginas de captcha com status 200 na listagem")
+    parser.add_argument('--recorded-dir', help="Pasta com respostas gravadas (watch/, timedtext/)")
+    parser.add_argument('--record', metavar='VIDEO_ID', help="Grava as respostas reais de um vídeo e sai")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.record, Path(args.recorded_dir or 'benchmarks/recorded'))
+        return
+
+    server = FakeYouTubeServer(args.port, args.latency / 1000, args.jitter / 1000,
+                               args.rate_429, args.failure_rate, args.recorded_dir,
+                               captcha_rate=args.captcha_rate)
+    print(f"🎭 YouTube falso em {server.base_url} (Ctrl+C para sair)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
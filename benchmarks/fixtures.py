@@ -0,0 +1,128 @@
+"""Geradores de legendas de teste para os benchmarks (sem acesso à rede)."""
+import json
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+# Playlist/canal falso: "<nome>_<N>" na URL (ex.: playlist?list=PLabc_250, /@canal_40)
+COLLECTION_RE = re.compile(r'(?:list=|/@|/channel/|/c/|/user/)([0-9A-Za-z]{1,5})_(\d+)')
+
+
+def _ts(segundos: float, sep: str = '.') -> str:
+    millis = int(round(segundos * 1000))
+    horas, millis = divmod(millis, 3_600_000)
+    minutos, millis = divmod(millis, 60_000)
+    segs, millis = divmod(millis, 1000)
+    return f"{horas:02d}:{minutos:02d}:{segs:02d}{sep}{millis:03d}"
+
+
+def iter_rolling_vtt(cues: int, intervalo: float = 2.0) -> Iterator[str]:
+    """Gera um VTT no estilo das legendas automáticas do YouTube.
+
+    Cada frase aparece três vezes: como linha nova (com tags de tempo por
+    palavra), repetida numa cue de 10 ms e de novo como primeira linha da cue
+    seguinte, enquanto a legenda "rola".
+    """
+    yield "WEBVTT\nKind: captions\nLanguage: pt\n\n"
+    anterior = " "  # como no YouTube: a "linha anterior" da primeira cue é um espaço
+    for i in range(cues):
+        inicio = i * intervalo
+        fim = inicio + intervalo
+        palavras = f"frase número {i} da legenda de teste".split()
+        tempos = ''.join(
+            f"<{_ts(inicio + (j + 1) * intervalo / (len(palavras) + 1))}><c> {p}</c>"
+            for j, p in enumerate(palavras[1:])
+        )
+        atual = ' '.join(palavras)
+        yield (f"{_ts(inicio)} --> {_ts(fim - 0.01)} align:start position:0%\n"
+               f"{anterior}\n{palavras[0]}{tempos}\n\n")
+        yield (f"{_ts(fim - 0.01)} --> {_ts(fim)} align:start position:0%\n"
+               f"{atual}\n \n\n")
+        anterior = atual
+
+
+def build_vtt(cues: int = 200) -> str:
+    """VTT automático completo em memória."""
+    return ''.join(iter_rolling_vtt(cues))
+
+
+def build_srt(cues: int = 200, intervalo: float = 2.0) -> str:
+    """SRT simples, sem repetições."""
+    blocos = []
+    for i in range(cues):
+        inicio = i * intervalo
+        blocos.append(f"{i + 1}\n{_ts(inicio, ',')} --> {_ts(inicio + intervalo, ',')}\n"
+                      f"frase número {i} da legenda de teste\n")
+    return '\n'.join(blocos)
+
+
+def write_rolling_vtt(path: Path, hours: float = 10, intervalo: float = 2.0) -> Path:
+    """Grava em disco um VTT automático de ``hours`` horas, sem montá-lo em memória."""
+    cues = int(hours * 3600 / intervalo)
+    with open(path, 'w', encoding='utf-8') as f:
+        for bloco in iter_rolling_vtt(cues, intervalo):
+            f.write(bloco)
+    return path
+
+
+def build_timedtext_xml(cues: int = 200, intervalo: float = 2.0) -> str:
+    """Resposta de /api/timedtext no formato XML usado pela youtube-transcript-api."""
+    linhas = ['<?xml version="1.0" encoding="utf-8" ?><transcript>']
+    for i in range(cues):
+        linhas.append(f'<text start="{i * intervalo:.2f}" dur="{intervalo:.2f}">'
+                      f'frase número {i} da legenda &amp;amp; teste</text>')
+    linhas.append('</transcript>')
+    return ''.join(linhas)
+
+
+def build_watch_page(video_id: str, base_url: str, languages=('pt', 'en'), kind: str = 'asr',
+                     channel_id: str = 'UCfixture') -> str:
+    """Página /watch mínima com o JSON de legendas que a youtube-transcript-api procura.
+
+    ``base_url`` é a raiz do servidor que vai responder o /api/timedtext. Sem
+    ``languages``, a página vem sem legendas (TranscriptsDisabled).
+    """
+    video_details = json.dumps({'videoId': video_id, 'channelId': channel_id}, separators=(',', ':'))
+    if not languages:
+        return f'<html><body>"playabilityStatus": {{"status": "OK"}}, "videoDetails": {video_details}</body></html>'
+
+    tracks = [{
+        'baseUrl': f'{base_url}/api/timedtext?v={video_id}&lang={lang}',
+        'name': {'simpleText': lang},
+        'vssId': f'a.{lang}' if kind == 'asr' else f'.{lang}',
+        'languageCode': lang,
+        'kind': kind,
+        'isTranslatable': True,
+    } for lang in languages]
+    if kind != 'asr':
+        for track in tracks:
+            track.pop('kind')
+    captions = {
+        'playerCaptionsTracklistRenderer': {
+            'captionTracks': tracks,
+            'translationLanguages': [
+                {'languageCode': 'pt', 'languageName': {'simpleText': 'Portuguese'}},
+                {'languageCode': 'en', 'languageName': {'simpleText': 'English'}},
+            ],
+        }
+    }
+    # Como na página real, '&' das URLs vem escapado como \u0026 dentro do JSON
+    captions_json = json.dumps(captions).replace('&', '\\u0026')
+    return (f'<html><head><title>{video_id} - YouTube</title></head><body><script>'
+            f'var ytInitialPlayerResponse = {{"captions":{captions_json},"videoDetails":{video_details}}};'
+            '</script></body></html>')
+
+
+def collection_ids(url: str) -> Optional[List[str]]:
+    """IDs da playlist ou canal falso de ``url`` (None se não for um).
+
+    ``<nome>_<N>`` vira N vídeos com o prefixo ``<nome>``. Playlists vêm do mais
+    antigo para o mais novo e canais ao contrário, como no YouTube: aumentar N
+    acrescenta vídeos no fim da playlist ou no começo do canal.
+    """
+    match = COLLECTION_RE.search(url)
+    if not match:
+        return None
+    nome, total = match.group(1), int(match.group(2))
+    ids = [f"{nome}{i:0{11 - len(nome)}d}" for i in range(total)]
+    return ids if 'list=' in url else ids[::-1]
@@ -0,0 +1,137 @@
+"""Executável falso do yt-dlp para os benchmarks.
+
+Entende o subconjunto de opções usado pelos downloaders (``--dump-json``,
+``--write-sub``/``--write-auto-sub``, ``--sub-lang``, ``--output``,
+``--ignore-errors``, ``--version``, ``--flat-playlist --print id``) e grava
+legendas de fixture, sem rede e sem carregar o yt-dlp real. Vídeos com ID
+iniciado por ``nosub`` não têm legendas; os iniciados por ``gone`` estão
+indisponíveis (erro, como no yt-dlp). Playlists e canais seguem
+``fixtures.collection_ids``.
+
+Variáveis de ambiente:
+    STUB_YTDLP_FORMAT   vtt (padrão) ou srt
+    STUB_YTDLP_CUES     número de cues por legenda (padrão 200)
+    STUB_YTDLP_STARTUP  segundos de "inicialização" simulada por execução (padrão 0)
+    STUB_YTDLP_PAGE     segundos por página de 100 vídeos na listagem flat (padrão 0)
+"""
+import json
+import os
+import re
+import stat
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+VIDEO_ID_RE = re.compile(r'(?:v=|youtu\.be/)([0-9A-Za-z_-]{11})')
+LANGUAGES = ('pt', 'en')
+
+
+def make_stub_ytdlp(directory: Path) -> str:
+    """Cria ``directory/yt-dlp`` chamando este script. Retorna o caminho do executável."""
+    directory.mkdir(parents=True, exist_ok=True)
+    wrapper = directory / 'yt-dlp'
+    wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).resolve()}" "$@"\n')
+    wrapper.chmod(wrapper.stat().st_mode | stat.S_IEXEC)
+    return str(wrapper)
+
+
+def _info(video_id: str) -> dict:
+    return {
+        'id': video_id,
+        'title': f'Stub {video_id}',
+        'duration': 400,
+        'uploader': 'Stub Channel',
+        'channel_id': f'UC{video_id[:5]}',
+        'view_count': 0,
+    }
+
+
+def _parse_args(argv):
+    opcoes = {'dump_json': False, 'sub_langs': [], 'output': '%(title)s [%(id)s].%(ext)s', 'urls': []}
+    it = iter(argv)
+    for arg in it:
+        if arg == '--version':
+            opcoes['version'] = True
+        elif arg == '--flat-playlist':
+            opcoes['flat'] = True
+        elif arg == '--print':
+            opcoes['print'] = next(it, '')
+        elif arg in ('--dump-json', '-j'):
+            opcoes['dump_json'] = True
+        elif arg in ('--sub-lang', '--sub-langs'):
+            opcoes['sub_langs'] = next(it, '').split(',')
+        elif arg in ('--output', '-o'):
+            opcoes['output'] = next(it, opcoes['output'])
+        elif arg.startswith('-'):
+            continue
+        else:
+            opcoes['urls'].append(arg)
+    return opcoes
+
+
+def main(argv=None) -> int:
+    opcoes = _parse_args(sys.argv[1:] if argv is None else argv)
+    if opcoes.get('version'):
+        print('2099.01.01-stub')
+        return 0
+
+    startup = float(os.environ.get('STUB_YTDLP_STARTUP', '0'))
+    if startup:
+        time.sleep(startup)
+
+    sys.path.insert(0, str(BENCH_DIR))
+    from fixtures import build_srt, build_vtt, collection_ids
+
+    if opcoes.get('flat'):
+        pagina = float(os.environ.get('STUB_YTDLP_PAGE', '0'))
+        for url in opcoes['urls']:
+            ids = collection_ids(url)
+            if ids is None:
+                print(f"ERROR: Unsupported URL: {url}", file=sys.stderr)
+                return 1
+            for i, video_id in enumerate(ids):
+                if pagina and i % 100 == 0:
+                    time.sleep(pagina)
+                print(video_id, flush=True)
+        return 0
+
+    formato = os.environ.get('STUB_YTDLP_FORMAT', 'vtt')
+    cues = int(os.environ.get('STUB_YTDLP_CUES', '200'))
+    conteudo = build_srt(cues) if formato == 'srt' else build_vtt(cues)
+
+    falhas = 0
+    for url in opcoes['urls']:
+        match = VIDEO_ID_RE.search(url)
+        if not match:
+            print(f"ERROR: Unsupported URL: {url}", file=sys.stderr)
+            falhas += 1
+            continue
+        video_id = match.group(1)
+        if video_id.startswith('gone'):
+            print(f"ERROR: [youtube] {video_id}: Video unavailable", file=sys.stderr)
+            falhas += 1
+            continue
+        info = _info(video_id)
+
+        if opcoes['dump_json']:
+            print(json.dumps(info))
+            continue
+
+        if video_id.startswith('nosub'):
+            continue
+        for lang in opcoes['sub_langs']:
+            if lang not in LANGUAGES:
+                continue
+            destino = (opcoes['output']
+                       .replace('%(title)s', info['title'])
+                       .replace('%(id)s', video_id)
+                       .replace('%(ext)s', f'{lang}.{formato}'))
+            Path(destino).parent.mkdir(parents=True, exist_ok=True)
+            Path(destino).write_text(conteudo, encoding='utf-8')
+
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
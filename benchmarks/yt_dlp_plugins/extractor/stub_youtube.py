@@ -0,0 +1,50 @@
+"""Extrator falso do YouTube para os benchmarks.
+
+Carregado automaticamente pelo yt-dlp (sistema de plugins) quando a pasta
+``benchmarks`` está no sys.path/PYTHONPATH. Responde a URLs do YouTube sem
+acessar a rede, com legendas VTT embutidas no próprio info_dict. IDs iniciados
+por ``gone`` estão indisponíveis, como no YouTube falso. Playlists e canais
+seguem ``fixtures.collection_ids``, com as entradas geradas sob demanda.
+"""
+from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.utils import ExtractorError
+
+from fixtures import build_vtt, collection_ids
+
+STUB_VTT = build_vtt()
+
+
+class StubYoutubeIE(InfoExtractor):
+    IE_NAME = 'stub:youtube'
+    _VALID_URL = r'https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/)(?P<id>[0-9A-Za-z_-]{11})'
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        if video_id.startswith('gone'):
+            raise ExtractorError('Video unavailable', expected=True, video_id=video_id)
+        return {
+            'id': video_id,
+            'title': f'Stub {video_id}',
+            'duration': 400,
+            'uploader': 'Stub Channel',
+            'channel_id': f'UC{video_id[:5]}',
+            'view_count': 0,
+            'formats': [{'format_id': 'stub', 'url': 'http://127.0.0.1:9/stub.mp4', 'ext': 'mp4'}],
+            'automatic_captions': {
+                'pt': [{'ext': 'vtt', 'data': STUB_VTT}],
+                'en': [{'ext': 'vtt', 'data': STUB_VTT}],
+            },
+        }
+
+
+class StubYoutubeTabIE(InfoExtractor):
+    IE_NAME = 'stub:youtube:tab'
+    _VALID_URL = r'https?://(?:www\.)?youtube\.com/(?:playlist\?list=|@|channel/|c/|user/)(?P<id>[0-9A-Za-z_]+)'
+
+    def _real_extract(self, url):
+        ids = collection_ids(url)
+        if ids is None:
+            raise ExtractorError('Playlist does not exist', expected=True)
+        entries = (self.url_result(f'https://www.youtube.com/watch?v={video_id}', StubYoutubeIE, video_id)
+                   for video_id in ids)
+        return self.playlist_result(entries, self._match_id(url))
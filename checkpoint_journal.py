@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+class CheckpointJournal:
+    """Diário append-only (JSON lines) dos vídeos já concluídos num lote.
+
+    Cada vídeo terminado vira uma linha ``{"video_id", "success", "permanent", "detail", "ts"}``
+    gravada na hora, então um lote interrompido pode ser retomado pulando o que
+    já foi feito. Uma linha truncada no fim (queda no meio da escrita) é ignorada,
+    e a primeira gravação da retomada começa numa linha nova.
+    Quando o lote termina, ``complete`` apaga o diário.
+
+    Falhas transitórias (429, timeouts, disjuntor aberto) são sempre tentadas de
+    novo na retomada; só as permanentes (``permanent``: sem legendas, vídeo
+    indisponível) são puladas. Com ``retry_failed``, elas também são tentadas de novo.
+    """
+
+    def __init__(self, path: Union[str, Path], retry_failed: bool = False, fsync: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.retry_failed = retry_failed
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._file = None
+
+    def _load(self) -> Dict[str, Dict]:
+        """Lê as entradas existentes; a última de cada vídeo prevalece."""
+        entries: Dict[str, Dict] = {}
+        if not self.path.exists():
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    entry = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict) and entry.get('video_id'):
+                    entries[entry['video_id']] = entry
+        return entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        """Entrada do vídeo se ele deve ser pulado (concluído, ou falha permanente sem ``retry_failed``)."""
+        entry = self._entries.get(video_id)
+        if entry is None:
+            return None
+        if not entry.get('success') and (self.retry_failed or not entry.get('permanent')):
+            return None
+        return entry
+
+    def record(self, video_id: str, success: bool, detail: str = '', permanent: bool = False):
+        """Acrescenta o resultado de um vídeo ao diário (thread-safe).
+
+        ``permanent`` marca uma falha que não adianta tentar de novo na retomada.
+        """
+        entry = {'video_id': video_id, 'success': success, 'permanent': permanent and not success,
+                 'detail': detail, 'ts': round(time.time(), 3)}
+        linha = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = self._open()
+            self._file.write(linha)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._entries[video_id] = entry
+
+    def _open(self):
+        """Abre o diário para acréscimo, terminando a linha truncada que uma queda tenha deixado."""
+        arquivo = open(self.path, 'a', encoding='utf-8')
+        if arquivo.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                truncada = f.read(1) != b'\n'
+            if truncada:
+                # Sem isso, a próxima entrada seria colada no fragmento e perdida na leitura
+                arquivo.write('\n')
+        return arquivo
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def complete(self):
+        """Lote terminado: fecha e remove o diário."""
+        self.close()
+        self.path.unlink(missing_ok=True)
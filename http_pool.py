@@ -0,0 +1,101 @@
+"""Pool de conexões HTTP (keep-alive) compartilhado pelas chamadas da youtube-transcript-api.
+
+Cada vídeo continua com a sua ``requests.Session`` (cookies, proxy e contagem de
+requisições próprios), mas todas usam o mesmo adapter: a conexão TLS aberta para
+um vídeo é reaproveitada pelos seguintes, em vez de um handshake novo por vídeo.
+"""
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter thread-safe que soma as requisições e as conexões abertas em todos os pools.
+
+    Os contadores vêm dos pools do urllib3 (``num_requests``/``num_connections``);
+    pools descartados (por host ou proxy) têm os números guardados antes de fechar.
+    """
+
+    def __init__(self, pool_size: int = 10, **kwargs):
+        self._lock = threading.Lock()
+        # Requisições e conexões de pools já descartados
+        self._descartados = [0, 0]
+        super().__init__(pool_maxsize=pool_size, **kwargs)
+
+    def _contar_ao_descartar(self, manager):
+        fechar = manager.pools.dispose_func
+
+        def descartar(pool):
+            with self._lock:
+                self._descartados[0] += pool.num_requests
+                self._descartados[1] += pool.num_connections
+            if fechar is not None:
+                fechar(pool)
+
+        manager.pools.dispose_func = descartar
+        return manager
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self._contar_ao_descartar(self.poolmanager)
+
+    def proxy_manager_for(self, proxy: str, **proxy_kwargs):
+        # O HTTPAdapter não protege o dict de proxies: duas threads criariam dois pools
+        with self._lock:
+            if proxy in self.proxy_manager:
+                return self.proxy_manager[proxy]
+            return self._contar_ao_descartar(super().proxy_manager_for(proxy, **proxy_kwargs))
+
+    def stats(self) -> Dict[str, int]:
+        """Requisições feitas, conexões abertas e quantas requisições reaproveitaram uma conexão."""
+        with self._lock:
+            managers = [self.poolmanager, *self.proxy_manager.values()]
+            requisicoes, conexoes = self._descartados
+        for manager in managers:
+            for chave in manager.pools.keys():
+                pool = manager.pools.get(chave)
+                if pool is not None:
+                    requisicoes += pool.num_requests
+                    conexoes += pool.num_connections
+        return {'requests': requisicoes, 'connections': conexoes, 'reused': max(0, requisicoes - conexoes)}
+
+
+class PooledSession(requests.Session):
+    """Sessão de um vídeo montada sobre o adapter compartilhado.
+
+    ``close()`` só descarta os cookies: as conexões pertencem ao pool.
+    """
+
+    def close(self):
+        self.cookies.clear()
+
+
+class HttpPool:
+    """Conexões keep-alive compartilhadas, com tamanho do pool e proxy padrão configuráveis. Thread-safe.
+
+    ``pool_size`` é o máximo de conexões mantidas abertas por host (ou por proxy);
+    deve acompanhar a concorrência para que nenhum worker abra conexão descartável.
+    """
+
+    def __init__(self, pool_size: int = 10, proxy: Optional[str] = None):
+        self.pool_size = max(1, pool_size)
+        self.proxy = proxy
+        self.adapter = CountingHTTPAdapter(self.pool_size)
+
+    def session(self, proxy: Optional[str] = None) -> PooledSession:
+        """Nova sessão (cookies próprios) que usa as conexões do pool e o ``proxy`` (ou o padrão)."""
+        session = PooledSession()
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        proxy = proxy or self.proxy
+        if proxy:
+            session.proxies = {'http': proxy, 'https': proxy}
+        return session
+
+    def stats(self) -> Dict[str, int]:
+        return self.adapter.stats()
+
+    def close(self):
+        self.adapter.close()
@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Limites (em segundos) dos histogramas de latência: de requisições HTTP a execuções do yt-dlp
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    partes = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        partes.append(extra)
+    return '{' + ','.join(partes) + '}' if partes else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        linhas = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        linhas.extend(self._samples())
+        return '\n'.join(linhas)
+
+
+class Counter(_Metric):
+    """Contador monotônico, por combinação de labels."""
+
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            itens = sorted(self._values.items())
+        for key, value in itens:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex.: operações em andamento)."""
+
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Incrementa enquanto o bloco executa."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo com buckets fixos, no formato do Prometheus."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        indice = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[indice] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels):
+        """Mede a duração do bloco (inclusive quando ele termina com exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            return sum(self._counts.get(self._key(labels), ()))
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            itens = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        for key, counts, soma in itens:
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets + (float('inf'),), counts):
+                acumulado += quantidade
+                le = f'le="{_format_value(limite)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {acumulado}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(soma)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {acumulado}"
+
+
+class MetricsRegistry:
+    """Conjunto de métricas exposto no formato texto do Prometheus (``render``)."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
@@ -1,5 +1,5 @@
 # pip install flask flask-cors yt-dlp youtube-transcript-api requests beautifulsoup4
-from flask import Flask, request, jsonify, send_file ,render_template
+from flask import Flask, Response, g, request, jsonify, send_file ,render_template, stream_with_context
 from flask_cors import CORS
 import subprocess
 import os
@@ -10,25 +10,98 @@ import requests
 import io
 import zipfile
 import tempfile
+import shutil
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import NoTranscriptFound, TranscriptsDisabled, VideoUnavailable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Dict
+from youtube_transcript_api._errors import (
+    NoTranscriptAvailable, NoTranscriptFound, TranscriptsDisabled, VideoUnavailable
+)
+from youtube_transcript_api._transcripts import TranscriptListFetcher
 import xml.etree.ElementTree as ET
 from werkzeug.utils import secure_filename
+import itertools
 import threading
 import uuid
 import sys
 
+# Módulos compartilhados ficam na raiz do projeto
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from http_pool import HttpPool
+from metrics import MetricsRegistry
+from rate_limiter import AdaptiveRateLimiter, Throttled, backoff_delay
+from search_index import SearchIndex
+from subtitle_parser import load_subtitle_stream, parse_subtitle_stream
+from transcript_cache import TranscriptCache
+from transcript_model import CompactTranscript
+from url_ingestion import create_id_filter, iter_source_lines, iter_video_urls
+from ytdlp_backend import create_backend, download_subtitles_batch, yt_dlp
+
 app = Flask(__name__)
 CORS(app)  # Permite requisições do frontend
 
+# Métricas expostas em /metrics (formato texto do Prometheus)
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    'transcript_stage_seconds', 'Duração de cada etapa por estratégia (api: listing/fetch; ytdlp: metadata/subtitles/batch)',
+    ['strategy', 'stage'])
+OUTCOMES = metrics.counter(
+    'transcript_outcomes_total', 'Resultados por estratégia, com o tipo de erro nas falhas',
+    ['strategy', 'outcome', 'error'])
+IN_FLIGHT = metrics.gauge('transcript_in_flight', 'Requisições HTTP e downloads em andamento', ['kind'])
+SUBPROCESS_SPAWNS = metrics.counter('ytdlp_subprocess_spawns_total', 'Processos do yt-dlp iniciados', ['command'])
+DEPENDENCY_UP = metrics.gauge('dependency_up', 'Dependência disponível na última verificação (1/0)', ['dependency'])
+RATE_LIMIT = metrics.gauge('transcript_rate_limit_per_second', 'Taxa atual do limitador adaptativo (0: sem limite)')
+CIRCUIT_STATE = metrics.gauge('transcript_circuit_state', 'Disjuntor de limitação do YouTube (0 fechado, 1 testando, 2 aberto)')
+THROTTLED = metrics.counter('transcript_throttled_total', 'Respostas de limitação do YouTube (429 ou captcha)')
+HTTP_POOL = metrics.gauge('transcript_http_pool', 'Requisições da API de transcrições e conexões abertas para elas (requests/connections/reused)', ['kind'])
+
+
+def error_label(error: BaseException) -> str:
+    """Tipo de erro usado nos labels: 'timeout' para qualquer timeout, senão o nome da exceção."""
+    if isinstance(error, (requests.Timeout, subprocess.TimeoutExpired, TimeoutError)):
+        return 'timeout'
+    return type(error).__name__
+
+
+def record_outcome(strategy: str, success: bool, error: str = ''):
+    OUTCOMES.inc(strategy=strategy, outcome='success' if success else 'failure', error='' if success else error)
+
 class YouTubeTranscriptDownloader:
-    def __init__(self, output_dir: str = "transcricoes", delay: int = 2):
+    # Ordem de preferência dos idiomas e alvos de tradução
+    idiomas_preferidos = ['pt', 'pt-BR', 'en', 'en-US']
+    idiomas_traducao = ['pt', 'en']
+    
+    def __init__(self, output_dir: str = "transcricoes", delay: int = 2,
+                 cache: Optional[TranscriptCache] = None, ytdlp_backend: str = 'auto',
+                 search_index: Optional[SearchIndex] = None, http_pool_size: int = 10,
+                 proxy: Optional[str] = None, adaptive_rate: bool = True,
+                 max_rate: Optional[float] = None, max_retries: int = 3,
+                 backoff_base: float = 2.0, backoff_cap: float = 120.0):
         self.output_dir = Path(output_dir)
         self.delay = delay
+        # Ritmo dos lotes: começa em 1/delay e se ajusta às respostas (AIMD), com
+        # disjuntor sob limitação persistente. Sem ele, delay é uma pausa fixa.
+        self.rate_limiter = None
+        if adaptive_rate:
+            taxa = 1.0 / delay if delay and delay > 0 else None
+            if max_rate is None and taxa:
+                max_rate = 10 * taxa
+            self.rate_limiter = AdaptiveRateLimiter(taxa, max_rate=max_rate)
+        # Vídeos limitados (429/captcha) são tentados de novo com backoff exponencial e jitter
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.cache = cache
+        # Índice de busca (/api/search); as cues do parsing chegam nele via track_info['cues']
+        self.search_index = search_index
+        # Conexões keep-alive compartilhadas por todas as requisições (e threads) da API
+        self.http_pool = HttpPool(http_pool_size, proxy=proxy)
         self.output_dir.mkdir(exist_ok=True)
         
+        # yt-dlp em processo ('auto'/'inprocess') ou via executável ('subprocess')
+        self.ytdlp_backend = create_backend(ytdlp_backend, languages=['pt', 'pt-BR', 'en'])
+        
     def extract_video_id(self, url: str) -> Optional[str]:
         """Extrai o ID do vídeo de uma URL do YouTube."""
         if not url:
@@ -55,9 +128,25 @@ class YouTubeTranscriptDownloader:
 
     def get_video_info(self, video_id: str) -> Dict:
         """Obtém informações básicas do vídeo."""
+        if self.ytdlp_backend is not None:
+            try:
+                # A mesma extração é reaproveitada depois por download_with_ytdlp
+                with STAGE_SECONDS.time(strategy='ytdlp', stage='metadata'):
+                    info = self.ytdlp_backend.extract_info(f'https://youtube.com/watch?v={video_id}', video_id)
+                return {
+                    'title': info.get('title') or f'Video {video_id}',
+                    'duration': info.get('duration') or 0,
+                    'channel': info.get('uploader') or 'Unknown',
+                    'view_count': info.get('view_count') or 0
+                }
+            except Exception:
+                pass
+        
         try:
             cmd = ['yt-dlp', '--dump-json', '--no-download', f'https://youtube.com/watch?v={video_id}']
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            SUBPROCESS_SPAWNS.inc(command='dump-json')
+            with STAGE_SECONDS.time(strategy='ytdlp', stage='metadata'):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
             
             if result.returncode == 0:
                 info = json.loads(result.stdout)
@@ -77,11 +166,29 @@ class YouTubeTranscriptDownloader:
             'view_count': 0
         }
 
-    def download_with_ytdlp(self, url: str, video_id: str) -> Optional[str]:
-        """Baixa legendas usando yt-dlp como fallback."""
+    def download_with_ytdlp(self, url: str, video_id: str,
+                            track_info: Optional[Dict] = None,
+                            video_info: Optional[Dict] = None) -> Optional[str]:
+        """Baixa legendas usando yt-dlp como fallback.
+        
+        Usa o backend em processo quando disponível; o executável via subprocesso
+        fica como alternativa se o backend falhar. ``video_info`` evita uma nova
+        consulta de metadados quando o chamador já a fez.
+        """
+        if self.ytdlp_backend is not None:
+            try:
+                with STAGE_SECONDS.time(strategy='ytdlp', stage='subtitles'):
+                    legendas = self.ytdlp_backend.get_subtitles(url, video_id)
+                transcript = self._parse_subtitles(legendas, track_info)
+                record_outcome('ytdlp', bool(transcript), 'NoSubtitles')
+                return transcript
+            except Exception as e:
+                record_outcome('ytdlp', False, error_label(e))
+        
         try:
             # Obtém informações do vídeo
-            video_info = self.get_video_info(video_id)
+            if video_info is None:
+                video_info = self.get_video_info(video_id)
             title = self.clean_filename(video_info['title'])
                 
             # Tenta baixar legendas em português
@@ -97,143 +204,286 @@ class YouTubeTranscriptDownloader:
                     url
                 ]
                 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+                SUBPROCESS_SPAWNS.inc(command='subtitles')
+                with STAGE_SECONDS.time(strategy='ytdlp', stage='subtitles'):
+                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
                 
                 if result.returncode == 0:
                     # Procura pelo arquivo de legenda gerado
                     for file in self.output_dir.glob(f"*{video_id}*"):
                         if file.suffix in ['.vtt', '.srt']:
-                            transcript = self.parse_subtitle_file(file)
+                            transcript = self.parse_subtitle_file(file, track_info)
                             file.unlink()  # Remove arquivo temporário
+                            if track_info is not None:
+                                track_info.update(language=lang, track_type='ytdlp')
+                            record_outcome('ytdlp', bool(transcript), 'NoSubtitles')
                             return transcript
             
+            record_outcome('ytdlp', False, 'NoSubtitles')
             return None
             
         except Exception as e:
+            record_outcome('ytdlp', False, error_label(e))
             return None
 
-    def parse_subtitle_file(self, file_path: Path) -> Optional[str]:
-        """Converte arquivo de legenda (VTT/SRT) para texto limpo."""
+    def _parse_subtitles(self, legendas: List[Dict], track_info: Optional[Dict] = None) -> Optional[str]:
+        """Converte a primeira legenda utilizável ({'language', 'ext', 'data'}) em texto."""
+        for legenda in legendas:
+            if legenda['ext'] not in ('vtt', 'srt'):
+                continue
+            cues = load_subtitle_stream(io.StringIO(legenda['data']))
+            transcript = cues.text()
+            if transcript:
+                if track_info is not None:
+                    track_info.update(language=legenda['language'], track_type='ytdlp')
+                self._keep_cues(track_info, cues)
+                return transcript
+        return None
+
+    def download_many_with_ytdlp(self, items: List[Tuple[str, str]],
+                                 track_infos: Optional[Dict[str, Dict]] = None) -> Dict[str, Optional[str]]:
+        """Fallback do yt-dlp para vários vídeos (url, video_id) de uma vez.
+        
+        Em processo: uma extração por vídeo na mesma sessão do YoutubeDL. Via
+        executável: uma única invocação com todas as URLs e a lista combinada de
+        idiomas. Retorna {video_id: transcrição ou None}.
+        """
+        idiomas = ['pt', 'pt-BR', 'en']
+        resultados: Dict[str, Optional[str]] = {video_id: None for _, video_id in items}
+        if track_infos is None:
+            track_infos = {}
+        pendentes = list(items)
+        
+        if self.ytdlp_backend is not None:
+            # Como em download_with_ytdlp: a falha em processo conta, e o vídeo segue para o executável
+            erros: Dict[str, Exception] = {}
+            with STAGE_SECONDS.time(strategy='ytdlp', stage='batch'):
+                legendas = self.ytdlp_backend.get_subtitles_many(items, idiomas, errors=erros)
+            for video_id, lista in legendas.items():
+                resultados[video_id] = self._parse_subtitles(lista, track_infos.setdefault(video_id, {}))
+                record_outcome('ytdlp', bool(resultados[video_id]), 'NoSubtitles')
+            for erro in erros.values():
+                record_outcome('ytdlp', False, error_label(erro))
+            pendentes = [(url, video_id) for url, video_id in items if video_id not in legendas]
+        
+        if not pendentes:
+            return resultados
+        
+        erro_lote = None
+        pasta_lote = Path(tempfile.mkdtemp(prefix='ytdlp_lote_', dir=self.output_dir))
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            if file_path.suffix == '.vtt':
-                return self.parse_vtt(content)
-            elif file_path.suffix == '.srt':
-                return self.parse_srt(content)
-            
+            SUBPROCESS_SPAWNS.inc(command='batch')
+            with STAGE_SECONDS.time(strategy='ytdlp', stage='batch'):
+                arquivos = download_subtitles_batch('yt-dlp', [url for url, _ in pendentes], idiomas, pasta_lote)
+            for _, video_id in pendentes:
+                for lang, file in arquivos.get(video_id, []):
+                    track_info = track_infos.setdefault(video_id, {})
+                    transcript = self.parse_subtitle_file(file, track_info)
+                    if transcript:
+                        resultados[video_id] = transcript
+                        track_info.update(language=lang, track_type='ytdlp')
+                        break
+        except Exception as e:
+            erro_lote = e
+        finally:
+            # Os arquivos de legenda são temporários
+            shutil.rmtree(pasta_lote, ignore_errors=True)
+        
+        for _, video_id in pendentes:
+            transcript = resultados[video_id]
+            if transcript or erro_lote is None:
+                record_outcome('ytdlp', bool(transcript), 'NoSubtitles')
+            else:
+                record_outcome('ytdlp', False, error_label(erro_lote))
+        return resultados
+
+    def parse_subtitle_file(self, file_path: Path, track_info: Optional[Dict] = None) -> Optional[str]:
+        """Converte arquivo de legenda (VTT/SRT) para texto limpo.
+        
+        Lê o arquivo em pedaços (memória limitada) e colapsa as linhas repetidas
+        das legendas automáticas. Com índice de busca, as cues vão para ``track_info``;
+        sem ele, só o texto é montado.
+        """
+        if file_path.suffix not in ('.vtt', '.srt'):
             return None
+        
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                if track_info is None or self.search_index is None:
+                    return parse_subtitle_stream(f)
+                cues = load_subtitle_stream(f)
+            self._keep_cues(track_info, cues)
+            return cues.text()
             
         except Exception as e:
             return None
 
     def parse_vtt(self, content: str) -> str:
         """Converte conteúdo VTT para texto limpo."""
-        lines = content.split('\n')
-        text_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('WEBVTT') or '-->' in line or line.startswith('NOTE'):
-                continue
-            if line.isdigit():
-                continue
-            
-            line = re.sub(r'<[^>]*>', '', line)
-            if line:
-                text_lines.append(line)
-        
-        return ' '.join(text_lines)
+        return parse_subtitle_stream(io.StringIO(content))
 
     def parse_srt(self, content: str) -> str:
         """Converte conteúdo SRT para texto limpo."""
-        lines = content.split('\n')
-        text_lines = []
+        return parse_subtitle_stream(io.StringIO(content))
+
+    def iter_transcript_candidates(self, transcript_list) -> Iterator[Tuple[object, str, str]]:
+        """Ordena em memória as transcrições de uma única listagem.
         
-        for line in lines:
-            line = line.strip()
-            if not line or line.isdigit() or '-->' in line:
-                continue
-            
-            line = re.sub(r'<[^>]*>', '', line)
-            if line:
-                text_lines.append(line)
+        Gera tuplas (transcript, idioma, tipo): idiomas preferidos (manual antes de
+        automática), demais idiomas e, por fim, traduções da melhor trilha traduzível.
+        """
+        transcripts = sorted(transcript_list, key=lambda t: t.is_generated)
+        
+        preferidas = [t for idioma in self.idiomas_preferidos for t in transcripts if t.language_code == idioma]
+        demais = [t for t in transcripts if t.language_code not in self.idiomas_preferidos]
+        
+        for transcript in preferidas + demais:
+            yield transcript, transcript.language_code, 'auto' if transcript.is_generated else 'manual'
         
-        return ' '.join(text_lines)
+        fonte = next((t for t in transcripts if t.is_translatable), None)
+        if fonte is not None:
+            disponiveis = {lang['language_code'] for lang in fonte.translation_languages}
+            for target_lang in self.idiomas_traducao:
+                if target_lang in disponiveis and target_lang != fonte.language_code:
+                    yield fonte.translate(target_lang), target_lang, 'translated'
 
-    def download_transcript_api(self, video_id: str) -> Optional[str]:
-        """Baixa transcrição usando youtube-transcript-api."""
+    def _create_http_client(self, proxy: Optional[str] = None) -> requests.Session:
+        """Cria a sessão HTTP de uma tentativa sobre o pool compartilhado, contando as requisições feitas com ela.
+        
+        O total fica em ``http_client.responses``; respostas 429 marcam
+        ``http_client.throttled`` (a youtube-transcript-api não guarda o status).
+        """
+        http_client = self.http_pool.session(proxy)
+        http_client.throttled = False
+        http_client.responses = 0
+        
+        def contar_requisicao(response, *args, **kwargs):
+            http_client.responses += 1
+            if response.status_code == 429:
+                http_client.throttled = True
+        
+        http_client.hooks['response'].append(contar_requisicao)
+        return http_client
+
+    def download_transcript_api(self, video_id: str, track_info: Optional[Dict] = None,
+                                proxy: Optional[str] = None) -> Optional[str]:
+        """Baixa transcrição usando youtube-transcript-api, tentando de novo quando o YouTube limita.
+        
+        Uma única listagem por vídeo; preferência e fallbacks são resolvidos em memória.
+        Em falhas permanentes, ``track_info['failure']`` recebe o nome da exceção.
+        ``proxy`` substitui, só para este vídeo, o proxy do downloader.
+        
+        429 ou captcha reduz a taxa do limitador e o vídeo espera o backoff (e o
+        disjuntor) antes de outra tentativa, até ``max_retries``; as respostas
+        normais aumentam a taxa. Limitado até o fim, volta None sem ``failure``.
+        """
+        if track_info is not None:
+            track_info['http_requests'] = 0
+        for tentativa in range(self.max_retries + 1):
+            try:
+                texto = self._download_transcript_api_once(video_id, track_info, proxy)
+            except Throttled:
+                THROTTLED.inc()
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_throttle()
+                if tentativa >= self.max_retries:
+                    return None
+                with STAGE_SECONDS.time(strategy='api', stage='backoff'):
+                    time.sleep(backoff_delay(tentativa, self.backoff_base, self.backoff_cap))
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.acquire()
+                continue
+            if self.rate_limiter is not None and (texto is not None or (track_info or {}).get('failure')):
+                self.rate_limiter.on_success()
+            return texto
+        return None
+
+    def _download_transcript_api_once(self, video_id: str, track_info: Optional[Dict],
+                                      proxy: Optional[str]) -> Optional[str]:
+        """Uma tentativa de ``download_transcript_api``; levanta ``Throttled`` se o YouTube limitar."""
+        http_client = self._create_http_client(proxy)
         try:
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            
-            # Estratégia 1: Tentar idiomas preferidos
-            idiomas_preferidos = ['pt', 'pt-BR', 'en', 'en-US']
+            with STAGE_SECONDS.time(strategy='api', stage='listing'):
+                transcript_list = TranscriptListFetcher(http_client).fetch(video_id)
             
-            for idioma in idiomas_preferidos:
+            erro = 'NoTranscriptFetched'
+            for transcript, idioma, tipo in self.iter_transcript_candidates(transcript_list):
                 try:
-                    transcript_data = YouTubeTranscriptApi.get_transcript(
-                        video_id, 
-                        languages=[idioma]
-                    )
+                    with STAGE_SECONDS.time(strategy='api', stage='fetch'):
+                        transcript_data = transcript.fetch()
                     if transcript_data:
-                        return self.process_transcript_data(transcript_data)
-                except:
-                    continue
-            
-            # Estratégia 2: Tentar primeira transcrição disponível
-            for transcript in transcript_list:
-                try:
-                    transcript_data = transcript.fetch()
-                    if transcript_data:
-                        return self.process_transcript_data(transcript_data)
-                except:
+                        if track_info is not None:
+                            track_info.update(language=idioma, track_type=tipo)
+                        record_outcome('api', True)
+                        return self.process_transcript_data(transcript_data, track_info)
+                except Exception as e:
+                    erro = error_label(e)
+                    if http_client.throttled or erro == 'TooManyRequests':
+                        record_outcome('api', False, 'throttled')
+                        raise Throttled(erro) from e
                     continue
             
+            record_outcome('api', False, erro)
             return None
         
-        except (NoTranscriptFound, TranscriptsDisabled, VideoUnavailable):
+        except (NoTranscriptFound, NoTranscriptAvailable, TranscriptsDisabled, VideoUnavailable) as e:
+            record_outcome('api', False, type(e).__name__)
+            if track_info is not None:
+                track_info['failure'] = type(e).__name__
             return None
+        except Throttled:
+            raise
         except Exception as e:
+            erro = error_label(e)
+            if http_client.throttled or erro == 'TooManyRequests':
+                record_outcome('api', False, 'throttled')
+                raise Throttled(erro) from e
+            record_outcome('api', False, erro)
             return None
+        finally:
+            http_client.close()
+            if track_info is not None:
+                track_info['http_requests'] = track_info.get('http_requests', 0) + http_client.responses
 
-    def process_transcript_data(self, transcript_data: List[Dict]) -> str:
+    def process_transcript_data(self, transcript_data: List[Dict], track_info: Optional[Dict] = None) -> str:
         """Processa os dados da transcrição em texto limpo."""
         if not transcript_data:
             return ""
         
-        texto_completo = []
-        
-        for entry in transcript_data:
-            if isinstance(entry, dict) and 'text' in entry:
-                texto = entry['text'].strip()
-                if texto:
-                    texto = re.sub(r'[\n\r\t]+', ' ', texto)
-                    texto = re.sub(r'\s+', ' ', texto)
-                    texto_completo.append(texto)
-        
-        return ' '.join(texto_completo).strip()
+        cues = CompactTranscript.from_api(transcript_data)
+        self._keep_cues(track_info, cues)
+        return cues.text()
 
-    def download_single_video(self, url: str) -> Dict:
-        """Baixa transcrição de um único vídeo."""
-        if not url:
-            return {'success': False, 'message': 'URL não fornecida', 'url': url}
-        
-        video_id = self.extract_video_id(url)
-        if not video_id:
-            return {'success': False, 'message': 'ID do vídeo não encontrado', 'url': url}
-        
-        # Obtém informações do vídeo
-        video_info = self.get_video_info(video_id)
-        
-        # Estratégia 1: youtube-transcript-api
-        transcript = self.download_transcript_api(video_id)
-        
-        # Estratégia 2: yt-dlp se a primeira falhar
-        if not transcript:
-            transcript = self.download_with_ytdlp(url, video_id)
-        
+    def _keep_cues(self, track_info: Optional[Dict], cues: CompactTranscript):
+        """Guarda as cues em ``track_info['cues']`` quando há índice de busca."""
+        if track_info is not None and self.search_index is not None and len(cues):
+            track_info['cues'] = cues
+
+    def _index_transcript(self, video_id: str, transcript: str, track_info: Optional[Dict] = None,
+                          replace: bool = True):
+        """Atualiza o índice de busca com a transcrição (com os tempos, se as cues vieram)."""
+        if self.search_index is None:
+            return
+        cues = (track_info or {}).get('cues')
+        try:
+            self.search_index.add(video_id, cues if cues is not None else transcript,
+                                  replace=replace or cues is not None)
+        except Exception:
+            pass
+
+    def _build_result(self, url: str, video_id: str, transcript: Optional[str],
+                      video_info: Dict, track_info: Dict) -> Dict:
+        """Monta o dict de resultado de um vídeo e guarda as transcrições obtidas no cache."""
         if transcript:
+            if self.cache is not None:
+                try:
+                    self.cache.put(video_id, transcript,
+                                   language=track_info.get('language', 'unknown'),
+                                   track_type=track_info.get('track_type', 'unknown'),
+                                   metadata={'video_info': video_info})
+                except Exception:
+                    pass
+            self._index_transcript(video_id, transcript, track_info)
             return {
                 'success': True,
                 'url': url,
@@ -241,23 +491,419 @@ class YouTubeTranscriptDownloader:
                 'transcript': transcript,
                 'size': len(transcript),
                 'message': f'Sucesso - {len(transcript)} caracteres',
-                'video_info': video_info
+                'video_info': video_info,
+                'http_requests': track_info.get('http_requests', 0)
             }
         else:
-            return {
+            result = {
                 'success': False,
                 'url': url,
                 'video_id': video_id,
                 'message': 'Nenhuma transcrição disponível',
                 'video_info': video_info
             }
+            if track_info.get('failure'):
+                result['failure'] = track_info['failure']
+            return result
 
-# Instância global do downloader
-downloader = YouTubeTranscriptDownloader()
+    def _store_failure(self, result: Dict):
+        """Grava no cache negativo um vídeo em que todas as estratégias falharam de vez."""
+        if self.cache is None or result['success'] or not result.get('failure'):
+            return
+        try:
+            self.cache.put_failure(result['video_id'], result['failure'])
+        except Exception:
+            pass
+
+    def download_single_video(self, url: str, use_ytdlp: bool = True, force_refresh: bool = False,
+                              pace: Optional[Callable[[], None]] = None) -> Dict:
+        """Baixa transcrição de um único vídeo.
+        
+        Com ``use_ytdlp=False`` só a API é tentada (``process_batch`` roda o yt-dlp em lote depois).
+        Vídeos no cache negativo retornam na hora com ``unavailable``; ``force_refresh``
+        ignora o cache (positivo e negativo) e tenta de novo. ``pace`` é chamado
+        só quando o vídeo vai à rede (os acertos do cache não esperam).
+        """
+        if not url:
+            return {'success': False, 'message': 'URL não fornecida', 'url': url}
+        
+        video_id = self.extract_video_id(url)
+        if not video_id:
+            return {'success': False, 'message': 'ID do vídeo não encontrado', 'url': url}
+        
+        # Cache: acertos não fazem nenhuma requisição nem subprocesso
+        if self.cache is not None and not force_refresh:
+            cached = self.cache.get(video_id)
+            falha = None if cached else self.cache.get_failure(video_id)
+            if falha:
+                record_outcome('negative_cache', True)
+                return {
+                    'success': False,
+                    'url': url,
+                    'video_id': video_id,
+                    'message': f"Vídeo indisponível ({falha['reason']}, cache)",
+                    'video_info': {},
+                    'failure': falha['reason'],
+                    'unavailable': True,
+                    'cached': True
+                }
+            if cached:
+                record_outcome('cache', True)
+                transcript = cached['text']
+                # Vídeos baixados antes do índice existir entram nele no primeiro acerto
+                self._index_transcript(video_id, transcript, replace=False)
+                return {
+                    'success': True,
+                    'url': url,
+                    'video_id': video_id,
+                    'transcript': transcript,
+                    'size': len(transcript),
+                    'message': f'Sucesso (cache) - {len(transcript)} caracteres',
+                    'video_info': cached['metadata'].get('video_info', {}),
+                    'cached': True
+                }
+        
+        if pace is not None:
+            pace()
+        
+        with IN_FLIGHT.track_inprogress(kind='download'):
+            # Obtém informações do vídeo
+            video_info = self.get_video_info(video_id)
+            track_info: Dict = {}
+            
+            # Estratégia 1: youtube-transcript-api
+            transcript = self.download_transcript_api(video_id, track_info=track_info)
+            
+            # Estratégia 2: yt-dlp se a primeira falhar
+            if not transcript and use_ytdlp:
+                transcript = self.download_with_ytdlp(url, video_id, track_info=track_info, video_info=video_info)
+        
+        result = self._build_result(url, video_id, transcript, video_info, track_info)
+        if use_ytdlp:
+            self._store_failure(result)
+        return result
+
+    def iter_batch(self, urls: Iterable[str], ytdlp_batch_size: int = 50,
+                   should_stop: Optional[Callable[[], bool]] = None,
+                   force_refresh: bool = False) -> Iterator[Tuple[int, Dict, bool]]:
+        """Processa várias URLs gerando (indice, resultado, final) assim que cada vídeo termina.
+        
+        A API é tentada vídeo a vídeo e os que falharem passam juntos pelo yt-dlp em
+        lote: o fallback de N vídeos custa ~uma extração por vídeo, em vez de uma por
+        idioma. Um vídeo que ainda vai para o lote sai primeiro com ``final`` falso e
+        depois de novo com o resultado do lote. Só os resultados pendentes ficam em
+        memória. ``should_stop()`` interrompe o processamento entre vídeos. Vídeos do
+        cache negativo não vão para o lote. ``urls`` pode ser um gerador: cada URL só
+        é lida quando o vídeo anterior termina.
+        """
+        # Ritmo entre os vídeos que vão à rede: limitador adaptativo (ou pausa fixa de delay)
+        na_rede = 0
+        
+        def esperar_vez():
+            nonlocal na_rede
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            elif na_rede:
+                time.sleep(self.delay)
+            na_rede += 1
+        
+        pendentes = []
+        for i, url in enumerate(urls):
+            if should_stop is not None and should_stop():
+                return
+            
+            result = self.download_single_video(url, use_ytdlp=False, force_refresh=force_refresh,
+                                                pace=esperar_vez)
+            result['index'] = i
+            final = result['success'] or not result.get('video_id') or result.get('unavailable', False)
+            if not final:
+                pendentes.append(result)
+            yield i, result, final
+        
+        for inicio in range(0, len(pendentes), ytdlp_batch_size):
+            if should_stop is not None and should_stop():
+                return
+            lote = pendentes[inicio:inicio + ytdlp_batch_size]
+            track_infos: Dict[str, Dict] = {}
+            transcripts = self.download_many_with_ytdlp([(r['url'], r['video_id']) for r in lote], track_infos)
+            
+            for r in lote:
+                transcript = transcripts.get(r['video_id'])
+                if transcript:
+                    novo = self._build_result(r['url'], r['video_id'], transcript,
+                                              r.get('video_info', {}), track_infos.get(r['video_id'], {}))
+                    r.update(novo)
+                    r.pop('failure', None)
+                else:
+                    self._store_failure(r)
+                yield r['index'], r, True
+
+    def process_batch(self, urls: List[str], ytdlp_batch_size: int = 50,
+                      on_result: Optional[Callable[[int, Dict, bool], None]] = None,
+                      should_stop: Optional[Callable[[], bool]] = None,
+                      force_refresh: bool = False) -> List[Dict]:
+        """Processa várias URLs e retorna os resultados na ordem de entrada (ver ``iter_batch``).
+        
+        ``on_result(indice, resultado, final)`` é chamado a cada resultado gerado.
+        """
+        results: Dict[int, Dict] = {}
+        for i, result, final in self.iter_batch(urls, ytdlp_batch_size, should_stop, force_refresh):
+            results[i] = result
+            if on_result is not None:
+                on_result(i, result, final)
+        
+        return [results[i] for i in sorted(results)]
 
-# Armazenamento temporário de resultados de processamento
+
+class JobManager:
+    """Fila de jobs em background para os endpoints de vários vídeos.
+    
+    Os jobs rodam num pool limitado de threads; o estado de cada um (progresso por
+    URL e resultados) fica em ``jobs``. Jobs na fila podem ser cancelados; os em
+    execução param antes do próximo vídeo. Só os ``max_finished`` jobs terminados
+    mais recentes são mantidos.
+    """
+    
+    def __init__(self, downloader: 'YouTubeTranscriptDownloader', jobs: Dict[str, Dict],
+                 max_workers: int = 2, max_pending: int = 20, max_finished: int = 100):
+        self.downloader = downloader
+        self.jobs = jobs
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transcript-job')
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, urls: List[str], force_refresh: bool = False) -> Optional[Dict]:
+        """Enfileira um job. Retorna o estado inicial, ou None se a fila estiver cheia."""
+        with self._lock:
+            pendentes = sum(1 for job in self.jobs.values() if job['status'] in ('queued', 'running'))
+            if pendentes >= self.max_pending:
+                return None
+            
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'total': len(urls),
+                'processed': 0,
+                'successful': 0,
+                'failed': 0,
+                'items': [{'url': url, 'status': 'pending'} for url in urls],
+                'results': [None] * len(urls),
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'cancel_requested': False,
+            }
+            self._futures[job_id] = self._executor.submit(self._run, job_id, urls, force_refresh)
+            self._discard_finished()
+        return self.status(job_id)
+    
+    def _run(self, job_id: str, urls: List[str], force_refresh: bool = False):
+        job = self.jobs[job_id]
+        with self._lock:
+            if job['cancel_requested']:
+                return
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+        
+        def on_result(indice: int, result: Dict, final: bool):
+            with self._lock:
+                anterior = job['items'][indice]['status']
+                job['results'][indice] = result
+                if result['success']:
+                    status = 'success'
+                else:
+                    status = 'failed' if final else 'retrying'
+                job['items'][indice].update(
+                    status=status,
+                    video_id=result.get('video_id'),
+                    message=result.get('message'),
+                )
+                if anterior == 'pending':
+                    job['processed'] += 1
+                job['successful'] = sum(1 for item in job['items'] if item['status'] == 'success')
+                job['failed'] = sum(1 for item in job['items'] if item['status'] == 'failed')
+        
+        try:
+            self.downloader.process_batch(urls, on_result=on_result,
+                                          should_stop=lambda: job['cancel_requested'],
+                                          force_refresh=force_refresh)
+            status = 'cancelled' if job['cancel_requested'] else 'completed'
+        except Exception as e:
+            job['error'] = str(e)
+            status = 'error'
+        
+        with self._lock:
+            for item in job['items']:
+                if item['status'] in ('pending', 'retrying'):
+                    item['status'] = 'cancelled' if status == 'cancelled' else 'failed'
+            job['successful'] = sum(1 for item in job['items'] if item['status'] == 'success')
+            job['failed'] = sum(1 for item in job['items'] if item['status'] == 'failed')
+            job['status'] = status
+            job['finished_at'] = time.time()
+            self._futures.pop(job_id, None)
+    
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancela um job na fila (ou interrompe um em execução antes do próximo vídeo)."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] in ('queued', 'running'):
+                job['cancel_requested'] = True
+                future = self._futures.get(job_id)
+                if job['status'] == 'queued' and future is not None and future.cancel():
+                    job['status'] = 'cancelled'
+                    job['finished_at'] = time.time()
+                    for item in job['items']:
+                        item['status'] = 'cancelled'
+                    self._futures.pop(job_id, None)
+        return self.status(job_id)
+    
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Estado e progresso por URL, sem o texto das transcrições."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {
+                'job_id': job_id,
+                'status': job['status'],
+                'total': job['total'],
+                'processed': job['processed'],
+                'successful': job['successful'],
+                'failed': job['failed'],
+                'progress': job['processed'] / job['total'] if job['total'] else 1.0,
+                'items': [dict(item) for item in job['items']],
+                'created_at': job['created_at'],
+                'started_at': job['started_at'],
+                'finished_at': job['finished_at'],
+                'error': job.get('error'),
+            }
+    
+    def results(self, job_id: str) -> Optional[Dict]:
+        """Resultados já obtidos, no mesmo formato da resposta síncrona antiga."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            results = [r for r in job['results'] if r is not None]
+            return {
+                'job_id': job_id,
+                'status': job['status'],
+                'results': results,
+                'total': job['total'],
+                'successful': sum(1 for r in results if r['success']),
+                'failed': sum(1 for r in results if not r['success'])
+            }
+    
+    def _discard_finished(self):
+        terminados = [job for job in self.jobs.values() if job['finished_at'] is not None]
+        terminados.sort(key=lambda job: job['finished_at'])
+        for job in terminados[:max(0, len(terminados) - self.max_finished)]:
+            del self.jobs[job['job_id']]
+
+
+class DependencyProbe:
+    """Verificação das dependências feita uma vez na inicialização e renovada em background.
+    
+    O /api/health só lê o último resultado, sem abrir processos a cada chamada.
+    """
+    
+    def __init__(self, ytdlp_path: str = 'yt-dlp', interval: float = 300):
+        self.ytdlp_path = ytdlp_path
+        self.interval = interval
+        self.status: Dict[str, str] = {}
+        self.versions: Dict[str, Optional[str]] = {}
+        self.checked_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def check(self) -> Dict[str, str]:
+        """Executa a verificação agora e atualiza o estado e as métricas."""
+        versions: Dict[str, Optional[str]] = {}
+        try:
+            SUBPROCESS_SPAWNS.inc(command='version')
+            result = subprocess.run([self.ytdlp_path, '--version'], capture_output=True, text=True, timeout=30)
+            versions['yt-dlp'] = result.stdout.strip() if result.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired):
+            versions['yt-dlp'] = None
+        
+        versions['yt-dlp (módulo)'] = yt_dlp.version.__version__ if yt_dlp is not None else None
+        try:
+            from importlib.metadata import version
+            versions['youtube-transcript-api'] = version('youtube-transcript-api')
+        except Exception:
+            versions['youtube-transcript-api'] = None
+        
+        self.versions = versions
+        self.status = {nome: 'ok' if versao else 'not found' for nome, versao in versions.items()}
+        self.checked_at = time.time()
+        for nome, versao in versions.items():
+            DEPENDENCY_UP.set(1 if versao else 0, dependency=nome)
+        return self.status
+    
+    def start(self) -> 'DependencyProbe':
+        """Faz a primeira verificação e agenda as renovações a cada ``interval`` segundos."""
+        self.check()
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='dependency-probe', daemon=True)
+            self._thread.start()
+        return self
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+    
+    def stop(self):
+        self._stop.set()
+
+# Estado do servidor, montado por create_app (no __main__ ou na primeira requisição):
+# importar o módulo não cria arquivos nem inicia processos
+downloader: Optional[YouTubeTranscriptDownloader] = None
+jobs: Optional[JobManager] = None
+dependencies = DependencyProbe(interval=float(os.environ.get('HEALTH_PROBE_INTERVAL', '300')))
+
+# Armazenamento temporário de resultados de processamento (estado dos jobs)
 processing_results = {}
 
+_startup_lock = threading.Lock()
+
+def create_downloader() -> YouTubeTranscriptDownloader:
+    """Downloader do servidor (com cache persistente de transcrições e índice de busca),
+    configurado pelas variáveis de ambiente ``TRANSCRIPT_*``."""
+    return YouTubeTranscriptDownloader(
+        cache=TranscriptCache(os.environ.get('TRANSCRIPT_CACHE_PATH', 'transcricoes/cache.sqlite3')),
+        search_index=SearchIndex(os.environ.get('TRANSCRIPT_SEARCH_INDEX_PATH', 'transcricoes/search.sqlite3')),
+        http_pool_size=int(os.environ.get('TRANSCRIPT_HTTP_POOL_SIZE', 10)),
+        proxy=os.environ.get('TRANSCRIPT_PROXY') or None,
+        adaptive_rate=os.environ.get('TRANSCRIPT_FIXED_DELAY', '0') != '1',
+        max_rate=float(os.environ['TRANSCRIPT_MAX_RATE']) if os.environ.get('TRANSCRIPT_MAX_RATE') else None,
+        max_retries=int(os.environ.get('TRANSCRIPT_MAX_RETRIES', 3))
+    )
+
+def create_app(downloader_instance: Optional[YouTubeTranscriptDownloader] = None) -> Flask:
+    """Monta o estado do servidor e devolve o app Flask.
+    
+    Cria o downloader (ou usa ``downloader_instance``) e a fila de jobs, e inicia a
+    verificação de dependências em background. Sem ``downloader_instance``, chamadas
+    seguintes não refazem nada.
+    """
+    global downloader, jobs
+    with _startup_lock:
+        if downloader_instance is not None or downloader is None:
+            downloader = downloader_instance or create_downloader()
+            jobs = JobManager(
+                downloader, processing_results,
+                max_workers=int(os.environ.get('TRANSCRIPT_JOB_WORKERS', '2')),
+                max_pending=int(os.environ.get('TRANSCRIPT_MAX_PENDING_JOBS', '20'))
+            )
+        if dependencies.checked_at is None:
+            dependencies.start()
+    return app
+
 def safe_print(text):
     """Função para imprimir texto de forma segura, lidando com problemas de encoding."""
     try:
@@ -267,6 +913,24 @@ def safe_print(text):
         safe_text = text.encode('ascii', 'replace').decode('ascii')
         print(safe_text)
 
+@app.before_request
+def ensure_started():
+    # Servidores WSGI importam só o ``app``: o estado é montado na primeira requisição
+    if downloader is None:
+        create_app()
+
+@app.before_request
+def track_request_start():
+    IN_FLIGHT.inc(kind='http_request')
+    g.in_flight_tracked = True
+
+@app.teardown_request
+def track_request_end(error=None):
+    # Com stream_with_context o teardown roda duas vezes (fim da view e fim do stream):
+    # só o primeiro que encontrar a marca decrementa
+    if g.pop('in_flight_tracked', False):
+        IN_FLIGHT.dec(kind='http_request')
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -284,12 +948,90 @@ def process_single_video():
         if 'youtube.com' not in url and 'youtu.be' not in url:
             return jsonify({'error': 'URL deve ser do YouTube'}), 400
         
-        result = downloader.download_single_video(url)
+        result = downloader.download_single_video(url, force_refresh=requested_force_refresh(data))
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+def requested_force_refresh(data: Optional[Dict] = None) -> bool:
+    """Opção ``force_refresh`` do corpo JSON, do formulário ou da query string."""
+    valor = (data or {}).get('force_refresh', request.values.get('force_refresh', False))
+    if isinstance(valor, str):
+        return valor.strip().lower() in ('1', 'true', 'yes', 'sim')
+    return bool(valor)
+
+def submit_job(urls: List[str], force_refresh: bool = False):
+    """Enfileira o processamento em background e responde na hora com o ID do job."""
+    job = jobs.submit(urls, force_refresh)
+    if job is None:
+        return jsonify({'error': 'Fila de processamento cheia, tente novamente mais tarde'}), 503
+    
+    job['status_url'] = f"/api/jobs/{job['job_id']}"
+    job['result_url'] = f"/api/jobs/{job['job_id']}/result"
+    return jsonify(job), 202
+
+# Formatos de resposta em streaming: ?stream=ndjson|sse ou o cabeçalho Accept
+STREAM_MIMETYPES = {'ndjson': 'application/x-ndjson', 'sse': 'text/event-stream'}
+
+def requested_stream_format() -> Optional[str]:
+    """Formato de streaming pedido pelo cliente, ou None para o modo job."""
+    formato = request.args.get('stream')
+    if formato in STREAM_MIMETYPES:
+        return formato
+    melhor = request.accept_mimetypes.best_match(['application/json', *STREAM_MIMETYPES.values()])
+    for nome, mimetype in STREAM_MIMETYPES.items():
+        if melhor == mimetype:
+            return nome
+    return None
+
+def format_stream_record(formato: str, tipo: str, dados: Dict) -> str:
+    """Um registro NDJSON (uma linha) ou um evento SSE."""
+    if formato == 'sse':
+        return f"event: {tipo}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+    return json.dumps({'type': tipo, **dados}, ensure_ascii=False) + '\n'
+
+def stream_batch(urls: Iterable[str], formato: str, force_refresh: bool = False) -> Iterator[str]:
+    """Envia cada resultado assim que ele fica pronto e, no fim, um resumo.
+    
+    Os resultados não são acumulados: a memória não cresce com o tamanho do lote.
+    Vídeos que vão para o lote do yt-dlp saem depois, quando o lote termina (o
+    campo ``index`` indica a posição na entrada).
+    """
+    inicio = time.time()
+    successful = failed = 0
+    for _, result, final in downloader.iter_batch(urls, force_refresh=force_refresh):
+        if not final:
+            continue
+        if result['success']:
+            successful += 1
+        else:
+            failed += 1
+        yield format_stream_record(formato, 'result', result)
+    
+    yield format_stream_record(formato, 'summary', {
+        'total': successful + failed,
+        'successful': successful,
+        'failed': failed,
+        'elapsed': round(time.time() - inicio, 3)
+    })
+
+def respond_batch(urls: Iterable[str], force_refresh: bool = False):
+    """Streaming (NDJSON/SSE) quando pedido; caso contrário, job em background.
+    
+    No streaming, ``urls`` é consumido sob demanda, enquanto a resposta é enviada.
+    """
+    formato = requested_stream_format()
+    if formato is None:
+        return submit_job(list(urls), force_refresh)
+    
+    return Response(
+        stream_batch(urls, formato, force_refresh),
+        mimetype=STREAM_MIMETYPES[formato],
+        # Evita que proxies (ex.: nginx) segurem a resposta em buffer
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/process-multiple', methods=['POST'])
 def process_multiple_videos():
     """Processa múltiplos vídeos."""
@@ -310,27 +1052,24 @@ def process_multiple_videos():
         if not valid_urls:
             return jsonify({'error': 'Nenhuma URL válida do YouTube encontrada'}), 400
         
-        # Processa URLs
-        results = []
-        for i, url in enumerate(valid_urls):
-            result = downloader.download_single_video(url)
-            result['index'] = i
-            results.append(result)
-            
-            # Delay entre requisições
-            if i < len(valid_urls) - 1:
-                time.sleep(downloader.delay)
-        
-        return jsonify({
-            'results': results,
-            'total': len(valid_urls),
-            'successful': sum(1 for r in results if r['success']),
-            'failed': sum(1 for r in results if not r['success'])
-        })
+        return respond_batch(valid_urls, requested_force_refresh(data))
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+def iter_upload_urls(file) -> Iterator[str]:
+    """URLs de um arquivo enviado, lidas linha a linha e sem repetir vídeos.
+    
+    O Flask fecha os uploads quando a view retorna, antes de uma resposta em
+    streaming terminar; por isso o conteúdo vai para um arquivo temporário (em
+    memória até 8 MB, depois em disco) que o gerador fecha ao terminar.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as upload:
+        shutil.copyfileobj(file.stream, upload)
+        upload.seek(0)
+        yield from iter_video_urls(iter_source_lines(upload), downloader.extract_video_id,
+                                   create_id_filter('set'))
+
 @app.route('/api/process-file', methods=['POST'])
 def process_file():
     """Processa arquivo com URLs."""
@@ -345,41 +1084,69 @@ def process_file():
         if not file.filename.lower().endswith('.txt'):
             return jsonify({'error': 'Apenas arquivos .txt são aceitos'}), 400
         
-        # Lê conteúdo do arquivo
-        content = file.read().decode('utf-8')
-        lines = content.split('\n')
-        
-        # Extrai URLs válidas
-        valid_urls = []
-        for line in lines:
-            line = line.strip()
-            if line and not line.startswith('#') and ('youtube.com' in line or 'youtu.be' in line):
-                valid_urls.append(line)
-        
-        if not valid_urls:
+        urls = iter_upload_urls(file)
+        primeira = next(urls, None)
+        if primeira is None:
             return jsonify({'error': 'Nenhuma URL válida encontrada no arquivo'}), 400
         
-        # Processa URLs
-        results = []
-        for i, url in enumerate(valid_urls):
-            result = downloader.download_single_video(url)
-            result['index'] = i
-            results.append(result)
-            
-            # Delay entre requisições
-            if i < len(valid_urls) - 1:
-                time.sleep(downloader.delay)
-        
-        return jsonify({
-            'results': results,
-            'total': len(valid_urls),
-            'successful': sum(1 for r in results if r['success']),
-            'failed': sum(1 for r in results if not r['success'])
-        })
+        return respond_batch(itertools.chain([primeira], urls), requested_force_refresh())
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Estado do job com o progresso de cada URL."""
+    job = jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/result')
+def job_result(job_id):
+    """Resultados do job (parciais enquanto ele estiver em andamento)."""
+    result = jobs.results(job_id)
+    if result is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(result)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancela um job na fila ou interrompe um em execução."""
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job)
+
+@app.route('/api/search')
+def search_transcripts():
+    """Busca textual nas transcrições já baixadas: vídeos, snippets e início de cada trecho.
+    
+    Parâmetros: ``q`` (obrigatório), ``limit`` (padrão 20, máximo 100), ``hits`` por
+    vídeo (padrão 3) e ``order`` (``rank`` por relevância ou ``recent``).
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        hits = min(max(int(request.args.get('hits', 3)), 1), 20)
+    except ValueError:
+        return jsonify({'error': 'limit e hits devem ser números inteiros'}), 400
+    
+    inicio = time.perf_counter()
+    try:
+        results = downloader.search_index.search(query, limit=limit, hits_per_video=hits,
+                                                 order=request.args.get('order', 'rank'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'query': query,
+        'results': results,
+        'count': len(results),
+        'elapsed_ms': round((time.perf_counter() - inicio) * 1000, 2)
+    })
+
 @app.route('/api/download-transcript/<video_id>')
 def download_transcript(video_id):
     """Faz download de uma transcrição específica."""
@@ -412,51 +1179,133 @@ def download_transcript(video_id):
     except Exception as e:
         return jsonify({'error': f'Erro ao fazer download: {str(e)}'}), 500
 
-@app.route('/api/download-all', methods=['POST'])
+class _ZipStream(io.RawIOBase):
+    """Destino não pesquisável para o ZipFile: acumula os bytes até serem drenados."""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.pending = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.pending += len(data)
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.pending = 0
+        return data
+
+
+def iter_zip(entries: Iterator[Tuple[str, Iterator[str]]], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Gera um ZIP em pedaços conforme as entradas (nome, pedaços de texto) são comprimidas.
+    
+    Nem o arquivo completo nem o texto de todas as transcrições ficam em memória:
+    cada entrada é lida e comprimida sob demanda, e os bytes comprimidos saem assim
+    que ultrapassam ``chunk_size``.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for filename, partes in entries:
+            with zip_file.open(filename, 'w') as destino:
+                for parte in partes:
+                    destino.write(parte.encode('utf-8'))
+                    if stream.pending >= chunk_size:
+                        yield stream.drain()
+            yield stream.drain()
+    yield stream.drain()
+
+
+def transcript_file_parts(video_id: str, transcript: str, video_info: Dict, url: str,
+                          chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """Cabeçalho com as informações do vídeo seguido do texto, em pedaços."""
+    yield (f"# Transcrição do YouTube\n"
+           f"# Vídeo ID: {video_id}\n"
+           f"# Título: {video_info.get('title', 'N/A')}\n"
+           f"# Canal: {video_info.get('channel', 'N/A')}\n"
+           f"# URL: {url or 'N/A'}\n"
+           f"# Caracteres: {len(transcript)}\n\n")
+    for inicio in range(0, len(transcript), chunk_size):
+        yield transcript[inicio:inicio + chunk_size]
+
+
+def zip_entries_from_cache(video_ids: List[str]) -> Iterator[Tuple[str, Iterator[str]]]:
+    """Entradas do ZIP lidas do cache uma a uma; IDs ausentes vão para um arquivo à parte."""
+    faltando = []
+    for video_id in video_ids:
+        cached = downloader.cache.get(video_id) if downloader.cache is not None else None
+        if not cached:
+            faltando.append(video_id)
+            continue
+        video_info = cached['metadata'].get('video_info', {})
+        yield (f"transcricao_{video_id}.txt",
+               transcript_file_parts(video_id, cached['text'], video_info,
+                                     f'https://youtube.com/watch?v={video_id}'))
+    if faltando:
+        yield ("transcricoes_indisponiveis.txt", iter(['\n'.join(faltando) + '\n']))
+
+
+def zip_entries_from_results(results: List[Dict]) -> Iterator[Tuple[str, Iterator[str]]]:
+    """Entradas do ZIP a partir de resultados de download_single_video."""
+    for result in results:
+        video_id = result.get('video_id', 'unknown')
+        yield (f"transcricao_{video_id}.txt",
+               transcript_file_parts(video_id, result['transcript'], result.get('video_info', {}),
+                                     result.get('url')))
+
+
+@app.route('/api/download-all', methods=['GET', 'POST'])
 def download_all_transcripts():
-    """Faz download de todas as transcrições em um arquivo ZIP."""
+    """Faz download de várias transcrições em um arquivo ZIP, gerado em streaming.
+    
+    As transcrições são referenciadas no servidor: ``job_id`` (resultado de um job de
+    /api/process-multiple ou /api/process-file) ou ``video_ids`` (lidos do cache),
+    no corpo JSON ou na query string (``video_ids`` separados por vírgula). O formato
+    antigo, com ``results`` contendo o texto das transcrições, continua aceito.
+    """
     try:
-        data = request.get_json()
-        results = data.get('results', [])
-        
-        if not results:
-            return jsonify({'error': 'Nenhum resultado fornecido'}), 400
-        
-        # Filtra apenas resultados bem-sucedidos
-        successful_results = [r for r in results if r.get('success') and r.get('transcript')]
-        
-        if not successful_results:
-            return jsonify({'error': 'Nenhuma transcrição disponível'}), 400
+        data = request.get_json(silent=True) or {}
+        job_id = data.get('job_id') or request.args.get('job_id')
+        video_ids = data.get('video_ids') or [v for v in request.args.get('video_ids', '').split(',') if v]
         
-        # Cria arquivo ZIP em memória
-        zip_buffer = io.BytesIO()
+        if job_id:
+            job = jobs.results(job_id)
+            if job is None:
+                return jsonify({'error': 'Job não encontrado'}), 404
+            successful_results = [r for r in job['results'] if r.get('success') and r.get('transcript')]
+            if not successful_results:
+                return jsonify({'error': 'Nenhuma transcrição disponível'}), 400
+            entries = zip_entries_from_results(successful_results)
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for result in successful_results:
-                video_id = result.get('video_id', 'unknown')
-                transcript = result.get('transcript', '')
-                video_info = result.get('video_info', {})
-                
-                filename = f"transcricao_{video_id}.txt"
-                
-                # Adiciona informações do vídeo no início
-                content = f"# Transcrição do YouTube\n"
-                content += f"# Vídeo ID: {video_id}\n"
-                content += f"# Título: {video_info.get('title', 'N/A')}\n"
-                content += f"# Canal: {video_info.get('channel', 'N/A')}\n"
-                content += f"# URL: {result.get('url', 'N/A')}\n"
-                content += f"# Caracteres: {len(transcript)}\n\n"
-                content += transcript
-                
-                zip_file.writestr(filename, content.encode('utf-8'))
+        elif video_ids:
+            video_ids = list(dict.fromkeys(v.strip() for v in video_ids))
+            invalidos = [v for v in video_ids if not re.fullmatch(r'[a-zA-Z0-9_-]{11}', v)]
+            if invalidos:
+                return jsonify({'error': f'IDs de vídeo inválidos: {", ".join(invalidos[:10])}'}), 400
+            if downloader.cache is None or not any(downloader.cache.has(v) for v in video_ids):
+                return jsonify({'error': 'Nenhuma transcrição disponível'}), 404
+            entries = zip_entries_from_cache(video_ids)
         
-        zip_buffer.seek(0)
+        else:
+            results = data.get('results', [])
+            if not results:
+                return jsonify({'error': 'Informe job_id, video_ids ou results'}), 400
+            
+            # Filtra apenas resultados bem-sucedidos
+            successful_results = [r for r in results if r.get('success') and r.get('transcript')]
+            if not successful_results:
+                return jsonify({'error': 'Nenhuma transcrição disponível'}), 400
+            entries = zip_entries_from_results(successful_results)
         
-        return send_file(
-            zip_buffer,
-            as_attachment=True,
-            download_name='transcricoes_youtube.zip',
-            mimetype='application/zip'
+        # Sem Content-Length: a resposta sai em chunks enquanto as entradas são comprimidas
+        return Response(
+            stream_with_context(iter_zip(entries)),
+            mimetype='application/zip',
+            headers={'Content-Disposition': 'attachment; filename=transcricoes_youtube.zip'}
         )
         
     except Exception as e:
@@ -464,26 +1313,42 @@ def download_all_transcripts():
 
 @app.route('/api/health')
 def health_check():
-    """Verifica se a API está funcionando."""
+    """Verifica se a API está funcionando (dependências verificadas em background)."""
     return jsonify({
         'status': 'ok',
         'message': 'YouTube Transcript Downloader API está funcionando!',
-        'dependencies': {
-            'yt-dlp': 'ok' if os.system('yt-dlp --version > /dev/null 2>&1') == 0 else 'not found',
-            'youtube-transcript-api': 'ok'
-        }
+        'dependencies': dependencies.status,
+        'versions': dependencies.versions,
+        'checked_at': dependencies.checked_at,
+        'rate_limit': downloader.rate_limiter.stats() if downloader.rate_limiter is not None else None
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas no formato texto do Prometheus."""
+    for kind, valor in downloader.http_pool.stats().items():
+        HTTP_POOL.set(valor, kind=kind)
+    if downloader.rate_limiter is not None:
+        limite = downloader.rate_limiter.stats()
+        RATE_LIMIT.set(limite['rate'] or 0)
+        CIRCUIT_STATE.set({'closed': 0, 'half_open': 1, 'open': 2}[limite['state']])
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 if __name__ == '__main__':
     safe_print(">> Iniciando YouTube Transcript Downloader API...")
     safe_print(">> API disponível em: http://localhost:5000")
     safe_print(">> Health check: http://localhost:5000/api/health")
+    safe_print(">> Métricas: http://localhost:5000/metrics")
     safe_print(">> Endpoints disponíveis:")
     safe_print("   - POST /api/process-single")
     safe_print("   - POST /api/process-multiple") 
     safe_print("   - POST /api/process-file")
+    safe_print("   - GET /api/jobs/<job_id>")
+    safe_print("   - GET /api/jobs/<job_id>/result")
+    safe_print("   - POST /api/jobs/<job_id>/cancel")
     safe_print("   - GET /api/download-transcript/<video_id>")
-    safe_print("   - POST /api/download-all")
+    safe_print("   - GET/POST /api/download-all")
     safe_print("=" * 50)
     
+    create_app()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,173 @@
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+T = TypeVar('T')
+
+# Escopo agregado de todos os canais; usado enquanto o canal tem pouco histórico
+GLOBAL = '*'
+
+
+class OutcomeStore:
+    """Histórico de tentativas por canal, em SQLite, para ordenar as estratégias.
+
+    Cada chave (ex.: ``strategy:api``, ``track:pt:auto``) acumula tentativas,
+    sucessos e segundos gastos, no canal e no agregado global. Quando as
+    tentativas passam de ``window``, os contadores são divididos por dois: o
+    histórico antigo perde peso e a ordem acompanha mudanças do canal.
+
+    Com probabilidade ``exploration`` a ordem padrão é mantida, para que uma
+    estratégia rebaixada continue sendo testada de vez em quando.
+
+    As gravações são confirmadas em lotes de ``commit_every``; ``flush()`` e
+    ``close()`` confirmam o que estiver pendente.
+    """
+
+    def __init__(self, path: Union[str, Path] = "transcricoes/outcomes.sqlite3",
+                 exploration: float = 0.1, window: int = 200, min_samples: int = 5,
+                 min_rate: float = 0.2, seed: Optional[int] = None, commit_every: int = 64):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.exploration = exploration
+        self.window = window
+        self.min_samples = min_samples
+        self.min_rate = min_rate
+        self._random = random.Random(seed)
+        self.commit_every = max(1, commit_every)
+        self._pending = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS outcomes (
+                channel    TEXT NOT NULL,
+                key        TEXT NOT NULL,
+                attempts   REAL NOT NULL,
+                successes  REAL NOT NULL,
+                seconds    REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (channel, key)
+            );
+            CREATE TABLE IF NOT EXISTS video_channels (
+                video_id   TEXT PRIMARY KEY,
+                channel_id TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+        # Espelho em memória: decidir a ordem não toca no disco
+        self._stats: Dict[Tuple[str, str], List[float]] = {
+            (channel, key): [attempts, successes, seconds]
+            for channel, key, attempts, successes, seconds
+            in self._conn.execute("SELECT channel, key, attempts, successes, seconds FROM outcomes")
+        }
+
+    def record(self, channel: Optional[str], key: str, success: bool, seconds: float):
+        """Registra uma tentativa no canal (se conhecido) e no agregado global."""
+        now = time.time()
+        with self._lock:
+            for escopo in {channel or GLOBAL, GLOBAL}:
+                stats = self._stats.setdefault((escopo, key), [0.0, 0.0, 0.0])
+                if stats[0] >= self.window:
+                    stats[:] = [valor / 2 for valor in stats]
+                stats[0] += 1
+                stats[1] += 1 if success else 0
+                stats[2] += seconds
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO outcomes (channel, key, attempts, successes, seconds, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (escopo, key, *stats, now)
+                )
+            self._written()
+
+    def stats(self, channel: Optional[str], key: str) -> Tuple[float, float, float]:
+        """(tentativas, sucessos, segundos) do canal, ou do global se o canal tiver pouco histórico."""
+        with self._lock:
+            stats = self._stats.get((channel or GLOBAL, key))
+            if stats is None or stats[0] < self.min_samples:
+                stats = self._stats.get((GLOBAL, key), stats)
+            return tuple(stats) if stats else (0.0, 0.0, 0.0)
+
+    def success_rate(self, channel: Optional[str], key: str) -> float:
+        """Taxa de sucesso suavizada (Laplace): 0,5 para chaves sem histórico."""
+        attempts, successes, _ = self.stats(channel, key)
+        return (successes + 1) / (attempts + 2)
+
+    def _explore(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.exploration
+
+    def order_by_yield(self, channel: Optional[str], options: Sequence[Tuple[str, T]]) -> List[T]:
+        """Ordena opções intercambiáveis pela taxa de sucesso por segundo gasto.
+
+        Tentar A antes de B custa menos em média quando p(A)/t(A) > p(B)/t(B).
+        ``options`` são pares (chave, valor) na ordem padrão; opções sem histórico
+        suficiente mantêm a posição relativa.
+        """
+        if self._explore():
+            return [valor for _, valor in options]
+
+        rendimentos: List[Optional[float]] = []
+        for chave, _ in options:
+            attempts, successes, seconds = self.stats(channel, chave)
+            if attempts < self.min_samples:
+                rendimentos.append(None)
+            else:
+                rendimentos.append(((successes + 1) / (attempts + 2)) / max(seconds / attempts, 1e-3))
+
+        # Sem histórico: fica onde está; as medidas trocam de lugar só entre si
+        medidas = iter(sorted((i for i, r in enumerate(rendimentos) if r is not None),
+                              key=lambda i: rendimentos[i], reverse=True))
+        return [options[i if r is None else next(medidas)][1] for i, r in enumerate(rendimentos)]
+
+    def demote_failing(self, channel: Optional[str], options: Sequence[Tuple[str, T]]) -> List[T]:
+        """Mantém a ordem de preferência, mas manda para o fim as opções que quase sempre falham."""
+        if self._explore():
+            return [valor for _, valor in options]
+
+        boas, ruins = [], []
+        for chave, valor in options:
+            attempts, _, _ = self.stats(channel, chave)
+            falha = attempts >= self.min_samples and self.success_rate(channel, chave) < self.min_rate
+            (ruins if falha else boas).append(valor)
+        return boas + ruins
+
+    def set_channel(self, video_id: str, channel_id: str):
+        """Lembra o canal do vídeo, para ordenar as estratégias antes da primeira requisição."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video_channels (video_id, channel_id) VALUES (?, ?)",
+                (video_id, channel_id)
+            )
+            self._written()
+
+    def channel_of(self, video_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT channel_id FROM video_channels WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _written(self):
+        """Conta uma gravação; confirma o lote ao chegar em ``commit_every``. Chamar com o lock."""
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+
+    def flush(self):
+        """Confirma as gravações pendentes."""
+        with self._lock:
+            if self._pending:
+                self._conn.commit()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._pending:
+                self._conn.commit()
+                self._pending = 0
+            self._conn.close()
@@ -0,0 +1,184 @@
+"""Rotação de proxies para a youtube-transcript-api, com saúde e limite de taxa por proxy.
+
+Cada proxy acumula latência, erros e limitações (429 ou captcha) das tentativas;
+os vídeos vão para o proxy mais saudável com janela livre, e um proxy limitado
+sai de rotação por um tempo que dobra a cada reincidência.
+"""
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Peso do erro e do 429 recentes no custo de um proxy (multiplicam a latência média)
+ERROR_WEIGHT = 4.0
+THROTTLE_WEIGHT = 8.0
+# Latência assumida para proxies ainda sem medição (são experimentados logo)
+DEFAULT_LATENCY = 0.5
+
+
+def mask_proxy(proxy: str) -> str:
+    """Esconde usuário e senha do proxy em logs e relatórios."""
+    return re.sub(r'//[^@/]+@', '//***@', proxy)
+
+
+class _ProxyState:
+    """Saúde e orçamento de taxa de um proxy."""
+
+    __slots__ = ('proxy', 'limiter', 'latency', 'error_rate', 'throttle_rate', 'failures_in_row',
+                 'strikes', 'cooldown_until', 'in_flight', 'requests', 'errors', 'throttled')
+
+    def __init__(self, proxy: str, rate: Optional[float]):
+        self.proxy = proxy
+        self.limiter = RateLimiter(rate)
+        # Médias móveis exponenciais: latência (s) e frações de erro e de 429
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.throttle_rate = 0.0
+        self.failures_in_row = 0
+        # Quantas vezes seguidas saiu de rotação (cada vez o afastamento dobra)
+        self.strikes = 0
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def penalty(self) -> float:
+        latencia = self.latency if self.latency is not None else DEFAULT_LATENCY
+        return latencia * (1 + ERROR_WEIGHT * self.error_rate + THROTTLE_WEIGHT * self.throttle_rate)
+
+
+class ProxyPool:
+    """Distribui os vídeos entre vários proxies, cada um com seu próprio limite de taxa. Thread-safe.
+
+    Cada proxy tem uma nota feita de médias móveis da latência e das taxas de erro
+    e de 429 das respostas recentes. ``acquire`` escolhe o proxy com menor custo
+    esperado (espera pela próxima janela do proxy + requisições em andamento ×
+    latência penalizada), então o trabalho vai para os proxies saudáveis e livres e
+    a vazão cresce com o número deles. Um 429 (ou ``failure_threshold`` erros
+    seguidos) tira o proxy de rotação por ``cooldown`` segundos, dobrando a cada
+    reincidência até ``max_cooldown``; um sucesso zera as reincidências.
+    """
+
+    def __init__(self, proxies: Sequence[str], rate: Optional[float] = None, cooldown: float = 60,
+                 max_cooldown: float = 900, failure_threshold: int = 3, smoothing: float = 0.2):
+        proxies = list(dict.fromkeys(p.strip() for p in proxies if p.strip()))
+        if not proxies:
+            raise ValueError("Nenhum proxy informado")
+        self.rate = rate
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failure_threshold = max(1, failure_threshold)
+        self.smoothing = smoothing
+        self._states: Dict[str, _ProxyState] = {p: _ProxyState(p, rate) for p in proxies}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], **kwargs) -> 'ProxyPool':
+        """Proxies de um arquivo, um por linha (linhas vazias e comentários com # são ignorados)."""
+        with open(path, 'r', encoding='utf-8') as f:
+            proxies = [linha for linha in f if linha.strip() and not linha.lstrip().startswith('#')]
+        return cls(proxies, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @property
+    def proxies(self) -> List[str]:
+        return list(self._states)
+
+    def healthy_count(self) -> int:
+        agora = time.monotonic()
+        with self._lock:
+            return sum(1 for estado in self._states.values() if estado.cooldown_until <= agora)
+
+    def acquire(self) -> str:
+        """Escolhe um proxy, reserva a próxima janela dele e espera até ela. Retorna o proxy.
+
+        Se todos estiverem fora de rotação, espera o primeiro voltar. Cada
+        ``acquire`` deve ter um ``release`` correspondente.
+        """
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                disponiveis = [e for e in self._states.values() if e.cooldown_until <= agora]
+                if disponiveis:
+                    escolhido = min(disponiveis, key=lambda e: (
+                        e.limiter.time_until_free() + (e.in_flight + 1) * e.penalty(), e.in_flight, e.requests
+                    ))
+                    escolhido.in_flight += 1
+                    espera = escolhido.limiter.reserve()
+                    break
+                retorno = min(e.cooldown_until for e in self._states.values()) - agora
+            logger.warning("⏸️  Todos os proxies fora de rotação; aguardando %.0f s", retorno)
+            time.sleep(max(0.0, retorno))
+
+        if espera > 0:
+            time.sleep(espera)
+        return escolhido.proxy
+
+    def release(self, proxy: str):
+        """Devolve o proxy obtido com ``acquire``."""
+        with self._lock:
+            estado = self._states.get(proxy)
+            if estado is not None:
+                estado.in_flight = max(0, estado.in_flight - 1)
+
+    def report(self, proxy: str, success: bool, latency: Optional[float] = None, throttled: bool = False):
+        """Registra o resultado de uma requisição feita pelo proxy.
+
+        ``throttled`` marca respostas de limite de taxa (429, captcha); proxies fora
+        do pool são ignorados.
+        """
+        with self._lock:
+            estado = self._states.get(proxy)
+            if estado is None:
+                return
+            alfa = self.smoothing
+            estado.requests += 1
+            if latency is not None:
+                estado.latency = latency if estado.latency is None else (1 - alfa) * estado.latency + alfa * latency
+            estado.error_rate = (1 - alfa) * estado.error_rate + alfa * (not success and not throttled)
+            estado.throttle_rate = (1 - alfa) * estado.throttle_rate + alfa * throttled
+
+            if success:
+                estado.failures_in_row = 0
+                estado.strikes = 0
+                return
+            if throttled:
+                estado.throttled += 1
+            else:
+                estado.errors += 1
+            estado.failures_in_row += 1
+            if throttled or estado.failures_in_row >= self.failure_threshold:
+                self._bench(estado, '429/captcha' if throttled else f'{estado.failures_in_row} erros seguidos')
+
+    def _bench(self, estado: _ProxyState, motivo: str):
+        duracao = min(self.max_cooldown, self.cooldown * 2 ** estado.strikes)
+        estado.strikes += 1
+        estado.failures_in_row = 0
+        estado.cooldown_until = time.monotonic() + duracao
+        logger.warning("🚫 Proxy %s fora de rotação por %.0f s (%s)", mask_proxy(estado.proxy), duracao, motivo)
+
+    def stats(self) -> List[Dict]:
+        """Estado de cada proxy (credenciais mascaradas), para relatórios e monitoramento."""
+        agora = time.monotonic()
+        with self._lock:
+            return [{
+                'proxy': mask_proxy(e.proxy),
+                'healthy': e.cooldown_until <= agora,
+                'cooldown_remaining': round(max(0.0, e.cooldown_until - agora), 1),
+                'latency_ms': round(e.latency * 1000, 1) if e.latency is not None else None,
+                'error_rate': round(e.error_rate, 3),
+                'throttle_rate': round(e.throttle_rate, 3),
+                'requests': e.requests,
+                'errors': e.errors,
+                'throttled': e.throttled,
+                'in_flight': e.in_flight,
+            } for e in self._states.values()]
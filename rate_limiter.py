@@ -0,0 +1,225 @@
+"""Espaçamento das requisições ao YouTube: limite de taxa fixo ou adaptativo e backoff.
+
+``RateLimiter`` reserva janelas de início compartilhadas pelos workers;
+``AdaptiveRateLimiter`` ajusta a taxa pelos 429 (AIMD) e abre um disjuntor
+quando as limitações se repetem. ``backoff_delay`` dá a espera entre tentativas.
+"""
+import asyncio
+import collections
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Throttled(Exception):
+    """O YouTube respondeu com limite de taxa (429 ou página de captcha)."""
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Backoff exponencial com jitter total: sorteio entre 0 e min(cap, base × 2^attempt)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RateLimiter:
+    """Limitador de taxa global e thread-safe.
+
+    Em vez de dormir depois de cada vídeo, reserva "janelas" de início espaçadas
+    por ``min_interval`` segundos. Vários workers podem compartilhar a mesma
+    instância: cada chamada a ``acquire`` reserva a próxima janela livre e só
+    espera o necessário até ela chegar.
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        # rate em requisições por segundo; None ou <= 0 desativa o limite
+        self.min_interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Taxa atual em requisições por segundo (None se ilimitada)."""
+        if self.min_interval <= 0:
+            return None
+        return 1.0 / self.min_interval
+
+    def time_until_free(self) -> float:
+        """Segundos até a próxima janela livre, sem reservá-la."""
+        with self._lock:
+            return max(0.0, self._next_slot - time.monotonic())
+
+    def reserve(self) -> float:
+        """Reserva a próxima janela livre sem dormir. Retorna quanto falta até ela."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        return slot - now
+
+    def acquire(self) -> float:
+        """Bloqueia até a próxima janela livre. Retorna o tempo esperado em segundos."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Limitador AIMD com disjuntor: a taxa sobe aos poucos enquanto não há 429 e cai pela metade quando há.
+
+    ``on_success`` soma ``increase`` req/s à taxa (até ``max_rate``); ``on_throttle``
+    a multiplica por ``decrease`` (até ``min_rate``) no máximo uma vez por janela
+    (``1/taxa``, mínimo 1 s), então os 429 das requisições que já estavam em voo
+    contam como um só sinal. Sem taxa inicial não há limite até o primeiro 429, que
+    parte da taxa observada nas últimas aquisições.
+
+    ``breaker_threshold`` limitações seguidas abrem o disjuntor: ``acquire`` bloqueia
+    por ``breaker_cooldown`` s (dobrando a cada reabertura, até ``breaker_max_cooldown``).
+    Depois disso passa uma única requisição de teste; sucesso fecha o disjuntor,
+    novo 429 o reabre.
+    """
+
+    def __init__(self, rate: Optional[float] = None, min_rate: float = 0.05,
+                 max_rate: Optional[float] = None, increase: float = 0.02, decrease: float = 0.5,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 60, breaker_max_cooldown: float = 900):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_max_cooldown = breaker_max_cooldown
+
+        self._cond = threading.Condition()
+        self._state = 'closed'
+        self._open_until = 0.0
+        self._reopenings = 0
+        self._probe_deadline = None
+        self._consecutive = 0
+        self._last_decrease = 0.0
+        self._starts = collections.deque(maxlen=64)
+        self.throttles = 0
+
+    @property
+    def state(self) -> str:
+        """'closed' (normal), 'open' (bloqueado) ou 'half_open' (testando)."""
+        with self._cond:
+            if self._state == 'open' and time.monotonic() >= self._open_until:
+                return 'half_open'
+            return self._state
+
+    def _set_rate(self, rate: float):
+        with self._lock:
+            self.min_interval = 1.0 / rate
+
+    def _observed_rate(self) -> float:
+        if len(self._starts) >= 2 and self._starts[-1] > self._starts[0]:
+            return (len(self._starts) - 1) / (self._starts[-1] - self._starts[0])
+        return self.max_rate or 1.0
+
+    def acquire(self) -> float:
+        """Espera o disjuntor (se aberto) e a próxima janela livre. Retorna o tempo esperado."""
+        inicio = time.monotonic()
+        with self._cond:
+            while True:
+                agora = time.monotonic()
+                if self._state == 'open':
+                    if agora < self._open_until:
+                        self._cond.wait(self._open_until - agora)
+                        continue
+                    self._state = 'half_open'
+                    self._probe_deadline = None
+                if self._state == 'half_open':
+                    # Uma requisição de teste por vez; se ela não der sinal, outra pode tentar
+                    if self._probe_deadline is not None and agora < self._probe_deadline:
+                        self._cond.wait(self._probe_deadline - agora)
+                        continue
+                    self._probe_deadline = agora + self.breaker_cooldown
+                break
+            self._starts.append(agora)
+        super().acquire()
+        return time.monotonic() - inicio
+
+    def on_success(self):
+        """Resposta normal: aumento aditivo da taxa e fechamento do disjuntor em teste."""
+        with self._cond:
+            self._consecutive = 0
+            if self._state != 'closed':
+                logger.info("✅ Disjuntor fechado: YouTube voltou a responder")
+                self._state = 'closed'
+                self._reopenings = 0
+                self._cond.notify_all()
+            taxa = self.rate
+            if taxa is not None:
+                nova = taxa + self.increase
+                if self.max_rate is not None:
+                    nova = min(nova, self.max_rate)
+                self._set_rate(nova)
+
+    def on_throttle(self):
+        """429 ou captcha: redução multiplicativa da taxa; limitação persistente abre o disjuntor."""
+        with self._cond:
+            agora = time.monotonic()
+            self.throttles += 1
+            self._consecutive += 1
+
+            taxa = self.rate
+            janela = max(1.0, 1.0 / taxa) if taxa else 1.0
+            if agora - self._last_decrease >= janela:
+                self._last_decrease = agora
+                nova = max(self.min_rate, (taxa if taxa is not None else self._observed_rate()) * self.decrease)
+                if nova != taxa:
+                    self._set_rate(nova)
+                    logger.warning("🐢 YouTube limitando (429): taxa reduzida para %.3f vídeos/s", nova)
+
+            if self._state == 'half_open' or (self._state == 'closed' and self._consecutive >= self.breaker_threshold):
+                duracao = min(self.breaker_max_cooldown, self.breaker_cooldown * 2 ** self._reopenings)
+                self._reopenings += 1
+                self._state = 'open'
+                self._open_until = agora + duracao
+                logger.warning("⛔ Disjuntor aberto: %d limitações seguidas; pausa de %.0f s",
+                               self._consecutive, duracao)
+                self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        """Taxa atual, estado do disjuntor e total de limitações, para monitoramento."""
+        estado = self.state
+        with self._cond:
+            return {
+                'rate': self.rate,
+                'state': estado,
+                'throttles': self.throttles,
+                'consecutive_throttles': self._consecutive,
+                'open_for': round(max(0.0, self._open_until - time.monotonic()), 1) if estado == 'open' else 0.0,
+            }
+
+
+class AsyncRateLimiter:
+    """Versão para asyncio do RateLimiter: espera com ``asyncio.sleep`` sem bloquear o loop."""
+
+    def __init__(self, rate: Optional[float] = None):
+        self.min_interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Taxa atual em requisições por segundo (None se ilimitada)."""
+        if self.min_interval <= 0:
+            return None
+        return 1.0 / self.min_interval
+
+    async def acquire(self) -> float:
+        """Aguarda a próxima janela livre. Retorna o tempo esperado em segundos."""
+        # Sem await entre a leitura e a reserva: atômico dentro do mesmo loop
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.min_interval
+
+        wait = slot - now
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
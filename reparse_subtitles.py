@@ -0,0 +1,336 @@
+"""Reprocessa offline as legendas (.vtt/.srt) já baixadas, em paralelo.
+
+Depois de uma correção no parser, regenera os textos limpos de um acervo de
+legendas sem acessar a rede. Os arquivos são distribuídos num pool de processos;
+os grandes são lidos via mmap. Como no downloader, os textos vão para os shards
+e para o índice de busca e/ou para ``transcricao_<id>.txt`` (gravado de forma
+atômica). Um estado em SQLite guarda o hash do conteúdo de cada legenda: numa
+nova execução só são reprocessados arquivos cujo conteúdo mudou (ou todos, se o
+parser mudou).
+
+Uso:
+    python reparse_subtitles.py transcricoes --workers 8
+    python reparse_subtitles.py transcricoes --storage both --no-search-index
+"""
+import argparse
+import hashlib
+import io
+import logging
+import mmap
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import subtitle_parser
+import transcript_model
+from search_index import SearchIndex
+from shard_store import ShardStore
+from subtitle_parser import load_subtitle_stream
+
+logger = logging.getLogger(__name__)
+
+SUBTITLE_EXTENSIONS = ('.vtt', '.srt')
+
+# Legendas gravadas pelo yt-dlp: "<título>_[<id>].<idioma>.<ext>"
+SUBTITLE_NAME_RE = re.compile(r'\[([0-9A-Za-z_-]{11})\]\.([^.]+)\.(?:vtt|srt)$')
+
+# Mesma ordem de idiomas do downloader: com várias legendas do vídeo, vale a primeira
+PREFERRED_LANGUAGES = ['pt', 'pt-BR', 'en', 'en-US']
+
+# A partir deste tamanho a legenda é lida via mmap, sem cópia para um buffer do Python
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def parser_fingerprint() -> str:
+    """Hash do código do parser: se ele mudar, todas as legendas são reprocessadas."""
+    digest = hashlib.blake2b(digest_size=16)
+    for modulo in (subtitle_parser, transcript_model):
+        digest.update(Path(modulo.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def iter_subtitle_files(root: Path) -> Iterator[os.DirEntry]:
+    """Percorre a árvore gerando as entradas de legendas (os.scandir, sem stat extra)."""
+    pilha = [root]
+    while pilha:
+        with os.scandir(pilha.pop()) as entradas:
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    pilha.append(Path(entrada.path))
+                elif entrada.name.endswith(SUBTITLE_EXTENSIONS):
+                    yield entrada
+
+
+def plan_outputs(root: Path, output_dir: Path) -> Dict[str, Tuple[Path, os.stat_result]]:
+    """Decide a legenda de origem de cada saída: {legenda: (saída, stat)}.
+
+    Legendas nomeadas pelo yt-dlp viram ``transcricao_<id>.txt`` (uma por vídeo,
+    no idioma preferido); as demais viram ``<nome>.txt``, na mesma posição
+    relativa dentro de ``output_dir``.
+    """
+    prioridade = {lang: i for i, lang in enumerate(PREFERRED_LANGUAGES)}
+    melhores: Dict[Path, Tuple[int, str, os.stat_result]] = {}
+    for entrada in iter_subtitle_files(root):
+        relativo = Path(entrada.path).relative_to(root)
+        match = SUBTITLE_NAME_RE.search(entrada.name)
+        if match:
+            video_id, lang = match.groups()
+            destino = output_dir / relativo.parent / f"transcricao_{video_id}.txt"
+            rank = prioridade.get(lang, len(prioridade))
+        else:
+            destino = output_dir / relativo.with_suffix('.txt')
+            rank = 0
+        atual = melhores.get(destino)
+        # Empate no idioma: o nome menor, para a escolha não depender da ordem do scandir
+        if atual is None or (rank, entrada.path) < (atual[0], atual[1]):
+            melhores[destino] = (rank, entrada.path, entrada.stat())
+    return {origem: (destino, st) for destino, (_, origem, st) in melhores.items()}
+
+
+def write_atomic(path: Path, text: str):
+    """Grava num arquivo temporário da mesma pasta e troca pelo destino (os.replace)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _iter_lines(conteudo: Union[bytes, mmap.mmap]) -> Iterator[str]:
+    """Linhas decodificadas de uma legenda lida inteira (bytes) ou mapeada (mmap)."""
+    if isinstance(conteudo, bytes):
+        return io.StringIO(conteudo.decode('utf-8'))
+    return (linha.decode('utf-8') for linha in iter(conteudo.readline, b''))
+
+
+def reparse_file(task: Tuple[str, str, Optional[str], int, bool, bool]) -> Dict:
+    """Reprocessa uma legenda (roda nos processos do pool).
+
+    ``task`` é (legenda, saída, hash anterior, limite do mmap, grava o .txt,
+    devolve a transcrição). O hash anterior só vem quando as saídas existem: com
+    o mesmo hash, nada é reescrito. A transcrição devolvida (``transcript``) é
+    gravada nos shards e no índice pelo processo principal.
+    """
+    origem, destino, hash_anterior, mmap_threshold, grava_arquivo, devolve = task
+    inicio = time.perf_counter()
+    resultado = {'source': origem, 'output': destino, 'bytes': 0, 'chars': 0}
+    conteudo = None
+    try:
+        with open(origem, 'rb') as f:
+            resultado['bytes'] = os.fstat(f.fileno()).st_size
+            if 0 < mmap_threshold <= resultado['bytes']:
+                conteudo = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                conteudo = f.read()
+
+        resultado['digest'] = hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+        if resultado['digest'] == hash_anterior:
+            resultado['status'] = 'unchanged'
+        else:
+            transcript = load_subtitle_stream(_iter_lines(conteudo))
+            text = transcript.text()
+            resultado['chars'] = len(text)
+            if text:
+                if grava_arquivo:
+                    write_atomic(Path(destino), text)
+                if devolve:
+                    resultado['transcript'] = transcript
+                resultado['status'] = 'parsed'
+            else:
+                resultado['status'] = 'empty'
+    except Exception as e:
+        resultado['status'] = 'failed'
+        resultado['error'] = f"{type(e).__name__}: {str(e)[:200]}"
+    finally:
+        if isinstance(conteudo, mmap.mmap):
+            conteudo.close()
+    resultado['seconds'] = time.perf_counter() - inicio
+    return resultado
+
+
+class ReparseState:
+    """Estado em SQLite das legendas já reprocessadas (tamanho, mtime, hash e parser)."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reparsed (
+                source      TEXT PRIMARY KEY,
+                output      TEXT NOT NULL,
+                size        INTEGER NOT NULL,
+                mtime_ns    INTEGER NOT NULL,
+                digest      TEXT NOT NULL,
+                fingerprint TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def load(self) -> Dict[str, Tuple[str, int, int, str, str]]:
+        return {row[0]: row[1:] for row in self._conn.execute(
+            "SELECT source, output, size, mtime_ns, digest, fingerprint FROM reparsed")}
+
+    def save(self, rows: List[Tuple[str, str, int, int, str, str]]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO reparsed (source, output, size, mtime_ns, digest, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def reparse_directory(root: Union[str, Path], output_dir: Optional[Union[str, Path]] = None,
+                      workers: Optional[int] = None, state_path: Optional[Union[str, Path]] = None,
+                      force: bool = False, mmap_threshold: int = MMAP_THRESHOLD,
+                      chunksize: int = 32, store: Optional[ShardStore] = None,
+                      search_index: Optional[SearchIndex] = None, legacy_files: bool = True) -> Dict:
+    """Reprocessa as legendas de ``root`` e retorna o relatório da execução.
+
+    Legendas com tamanho e mtime iguais aos do estado (e o mesmo parser) são
+    puladas sem leitura; as demais vão para o pool, que compara o hash do
+    conteúdo antes de reprocessar. ``force`` reprocessa tudo.
+
+    Os textos das legendas do yt-dlp (com o ID no nome) vão para ``store`` e
+    ``search_index``, se passados, e para ``transcricao_<id>.txt`` com
+    ``legacy_files`` (sempre, sem ``store``). Legendas sem ID só viram ``.txt``.
+    """
+    legacy_files = legacy_files or store is None
+    root = Path(root)
+    output_dir = Path(output_dir) if output_dir else root
+    state = ReparseState(state_path or output_dir / 'reparse_state.sqlite3')
+    fingerprint = parser_fingerprint()
+    inicio = time.perf_counter()
+
+    anteriores = {} if force else state.load()
+    plano = plan_outputs(root, output_dir)
+    tarefas = []
+    ids: Dict[str, str] = {}
+    pulados = 0
+    for origem, (destino, st) in plano.items():
+        match = SUBTITLE_NAME_RE.search(os.path.basename(origem))
+        video_id = match.group(1) if match else None
+        grava_arquivo = legacy_files or video_id is None
+        devolve = video_id is not None and (store is not None or search_index is not None)
+        existe = ((not grava_arquivo or destino.exists())
+                  and (video_id is None or store is None or video_id in store)
+                  and (video_id is None or search_index is None or video_id in search_index))
+        anterior = anteriores.get(origem)
+        mesmo_parser = anterior is not None and anterior[4] == fingerprint and anterior[0] == str(destino)
+        if mesmo_parser and anterior[1] == st.st_size and anterior[2] == st.st_mtime_ns and existe:
+            pulados += 1
+            continue
+        if video_id is not None:
+            ids[origem] = video_id
+        tarefas.append((origem, str(destino), anterior[3] if mesmo_parser and existe else None,
+                        mmap_threshold, grava_arquivo, devolve))
+
+    logger.info("📂 %d legendas encontradas: %d sem mudança, %d para verificar",
+                len(plano), pulados, len(tarefas))
+
+    contagem = {'parsed': 0, 'unchanged': 0, 'empty': 0, 'failed': 0}
+    total_bytes = 0
+    pendentes_estado = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for resultado in executor.map(reparse_file, tarefas, chunksize=chunksize):
+                contagem[resultado['status']] += 1
+                total_bytes += resultado['bytes']
+                if resultado['status'] == 'failed':
+                    logger.warning("⚠️  %s: %s", resultado['source'], resultado['error'])
+                    continue
+                transcript = resultado.pop('transcript', None)
+                if transcript is not None:
+                    video_id = ids[resultado['source']]
+                    if store is not None:
+                        store.put(video_id, transcript.text())
+                    if search_index is not None:
+                        search_index.add(video_id, transcript)
+                st = plano[resultado['source']][1]
+                pendentes_estado.append((resultado['source'], resultado['output'], st.st_size,
+                                         st.st_mtime_ns, resultado['digest'], fingerprint))
+                if len(pendentes_estado) >= 1000:
+                    state.save(pendentes_estado)
+                    pendentes_estado = []
+    finally:
+        state.save(pendentes_estado)
+        state.close()
+
+    elapsed = time.perf_counter() - inicio
+    verificados = len(tarefas)
+    relatorio = {
+        'files': len(plano),
+        'skipped': pulados,
+        **contagem,
+        'bytes': total_bytes,
+        'elapsed': round(elapsed, 3),
+        'files_per_second': round(verificados / elapsed, 1) if elapsed else 0.0,
+        'mb_per_second': round(total_bytes / 1024 / 1024 / elapsed, 2) if elapsed else 0.0,
+    }
+    logger.info("✅ %d reprocessadas, %d com o mesmo conteúdo, %d vazias, %d falhas (%d puladas)",
+                contagem['parsed'], contagem['unchanged'], contagem['empty'], contagem['failed'], pulados)
+    logger.info("⏱️  %.1f s: %.1f arquivos/s, %.2f MB/s",
+                elapsed, relatorio['files_per_second'], relatorio['mb_per_second'])
+    return relatorio
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reprocessa offline as legendas .vtt/.srt já baixadas.")
+    parser.add_argument('pasta', nargs='?', default='transcricoes',
+                        help="Pasta com as legendas, percorrida recursivamente (padrão: transcricoes)")
+    parser.add_argument('--output-dir', default=None,
+                        help="Pasta dos textos gerados (padrão: a própria pasta das legendas)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processos do pool (padrão: número de CPUs)")
+    parser.add_argument('--storage', choices=['shards', 'files', 'both'], default='shards',
+                        help="Onde gravar os textos, como no downloader: shards em <output-dir>/shards, "
+                             "transcricao_<id>.txt ou os dois (padrão: shards)")
+    parser.add_argument('--search-index', default=None,
+                        help="Índice de busca atualizado com os textos (padrão: <output-dir>/search.sqlite3)")
+    parser.add_argument('--no-search-index', action='store_true',
+                        help="Não atualiza o índice de busca")
+    parser.add_argument('--state', default=None,
+                        help="Estado SQLite dos hashes (padrão: <output-dir>/reparse_state.sqlite3)")
+    parser.add_argument('--force', action='store_true',
+                        help="Reprocessa todas as legendas, ignorando o estado")
+    parser.add_argument('--mmap-threshold-mb', type=float, default=MMAP_THRESHOLD / 1024 / 1024,
+                        help="Legendas a partir deste tamanho são lidas via mmap (padrão: 1)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="Só mostra avisos e erros")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    args = parse_args(argv)
+    logging.basicConfig(level='WARNING' if args.quiet else 'INFO', format='%(message)s')
+    output_dir = Path(args.output_dir or args.pasta)
+    store = ShardStore(output_dir / "shards") if args.storage != 'files' else None
+    search_index = None
+    if not args.no_search_index:
+        search_index = SearchIndex(args.search_index or output_dir / "search.sqlite3")
+    try:
+        return reparse_directory(args.pasta, args.output_dir, args.workers, args.state, args.force,
+                                 mmap_threshold=int(args.mmap_threshold_mb * 1024 * 1024),
+                                 store=store, search_index=search_index,
+                                 legacy_files=args.storage != 'shards')
+    finally:
+        if store is not None:
+            store.close()
+        if search_index is not None:
+            search_index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""Busca textual nas transcrições baixadas (SQLite FTS5).
+
+Cada transcrição é indexada em trechos de ~30 s; a busca devolve os vídeos, um
+snippet de cada trecho encontrado e o instante em que ele começa. O índice é
+atualizado a cada transcrição gravada, sem reprocessar as demais.
+
+Uso:
+    python search_index.py query transcricoes/search.sqlite3 "aprendizado de máquina"
+    python search_index.py index transcricoes/search.sqlite3 transcricoes/   # indexa o que já existe
+    python search_index.py index transcricoes/search.sqlite3 transcricoes/shards
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from subtitle_parser import load_subtitle_stream
+from transcript_model import CompactTranscript
+from url_ingestion import CANONICAL_URL
+
+# Duração de cada trecho indexado; transcrições sem tempos viram trechos de ~SEGMENT_CHARS
+SEGMENT_SECONDS = 30.0
+SEGMENT_CHARS = 600
+
+# Trechos lidos por vídeo pedido na primeira consulta por relevância (order='rank');
+# a janela cresce se os melhores trechos não cobrirem ``limit`` vídeos distintos
+RANK_FETCH_PER_VIDEO = 8
+
+# Termos entre aspas (frase), palavras e prefixos (palavra*)
+QUERY_TERM_RE = re.compile(r'"([^"]*)"|(\w+)(\*?)')
+
+# ID do vídeo no nome das legendas do yt-dlp: <título>_[<id>].<idioma>.vtt
+SUBTITLE_ID_RE = re.compile(r'\[([0-9A-Za-z_-]{11})\]')
+
+
+def iter_segments(transcript: Union[CompactTranscript, str]) -> Iterator[Tuple[Optional[float], str]]:
+    """Divide a transcrição em trechos (início em segundos, texto).
+
+    Cues são agrupadas em janelas de ``SEGMENT_SECONDS``; texto puro (sem tempos)
+    é cortado entre palavras a cada ~``SEGMENT_CHARS`` caracteres, com início None.
+    """
+    if isinstance(transcript, str):
+        inicio, tamanho = 0, len(transcript)
+        while inicio < tamanho:
+            fim = inicio + SEGMENT_CHARS
+            if fim < tamanho:
+                espaco = transcript.rfind(' ', inicio, fim)
+                fim = espaco if espaco > inicio else fim
+            trecho = transcript[inicio:fim].strip()
+            if trecho:
+                yield None, trecho
+            inicio = fim
+        return
+
+    comeco, textos = None, []
+    for cue in transcript:
+        if textos and cue.start - comeco >= SEGMENT_SECONDS:
+            yield comeco, ' '.join(textos)
+            textos = []
+        if not textos:
+            comeco = cue.start
+        textos.append(cue.text)
+    if textos:
+        yield comeco, ' '.join(textos)
+
+
+def build_match(query: str) -> str:
+    """Converte a busca digitada numa expressão FTS5 segura.
+
+    Todas as palavras precisam aparecer no trecho; "entre aspas" busca a frase e
+    ``palavra*`` busca o prefixo. Operadores do FTS5 na entrada viram texto comum.
+    """
+    termos = []
+    for frase, palavra, prefixo in QUERY_TERM_RE.findall(query):
+        if palavra:
+            termos.append(f'"{palavra}"{prefixo}')
+        else:
+            palavras = re.findall(r'\w+', frase)
+            if palavras:
+                termos.append('"' + ' '.join(palavras) + '"')
+    if not termos:
+        raise ValueError("Busca vazia")
+    return ' '.join(termos)
+
+
+def format_timestamp(segundos: float) -> str:
+    segundos = int(segundos)
+    horas, resto = divmod(segundos, 3600)
+    return f"{horas}:{resto // 60:02d}:{resto % 60:02d}" if horas else f"{resto // 60}:{resto % 60:02d}"
+
+
+class SearchIndex:
+    """Índice invertido incremental (FTS5) dos trechos das transcrições. Thread-safe.
+
+    Os trechos de um vídeo ocupam rowids consecutivos; a tabela ``videos`` guarda
+    o intervalo, então reindexar um vídeo apaga só as linhas dele.
+    """
+
+    def __init__(self, path: Union[str, Path] = "transcricoes/search.sqlite3"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # O índice pode ser refeito a partir das transcrições: sem fsync a cada commit
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5(
+                text, video_id UNINDEXED, start UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id    TEXT PRIMARY KEY,
+                first_rowid INTEGER NOT NULL,
+                segments    INTEGER NOT NULL,
+                timed       INTEGER NOT NULL,
+                indexed_at  REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def add(self, video_id: str, transcript: Union[CompactTranscript, str], replace: bool = True) -> int:
+        """Indexa (ou reindexa) a transcrição do vídeo. Retorna quantos trechos foram gravados.
+
+        Com ``replace=False`` um vídeo já indexado é mantido como está.
+        """
+        trechos = list(iter_segments(transcript))
+        if not trechos:
+            return 0
+        timed = not isinstance(transcript, str)
+
+        with self._lock:
+            antigo = self._conn.execute(
+                "SELECT first_rowid, segments FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if antigo is not None:
+                if not replace:
+                    return 0
+                primeiro, quantidade = antigo
+                self._conn.execute("DELETE FROM segments WHERE rowid BETWEEN ? AND ?",
+                                   (primeiro, primeiro + quantidade - 1))
+
+            ultimo = self._conn.execute("SELECT rowid FROM segments ORDER BY rowid DESC LIMIT 1").fetchone()
+            primeiro = (ultimo[0] if ultimo else 0) + 1
+            self._conn.executemany(
+                "INSERT INTO segments (rowid, text, video_id, start) VALUES (?, ?, ?, ?)",
+                ((primeiro + i, texto, video_id, inicio) for i, (inicio, texto) in enumerate(trechos))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, first_rowid, segments, timed, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (video_id, primeiro, len(trechos), int(timed), time.time())
+            )
+            self._conn.commit()
+        return len(trechos)
+
+    def remove(self, video_id: str) -> bool:
+        with self._lock:
+            antigo = self._conn.execute(
+                "SELECT first_rowid, segments FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if antigo is None:
+                return False
+            primeiro, quantidade = antigo
+            self._conn.execute("DELETE FROM segments WHERE rowid BETWEEN ? AND ?",
+                               (primeiro, primeiro + quantidade - 1))
+            self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+        return True
+
+    def __contains__(self, video_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+    def search(self, query: str, limit: int = 20, hits_per_video: int = 3,
+               order: str = 'rank', raw: bool = False) -> List[Dict]:
+        """Vídeos que contêm a busca, com snippet e início de cada trecho encontrado.
+
+        ``order='rank'`` ordena todos os trechos que casam com a busca por relevância
+        (BM25, ``ORDER BY rank`` do FTS5) e lê só os melhores, com ``LIMIT``: vídeos
+        antigos concorrem com os recentes. ``order='recent'`` traz os vídeos
+        indexados por último. ``raw=True`` passa a busca direto ao FTS5 (AND/OR/NOT,
+        NEAR, ...). Busca inválida gera ValueError.
+        """
+        if order not in ('rank', 'recent'):
+            raise ValueError(f"Ordenação desconhecida: {order}")
+        match = query if raw else build_match(query)
+
+        escolhidos: Dict[str, List[Tuple[int, Optional[float]]]] = {}
+        with self._lock:
+            try:
+                if order == 'rank':
+                    linhas = self._ranked_rows(match, limit)
+                else:
+                    # Lido sob demanda: para assim que ``limit`` vídeos aparecerem
+                    linhas = self._conn.execute(
+                        "SELECT rowid, video_id, start FROM segments "
+                        "WHERE segments MATCH ? ORDER BY rowid DESC",
+                        (match,)
+                    )
+                for rowid, video_id, inicio, *_ in linhas:
+                    trechos = escolhidos.get(video_id)
+                    if trechos is None:
+                        if len(escolhidos) >= limit:
+                            break
+                        trechos = escolhidos[video_id] = []
+                    if len(trechos) < hits_per_video:
+                        trechos.append((rowid, inicio))
+
+                # Snippets só dos trechos que vão para a resposta
+                rowids = [rowid for trechos in escolhidos.values() for rowid, _ in trechos]
+                snippets = dict(self._conn.execute(
+                    "SELECT rowid, snippet(segments, 0, '[', ']', '…', 16) FROM segments "
+                    f"WHERE segments MATCH ? AND rowid IN ({','.join('?' * len(rowids))})",
+                    (match, *rowids)
+                )) if rowids else {}
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Busca inválida: {e}") from e
+
+        resultados = []
+        for video_id, trechos in escolhidos.items():
+            if order == 'recent':
+                # rowid decrescente traz os trechos de cada vídeo de trás para frente
+                trechos.reverse()
+            resultados.append({
+                'video_id': video_id,
+                'url': CANONICAL_URL.format(video_id=video_id),
+                'hits': [self._hit(video_id, inicio, snippets.get(rowid, '')) for rowid, inicio in trechos],
+            })
+        return resultados
+
+    def _ranked_rows(self, match: str, limit: int) -> List[Tuple[int, str, Optional[float]]]:
+        """Melhores trechos por relevância, suficientes para ``limit`` vídeos distintos (com o lock)."""
+        janela = max(1, limit) * RANK_FETCH_PER_VIDEO
+        while True:
+            linhas = self._conn.execute(
+                "SELECT rowid, video_id, start FROM segments WHERE segments MATCH ? ORDER BY rank LIMIT ?",
+                (match, janela)
+            ).fetchall()
+            if len(linhas) < janela or len({video_id for _, video_id, _ in linhas}) > limit:
+                return linhas
+            # Poucos vídeos dominam os melhores trechos: amplia a janela
+            janela *= 4
+
+    @staticmethod
+    def _hit(video_id: str, inicio: Optional[float], snippet: str) -> Dict:
+        if inicio is None:
+            return {'start': None, 'timestamp': None, 'snippet': snippet, 'url': None}
+        return {
+            'start': inicio,
+            'timestamp': format_timestamp(inicio),
+            'snippet': snippet,
+            'url': CANONICAL_URL.format(video_id=video_id) + f"&t={int(inicio)}s",
+        }
+
+    def optimize(self):
+        """Funde os segmentos do índice FTS5 (buscas mais rápidas após muitas inserções)."""
+        with self._lock:
+            self._conn.execute("INSERT INTO segments (segments) VALUES ('optimize')")
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            videos, trechos, com_tempo = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(segments), 0), COALESCE(SUM(timed), 0) FROM videos"
+            ).fetchone()
+        return {
+            'videos': videos,
+            'segments': trechos,
+            'timed_videos': com_tempo,
+            'bytes': self.path.stat().st_size if self.path.exists() else 0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def index_directory(index: SearchIndex, pasta: Union[str, Path]) -> Dict[str, int]:
+    """Indexa o que já foi baixado: shards, ``transcricao_<id>.txt`` e legendas do yt-dlp.
+
+    Transcrições em texto não substituem vídeos já indexados; legendas (.vtt/.srt,
+    com o ID no nome) substituem, porque trazem os tempos de cada trecho.
+    """
+    pasta = Path(pasta)
+    contagem = {'shards': 0, 'files': 0, 'subtitles': 0}
+
+    if (pasta / "index.sqlite3").exists():
+        from shard_store import ShardStore
+        store = ShardStore(pasta)
+        try:
+            for video_id, text in store.iter_items():
+                contagem['shards'] += bool(index.add(video_id, text, replace=False))
+        finally:
+            store.close()
+
+    legendas = []
+    with os.scandir(pasta) as entradas:
+        for entrada in entradas:
+            if not entrada.is_file():
+                continue
+            nome = entrada.name
+            if nome.startswith('transcricao_') and nome.endswith('.txt'):
+                text = Path(entrada.path).read_text(encoding='utf-8', errors='replace')
+                contagem['files'] += bool(index.add(nome[len('transcricao_'):-4], text, replace=False))
+            elif nome.endswith(('.vtt', '.srt')) and SUBTITLE_ID_RE.search(nome):
+                legendas.append(entrada.path)
+
+    for caminho in sorted(legendas):
+        video_id = SUBTITLE_ID_RE.findall(os.path.basename(caminho))[-1]
+        with open(caminho, 'r', encoding='utf-8', errors='replace') as f:
+            transcript = load_subtitle_stream(f)
+        contagem['subtitles'] += bool(index.add(video_id, transcript))
+    return contagem
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Busca textual nas transcrições baixadas.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    query = comandos.add_parser('query', help="Busca termos nas transcrições")
+    query.add_argument('index', help="Arquivo do índice (ex.: transcricoes/search.sqlite3)")
+    query.add_argument('termos', nargs='+', help="Palavras, \"frases entre aspas\" ou prefixos*")
+    query.add_argument('--limit', type=int, default=20, help="Máximo de vídeos (padrão: 20)")
+    query.add_argument('--hits', type=int, default=3, help="Trechos mostrados por vídeo (padrão: 3)")
+    query.add_argument('--order', choices=['rank', 'recent'], default='rank',
+                       help="Relevância ou vídeos indexados por último (padrão: rank)")
+    query.add_argument('--raw', action='store_true', help="Usa a sintaxe do FTS5 sem conversão")
+    query.add_argument('--json', action='store_true', help="Resultado em JSON")
+
+    index = comandos.add_parser('index', help="Indexa shards, transcrições .txt e legendas de uma pasta")
+    index.add_argument('index')
+    index.add_argument('pasta', help="Pasta de saída do downloader ou pasta dos shards")
+
+    optimize = comandos.add_parser('optimize', help="Compacta o índice")
+    optimize.add_argument('index')
+
+    stats = comandos.add_parser('stats', help="Mostra o tamanho do índice")
+    stats.add_argument('index')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    index = SearchIndex(args.index)
+    try:
+        if args.comando == 'query':
+            inicio = time.perf_counter()
+            try:
+                resultados = index.search(' '.join(args.termos), limit=args.limit,
+                                          hits_per_video=args.hits, order=args.order, raw=args.raw)
+            except ValueError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return 1
+            duracao = (time.perf_counter() - inicio) * 1000
+            if args.json:
+                print(json.dumps(resultados, ensure_ascii=False, indent=2))
+                return 0
+            for resultado in resultados:
+                print(f"🎬 {resultado['url']}")
+                for hit in resultado['hits']:
+                    print(f"   {hit['timestamp'] or '--:--'}  {hit['snippet']}")
+            print(f"🔎 {len(resultados)} vídeos em {duracao:.1f} ms")
+        elif args.comando == 'index':
+            contagem = index_directory(index, args.pasta)
+            print(f"🗂️  Indexados: {contagem['shards']} dos shards, {contagem['files']} arquivos .txt, "
+                  f"{contagem['subtitles']} legendas")
+        elif args.comando == 'optimize':
+            index.optimize()
+            print("🔧 Índice compactado")
+        else:
+            print(json.dumps(index.stats(), indent=2))
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""Armazenamento compacto de transcrições: shards comprimidos com índice por ID.
+
+Em vez de um ``transcricao_<id>.txt`` por vídeo, as transcrições são acrescentadas
+a poucos arquivos grandes (``shard-00000.bin``, ...), cada uma comprimida com zlib
+separadamente. Um índice SQLite guarda onde cada vídeo está (shard, offset,
+tamanho), então a leitura de um vídeo é um seek, sem varrer nada.
+
+Uso:
+    python shard_store.py export transcricoes/shards saida/           # um .txt por vídeo
+    python shard_store.py export transcricoes/shards tudo.jsonl --format jsonl
+    python shard_store.py get transcricoes/shards VIDEO_ID
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Cada registro: cabeçalho (marca, tamanho do ID, tamanho dos dados), ID e dados
+# comprimidos. O cabeçalho permite reconstruir o índice lendo só os shards.
+RECORD_MAGIC = b'TSR1'
+RECORD_HEADER = struct.Struct('>4sHI')
+
+
+def _decompress_exact(dados: bytes) -> Optional[bytes]:
+    """Descomprime um registro; None se os dados não forem exatamente um stream zlib completo."""
+    d = zlib.decompressobj()
+    try:
+        bruto = d.decompress(dados)
+    except zlib.error:
+        return None
+    if not d.eof or d.unused_data:
+        return None
+    return bruto
+
+
+def _iter_records(dados, inicio: int = 0) -> Iterator[Tuple[str, int, int, int, int]]:
+    """Registros íntegros do shard a partir de ``inicio``: (video_id, offset, tamanho, bytes de texto, fim).
+
+    Um registro cortado (queda no meio de um ``put``) ou corrompido é pulado: a
+    leitura continua na próxima marca ``RECORD_MAGIC``, então o que foi gravado
+    depois dele não se perde.
+    """
+    pos, total = inicio, len(dados)
+    while pos + RECORD_HEADER.size <= total:
+        marca, tamanho_id, tamanho = RECORD_HEADER.unpack_from(dados, pos)
+        offset = pos + RECORD_HEADER.size + tamanho_id
+        fim = offset + tamanho
+        bruto = None
+        if marca == RECORD_MAGIC and fim <= total:
+            bruto = _decompress_exact(dados[offset:fim])
+        if bruto is not None:
+            try:
+                video_id = bytes(dados[pos + RECORD_HEADER.size:offset]).decode('utf-8')
+            except UnicodeDecodeError:
+                bruto = None
+        if bruto is None:
+            pos = dados.find(RECORD_MAGIC, pos + 1)
+            if pos < 0:
+                return
+            continue
+        yield video_id, offset, tamanho, len(bruto), fim
+        pos = fim
+
+
+class ShardStore:
+    """Transcrições em shards append-only comprimidos, com índice SQLite por vídeo.
+
+    Um novo shard começa quando o atual passa de ``shard_max_bytes``. Gravar de
+    novo um vídeo acrescenta outro registro e aponta o índice para ele; o antigo
+    fica como espaço morto no shard. Thread-safe.
+    """
+
+    def __init__(self, path: Union[str, Path] = "transcricoes/shards",
+                 shard_max_bytes: int = 256 * 1024 * 1024, level: int = 6, fsync: bool = False):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.shard_max_bytes = shard_max_bytes
+        self.level = level
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path / "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Um commit por transcrição: sem fsync a cada um (o índice pode ser reconstruído)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                video_id   TEXT PRIMARY KEY,
+                shard      INTEGER NOT NULL,
+                offset     INTEGER NOT NULL,
+                length     INTEGER NOT NULL,
+                size       INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        shards = self.shard_numbers()
+        self._shard = shards[-1] if shards else 0
+        self._writer: Optional[IO[bytes]] = None
+        self._truncate_torn_tail()
+
+    def _truncate_torn_tail(self):
+        """Corta do shard atual o registro incompleto deixado por uma queda no meio de um ``put``.
+
+        Sem isso, os próximos registros seriam acrescentados depois do pedaço
+        quebrado. A verificação começa no fim do último registro indexado do shard.
+        """
+        caminho = self._shard_path(self._shard)
+        if not caminho.exists():
+            return
+        tamanho = caminho.stat().st_size
+        inicio = self._conn.execute(
+            "SELECT COALESCE(MAX(offset + length), 0) FROM records WHERE shard = ?", (self._shard,)
+        ).fetchone()[0]
+        if tamanho <= inicio:
+            return
+        with open(caminho, 'r+b') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as dados:
+                fim = inicio
+                for *_, fim_registro in _iter_records(dados, inicio):
+                    fim = fim_registro
+            if fim < tamanho:
+                logger.warning("✂️  Shard %s: %d bytes de um registro incompleto removidos do fim",
+                               caminho.name, tamanho - fim)
+                f.truncate(fim)
+
+    def _shard_path(self, numero: int) -> Path:
+        return self.path / f"shard-{numero:05d}.bin"
+
+    def shard_numbers(self) -> List[int]:
+        return sorted(int(p.stem.split('-')[1]) for p in self.path.glob("shard-*.bin"))
+
+    def _open_writer(self, tamanho_registro: int) -> IO[bytes]:
+        if self._writer is None:
+            self._writer = open(self._shard_path(self._shard), 'ab')
+        posicao = self._writer.tell()
+        if posicao and posicao + tamanho_registro > self.shard_max_bytes:
+            self._writer.close()
+            self._shard += 1
+            self._writer = open(self._shard_path(self._shard), 'ab')
+        return self._writer
+
+    def put(self, video_id: str, text: str):
+        """Acrescenta a transcrição ao shard atual e atualiza o índice."""
+        bruto = text.encode('utf-8')
+        dados = zlib.compress(bruto, self.level)
+        ident = video_id.encode('utf-8')
+        registro = RECORD_HEADER.pack(RECORD_MAGIC, len(ident), len(dados)) + ident + dados
+
+        with self._lock:
+            writer = self._open_writer(len(registro))
+            offset = writer.tell() + RECORD_HEADER.size + len(ident)
+            writer.write(registro)
+            writer.flush()
+            if self.fsync:
+                os.fsync(writer.fileno())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO records (video_id, shard, offset, length, size, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, self._shard, offset, len(dados), len(bruto), time.time())
+            )
+            self._conn.commit()
+
+    def _locate(self, video_id: str) -> Optional[Tuple[int, int, int]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT shard, offset, length FROM records WHERE video_id = ?", (video_id,)
+            ).fetchone()
+
+    def get(self, video_id: str) -> Optional[str]:
+        """Transcrição do vídeo (um seek e uma leitura), ou None."""
+        local = self._locate(video_id)
+        if local is None:
+            return None
+        shard, offset, length = local
+        with open(self._shard_path(shard), 'rb') as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length)).decode('utf-8')
+
+    def __contains__(self, video_id: str) -> bool:
+        return self._locate(video_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def iter_items(self) -> Iterator[Tuple[str, str]]:
+        """(video_id, transcrição) de todos os vídeos, lendo cada shard em sequência."""
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT video_id, shard, offset, length FROM records ORDER BY shard, offset"
+            ).fetchall()
+        atual, arquivo = None, None
+        try:
+            for video_id, shard, offset, length in linhas:
+                if shard != atual:
+                    if arquivo is not None:
+                        arquivo.close()
+                    atual, arquivo = shard, open(self._shard_path(shard), 'rb')
+                arquivo.seek(offset)
+                yield video_id, zlib.decompress(arquivo.read(length)).decode('utf-8')
+        finally:
+            if arquivo is not None:
+                arquivo.close()
+
+    def export_files(self, output_dir: Union[str, Path]) -> int:
+        """Exporta no formato antigo (``transcricao_<id>.txt``). Retorna quantos arquivos."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        total = 0
+        for video_id, text in self.iter_items():
+            (output_dir / f"transcricao_{video_id}.txt").write_text(text, encoding='utf-8')
+            total += 1
+        return total
+
+    def export_jsonl(self, destino: Union[str, Path, IO[str]]) -> int:
+        """Exporta tudo como JSON lines ``{"video_id", "text"}``. Retorna quantos registros."""
+        if not hasattr(destino, 'write'):
+            with open(destino, 'w', encoding='utf-8') as f:
+                return self.export_jsonl(f)
+        total = 0
+        for video_id, text in self.iter_items():
+            destino.write(json.dumps({'video_id': video_id, 'text': text}, ensure_ascii=False) + '\n')
+            total += 1
+        return total
+
+    def rebuild_index(self) -> int:
+        """Reconstrói o índice lendo os shards (o último registro de cada vídeo vale).
+
+        Registros truncados ou corrompidos (queda no meio da gravação) são pulados
+        e a leitura segue no próximo registro íntegro. Se sobrarem menos vídeos do
+        que o índice tinha, um aviso é registrado.
+        """
+        entradas: Dict[str, Tuple[int, int, int, int]] = {}
+        for numero in self.shard_numbers():
+            with open(self._shard_path(numero), 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as dados:
+                    for video_id, offset, tamanho, size, _ in _iter_records(dados):
+                        entradas[video_id] = (numero, offset, tamanho, size)
+
+        agora = time.time()
+        with self._lock:
+            anteriores = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+            if len(entradas) < anteriores:
+                logger.warning("⚠️  Índice reconstruído com %d vídeos; antes tinha %d",
+                               len(entradas), anteriores)
+            self._conn.execute("DELETE FROM records")
+            self._conn.executemany(
+                "INSERT INTO records (video_id, shard, offset, length, size, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                ((video_id, *local, agora) for video_id, local in entradas.items())
+            )
+            self._conn.commit()
+        return len(entradas)
+
+    def stats(self) -> Dict:
+        """Vídeos, shards, bytes comprimidos em disco e bytes de texto."""
+        with self._lock:
+            registros, texto, vivos = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), "
+                "COALESCE(SUM(length + LENGTH(CAST(video_id AS BLOB))), 0) FROM records"
+            ).fetchone()
+        em_disco = sum(self._shard_path(n).stat().st_size for n in self.shard_numbers())
+        return {
+            'records': registros,
+            'shards': len(self.shard_numbers()),
+            'bytes': em_disco,
+            'text_bytes': texto,
+            'dead_bytes': max(0, em_disco - vivos - registros * RECORD_HEADER.size),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._conn.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Consulta e exporta o armazenamento em shards.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    export = comandos.add_parser('export', help="Exporta todas as transcrições")
+    export.add_argument('store', help="Pasta dos shards (ex.: transcricoes/shards)")
+    export.add_argument('destino', help="Pasta (formato files) ou arquivo (formato jsonl)")
+    export.add_argument('--format', choices=['files', 'jsonl'], default='files',
+                        help="Um transcricao_<id>.txt por vídeo ou JSON lines (padrão: files)")
+
+    get = comandos.add_parser('get', help="Mostra a transcrição de um vídeo")
+    get.add_argument('store')
+    get.add_argument('video_id')
+
+    rebuild = comandos.add_parser('rebuild-index', help="Reconstrói o índice a partir dos shards")
+    rebuild.add_argument('store')
+
+    stats = comandos.add_parser('stats', help="Mostra o tamanho do armazenamento")
+    stats.add_argument('store')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    store = ShardStore(args.store)
+    try:
+        if args.comando == 'export':
+            if args.format == 'jsonl':
+                total = store.export_jsonl(args.destino)
+            else:
+                total = store.export_files(args.destino)
+            print(f"📦 {total} transcrições exportadas para {args.destino}")
+        elif args.comando == 'get':
+            text = store.get(args.video_id)
+            if text is None:
+                print(f"❌ {args.video_id} não está no armazenamento", file=sys.stderr)
+                return 1
+            print(text)
+        elif args.comando == 'rebuild-index':
+            print(f"🔧 Índice reconstruído: {store.rebuild_index()} vídeos")
+        else:
+            print(json.dumps(store.stats(), indent=2))
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
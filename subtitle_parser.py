@@ -0,0 +1,255 @@
+import html
+import re
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, NamedTuple, Optional, TextIO
+
+from transcript_model import CompactTranscript
+
+_TS = r'(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[.,](\d{1,3}))?'
+TIMESTAMP_RE = re.compile(rf'^{_TS}$')
+# Linha de tempo com os dois timestamps já decompostos (uma única regex por cue)
+TIMING_RE = re.compile(rf'^\s*{_TS}\s+-->\s+{_TS}(?:\s|$)')
+# Não atravessa linhas: remover as tags de vários blocos juntos dá o mesmo que linha a linha
+TAG_RE = re.compile(r'<[^>\n]*>')
+
+# Blocos do VTT que não são cues
+IGNORED_BLOCKS = ('NOTE', 'STYLE', 'REGION')
+
+# Caminho rápido (parse_subtitle_stream): pedaços lidos por vez e validação, numa
+# única regex, de todas as linhas de tempo do pedaço (as mesmas que TIMING_RE aceita)
+CHUNK_SIZE = 1 << 18
+_TS_LINHA = r'(?:\d+:)?\d{1,2}:\d{1,2}(?:[.,]\d{1,3})?'
+_TIMING_LINHA = rf'[^\S\n]*{_TS_LINHA}[^\S\n]+-->[^\S\n]+{_TS_LINHA}(?:[^\S\n][^\n]*)?'
+TIMING_LINES_RE = re.compile(rf'(?:{_TIMING_LINHA}\n)*{_TIMING_LINHA}')
+# Formato que o YouTube e o yt-dlp geram (HH:MM:SS.mmm): valida três vezes mais rápido
+_TS_COMUM = r'\d\d:\d\d:\d\d[.,]\d\d\d'
+_TIMING_COMUM = rf'{_TS_COMUM} --> {_TS_COMUM}(?: [^\n]*)?'
+COMMON_TIMING_LINES_RE = re.compile(rf'(?:{_TIMING_COMUM}\n)*{_TIMING_COMUM}')
+CRLF_RE = re.compile(r'\r+\n')
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+# Espaços além de ' ' e '\n' (os de str.isspace): procurar cada um com ``in`` é
+# bem mais rápido que uma regex no pedaço inteiro
+ODD_SPACES = '\t\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005' \
+             '\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'
+SPACES_RE = re.compile(r'[^\S\n]+')
+IGNORED_RE = re.compile(rf"^(?:{'|'.join(IGNORED_BLOCKS)})", re.M)
+# Separa os blocos juntados para limpeza; pedaços que contêm o caractere vão pelo caminho lento
+_MARCA = '\n\x00\n'
+
+
+class Cue(NamedTuple):
+    start: float
+    end: float
+    text: str
+
+
+def parse_timestamp(value: str) -> float:
+    """Converte 'HH:MM:SS.mmm', 'MM:SS.mmm' ou 'HH:MM:SS,mmm' (SRT) em segundos."""
+    match = TIMESTAMP_RE.match(value)
+    if not match:
+        raise ValueError(f"Timestamp inválido: {value!r}")
+    return _to_seconds(*match.groups())
+
+
+def _to_seconds(horas: Optional[str], minutos: str, segundos: str, millis: Optional[str]) -> float:
+    total = int(horas or 0) * 3600 + int(minutos) * 60 + int(segundos)
+    if millis:
+        total += int(millis.ljust(3, '0')) / 1000
+    return float(total)
+
+
+def clean_line(line: str) -> str:
+    """Remove tags (<c>, <00:00:01.500>, <i>...) e entidades HTML e normaliza espaços."""
+    if '<' in line:
+        line = TAG_RE.sub('', line)
+    if '&' in line:
+        line = html.unescape(line)
+    return ' '.join(line.split())
+
+
+def iter_cues(lines: Iterable[str], dedupe: bool = True) -> Iterator[Cue]:
+    """Lê legendas VTT ou SRT linha a linha e gera as cues com seus tempos.
+
+    Serve para os dois formatos: o que importa são as linhas "início --> fim".
+    Cabeçalhos, identificadores de cue, números de sequência do SRT e blocos
+    NOTE/STYLE/REGION são descartados.
+
+    Com ``dedupe``, as repetições das legendas automáticas do YouTube (cada linha
+    aparece duas ou três vezes conforme a legenda "rola") são colapsadas: uma
+    linha idêntica a uma das últimas emitidas não é emitida de novo, e cues que
+    só repetem texto são puladas. A memória usada não depende do tamanho do arquivo.
+    """
+    return _iter_cues(lines, dedupe, deque(maxlen=2))
+
+
+def _iter_cues(lines: Iterable[str], dedupe: bool, recentes: Deque[str]) -> Iterator[Cue]:
+    start: Optional[float] = None
+    end = 0.0
+    texto: List[str] = []
+    ignorando = False
+
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+
+        # Só a linha realmente vazia separa blocos; YouTube usa " " como linha de texto vazia
+        if not line:
+            if start is not None:
+                cue = _build_cue(start, end, texto, recentes, dedupe)
+                if cue is not None:
+                    yield cue
+            start = None
+            texto = []
+            ignorando = False
+            continue
+
+        if ignorando:
+            continue
+
+        if '-->' in line:
+            match = TIMING_RE.match(line)
+            if match:
+                if start is not None:
+                    # Cue nova sem linha em branco antes (SRT malformado): o número
+                    # de sequência ficou como última linha de texto
+                    if texto and texto[-1].isdigit():
+                        texto.pop()
+                    cue = _build_cue(start, end, texto, recentes, dedupe)
+                    if cue is not None:
+                        yield cue
+                grupos = match.groups()
+                start, end = _to_seconds(*grupos[:4]), _to_seconds(*grupos[4:])
+                texto = []
+                continue
+
+        if start is None:
+            if line.startswith(IGNORED_BLOCKS):
+                ignorando = True
+            continue
+
+        line = clean_line(line)
+        if line:
+            texto.append(line)
+
+    if start is not None:
+        cue = _build_cue(start, end, texto, recentes, dedupe)
+        if cue is not None:
+            yield cue
+
+
+def _build_cue(start: float, end: float, texto: List[str],
+               recentes: Deque[str], dedupe: bool) -> Optional[Cue]:
+    if dedupe:
+        texto = [line for line in texto if line not in recentes]
+        recentes.extend(texto)
+    if not texto:
+        return None
+    return Cue(start, end, ' '.join(texto))
+
+
+def cues_to_text(cues: Iterable[Cue]) -> str:
+    """Junta o texto das cues em texto corrido."""
+    return ' '.join(cue.text for cue in cues)
+
+
+def load_subtitle_stream(fh: TextIO, dedupe: bool = True) -> CompactTranscript:
+    """Carrega um arquivo de legenda aberto (VTT ou SRT) num CompactTranscript, em uma passada."""
+    return CompactTranscript.from_cues(iter_cues(fh, dedupe=dedupe))
+
+
+def parse_subtitle_stream(fh: TextIO, dedupe: bool = True) -> str:
+    """Converte um arquivo de legenda aberto (VTT ou SRT) em texto limpo, em uma passada.
+
+    Dá o mesmo texto que ``load_subtitle_stream(fh).text()``, sem calcular os
+    tempos: o arquivo é lido em pedaços e, quando os blocos do pedaço têm a forma
+    comum (linha de tempo, talvez precedida de um identificador, seguida só de
+    texto), tags e espaços são limpos no pedaço inteiro de uma vez. Pedaços fora
+    dessa forma passam pela leitura linha a linha de ``iter_cues``.
+    """
+    recentes: Deque[str] = deque(maxlen=2)
+    partes: List[str] = []
+    for blocos in _iter_block_chunks(fh):
+        # Blocos sem linha de tempo no início do pedaço (cabeçalho do VTT, NOTE) não geram cues
+        inicio = 0
+        while inicio < len(blocos) and '-->' not in blocos[inicio]:
+            inicio += 1
+        if inicio:
+            blocos = blocos[inicio:]
+            if not blocos:
+                continue
+        corpos = _clean_chunk(blocos)
+        if corpos is None:
+            linhas = '\n\n'.join(blocos).split('\n')
+            partes.extend(cue.text for cue in _iter_cues(linhas, dedupe, recentes))
+            continue
+        for corpo in corpos:
+            if dedupe:
+                texto = [line for line in map(str.strip, corpo.split('\n')) if line and line not in recentes]
+                recentes.extend(texto)
+                partes.extend(texto)
+            else:
+                partes.extend([line for line in map(str.strip, corpo.split('\n')) if line])
+    return ' '.join(partes)
+
+
+def _iter_block_chunks(fh: TextIO) -> Iterator[List[str]]:
+    """Blocos (separados por linha vazia) do arquivo, em listas de um pedaço de cada vez."""
+    resto = ''
+    for pedaco in iter(lambda: fh.read(CHUNK_SIZE), ''):
+        texto = resto + pedaco
+        cauda = ''
+        if '\r' in texto:
+            # "\r" no fim do pedaço pode ser metade de um "\r\n": fica para o próximo
+            sem_cr = texto.rstrip('\r')
+            texto, cauda = CRLF_RE.sub('\n', sem_cr), texto[len(sem_cr):]
+        corte = texto.rfind('\n\n')
+        if corte < 0:
+            resto = texto + cauda
+            continue
+        resto = texto[corte + 2:] + cauda
+        blocos = _split_blocks(texto[:corte])
+        if blocos:
+            yield blocos
+    blocos = _split_blocks(CRLF_RE.sub('\n', resto).rstrip('\r'))
+    if blocos:
+        yield blocos
+
+
+def _split_blocks(texto: str) -> List[str]:
+    # Várias linhas vazias seguidas separam blocos como uma só
+    if '\n\n\n' in texto:
+        texto = BLANK_LINES_RE.sub('\n\n', texto)
+    texto = texto.strip('\n')
+    return texto.split('\n\n') if texto else []
+
+
+def _timing_lines(cabecas: str) -> bool:
+    return bool(COMMON_TIMING_LINES_RE.fullmatch(cabecas) or TIMING_LINES_RE.fullmatch(cabecas))
+
+
+def _clean_chunk(blocos: List[str]) -> Optional[List[str]]:
+    """Texto de cada bloco sem tags, entidades e espaços repetidos, ou None se algum
+    bloco fugir da forma comum. Falta só tirar os espaços das pontas das linhas."""
+    partes = [bloco.partition('\n') for bloco in blocos]
+    cabecas = '\n'.join([cabeca for cabeca, _, _ in partes])
+    if not _timing_lines(cabecas):
+        # SRT e VTT com identificadores: a linha de tempo é a segunda do bloco
+        if '-->' in cabecas or IGNORED_RE.search(cabecas):
+            return None
+        partes = [resto.partition('\n') for _, _, resto in partes]
+        if not _timing_lines('\n'.join([cabeca for cabeca, _, _ in partes])):
+            return None
+
+    texto = _MARCA.join([corpo for _, _, corpo in partes])
+    if '-->' in texto or texto.count('\x00') >= len(partes):
+        return None
+    if '<' in texto:
+        texto = TAG_RE.sub('', texto)
+    if '&' in texto:
+        linhas = texto.count('\n')
+        texto = html.unescape(texto)
+        # Entidade de quebra de linha (&#10;) mudaria a divisão em linhas
+        if texto.count('\n') != linhas:
+            return None
+    if '  ' in texto or any(espaco in texto for espaco in ODD_SPACES):
+        texto = SPACES_RE.sub(' ', texto)
+    return texto.split(_MARCA)
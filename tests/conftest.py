@@ -0,0 +1,34 @@
+"""Configuração comum dos testes: caminhos do projeto e o YouTube falso dos benchmarks.
+
+Os testes rodam offline, contra ``benchmarks/fake_youtube.py`` e o yt-dlp falso de
+``benchmarks/stub_ytdlp.py``:
+
+    python -m pytest tests -q
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'benchmarks'))
+sys.path.insert(0, str(ROOT_DIR))
+
+
+class FakeArgs:
+    """Parâmetros mínimos do YouTube falso (os mesmos nomes da CLI da suíte de benchmarks)."""
+    latency = 1
+    jitter = 0
+    rate_429 = 0
+    failure_rate = 0
+    recorded_dir = None
+    cues = 20
+
+
+@pytest.fixture
+def youtube(tmp_path: Path):
+    """YouTube falso e yt-dlp falso no PATH; entrega ``(server, stub)``."""
+    from bench_suite import youtube_falso
+
+    with youtube_falso(FakeArgs, tmp_path) as (server, stub):
+        yield server, stub
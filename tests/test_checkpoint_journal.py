@@ -0,0 +1,53 @@
+"""Retomada de lotes pelo diário: linha truncada e falhas transitórias."""
+from pathlib import Path
+
+from checkpoint_journal import CheckpointJournal
+
+
+def test_retoma_depois_de_linha_truncada(tmp_path: Path):
+    caminho = tmp_path / 'lote.journal'
+    journal = CheckpointJournal(caminho)
+    journal.record('aaaaaaaaaaa', True)
+    journal.close()
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write('{"video_id": "bbbbbbbbbbb", "succ')
+
+    journal = CheckpointJournal(caminho)
+    assert journal.get('aaaaaaaaaaa') is not None
+    assert journal.get('bbbbbbbbbbb') is None
+    journal.record('ccccccccccc', True)
+    journal.close()
+
+    retomado = CheckpointJournal(caminho)
+    assert retomado.get('aaaaaaaaaaa') is not None
+    assert retomado.get('ccccccccccc') is not None
+    assert len(retomado) == 2
+
+
+def test_so_falhas_permanentes_sao_puladas(tmp_path: Path):
+    caminho = tmp_path / 'lote.journal'
+    journal = CheckpointJournal(caminho)
+    journal.record('aaaaaaaaaaa', False, 'Throttled')
+    journal.record('bbbbbbbbbbb', False, 'TranscriptsDisabled', permanent=True)
+    journal.close()
+
+    retomado = CheckpointJournal(caminho)
+    assert retomado.get('aaaaaaaaaaa') is None
+    assert retomado.get('bbbbbbbbbbb') is not None
+    assert CheckpointJournal(caminho, retry_failed=True).get('bbbbbbbbbbb') is None
+
+
+def test_lote_registra_falha_transitoria(tmp_path: Path, youtube):
+    from bench_suite import novo_downloader, urls_de
+
+    server, stub = youtube
+    server.rate_429 = 1.0
+    caminho = tmp_path / 'lote.journal'
+    downloader = novo_downloader(tmp_path, stub, max_retries=0, store=None, search_index=None)
+    Path(stub).write_text('#!/bin/sh\nexit 1\n')
+
+    journal = CheckpointJournal(caminho)
+    downloader.process_urls(urls_de(['aaaaaaaaaaa']), journal=journal)
+    journal.close()
+
+    assert CheckpointJournal(caminho).get('aaaaaaaaaaa') is None
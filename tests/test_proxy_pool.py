@@ -0,0 +1,41 @@
+"""Saúde dos proxies do pool: captcha, cooldown e vagas em uso."""
+import logging
+from pathlib import Path
+
+from fake_youtube import FakeYouTubeServer, video_ids
+from proxy_pool import ProxyPool
+
+
+def test_captcha_aumenta_o_cooldown(tmp_path: Path, youtube, caplog):
+    from bench_suite import novo_downloader
+
+    _, stub = youtube
+    caplog.set_level(logging.ERROR)
+    with FakeYouTubeServer(captcha_rate=1.0) as proxy:
+        pool = ProxyPool([proxy.base_url], cooldown=0.1)
+        downloader = novo_downloader(tmp_path, stub, proxy_pool=pool, max_retries=0,
+                                     store=None, search_index=None)
+        for tentativa, video_id in enumerate(video_ids(3), start=1):
+            assert downloader.download_transcript_api(video_id) is None
+            assert pool._states[proxy.base_url].strikes == tentativa
+
+        [estado] = pool.stats()
+        assert estado['throttled'] == 3
+        assert estado['errors'] == 0
+
+
+def test_falha_antes_da_requisicao_devolve_o_proxy(tmp_path: Path, youtube, caplog):
+    from bench_suite import novo_downloader
+
+    _, stub = youtube
+    caplog.set_level(logging.CRITICAL)
+    with FakeYouTubeServer() as proxy:
+        pool = ProxyPool([proxy.base_url], cooldown=0.1)
+        downloader = novo_downloader(tmp_path, stub, proxy_pool=pool, store=None, search_index=None)
+
+        def sem_sessao(proxy=None):
+            raise RuntimeError('sessão indisponível')
+
+        downloader._create_http_client = sem_sessao
+        assert downloader.download_transcript_api('aaaaaaaaaaa') is None
+        assert pool._states[proxy.base_url].in_flight == 0
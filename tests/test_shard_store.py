@@ -0,0 +1,40 @@
+"""Recuperação dos shards depois de uma queda no meio do ``put``."""
+import zlib
+from pathlib import Path
+
+from shard_store import RECORD_HEADER, RECORD_MAGIC, ShardStore
+
+
+def _fragmento(video_id: str) -> bytes:
+    """Cabeçalho e começo de um registro, como fica após uma queda no meio do ``put``."""
+    corpo = zlib.compress(bytes(range(256)) * 4)
+    return RECORD_HEADER.pack(RECORD_MAGIC, len(video_id), len(corpo)) + video_id.encode() + corpo[:len(corpo) // 2]
+
+
+def test_rebuild_resincroniza_depois_de_registro_incompleto(tmp_path: Path):
+    store = ShardStore(tmp_path)
+    store.put('aaaaaaaaaaa', 'um ' * 100)
+    store.put('bbbbbbbbbbb', 'dois ' * 100)
+    store._writer.write(_fragmento('ccccccccccc'))
+    store._writer.flush()
+    store.put('ddddddddddd', 'tres')
+
+    assert store.rebuild_index() == 3
+    assert 'bbbbbbbbbbb' in store
+    assert store.get('ddddddddddd') == 'tres'
+    store.close()
+
+
+def test_corta_fim_incompleto_ao_reabrir(tmp_path: Path):
+    store = ShardStore(tmp_path)
+    store.put('aaaaaaaaaaa', 'um')
+    store._writer.write(_fragmento('bbbbbbbbbbb'))
+    store._writer.flush()
+    store.close()
+
+    store = ShardStore(tmp_path)
+    store.put('ccccccccccc', 'tres')
+    assert store.rebuild_index() == 2
+    assert store.get('aaaaaaaaaaa') == 'um'
+    assert store.get('ccccccccccc') == 'tres'
+    store.close()
@@ -0,0 +1,45 @@
+"""Acertos do cache não vão à rede nem esperam o limite de taxa."""
+import asyncio
+import time
+from pathlib import Path
+
+from fake_youtube import video_ids
+from transcript_cache import TranscriptCache
+
+
+def test_acerto_nao_paga_espacamento(tmp_path: Path, youtube):
+    from bench_suite import novo_downloader, urls_de
+
+    _, stub = youtube
+    urls = urls_de(video_ids(4))
+    downloader = novo_downloader(tmp_path, stub, cache=TranscriptCache(tmp_path / 'cache.sqlite3'),
+                                 store=None, search_index=None, adaptive_rate=False)
+    downloader.delay = 1
+    downloader.rate_limiter.min_interval = 1.0
+    assert all(ok for _, ok, _ in downloader.process_urls(urls))
+
+    inicio = time.perf_counter()
+    resultados = downloader.process_urls(urls)
+    assert all(ok for _, ok, _ in resultados)
+    assert time.perf_counter() - inicio < 1.0
+
+
+def test_async_usa_o_cache(tmp_path: Path, youtube):
+    from bench_suite import urls_de
+    from youtube_transcript_async import AsyncYouTubeTranscriptDownloader
+
+    server, stub = youtube
+    urls = urls_de(video_ids(4))
+    cache = TranscriptCache(tmp_path / 'cache.sqlite3')
+
+    async def rodar():
+        async with AsyncYouTubeTranscriptDownloader(output_dir=str(tmp_path / 'saida'), delay=1, concurrency=2,
+                                                    ytdlp_path=stub, watch_url=server.watch_url,
+                                                    cache=cache) as downloader:
+            return await downloader.process_urls(urls)
+
+    assert all(ok for _, ok, _ in asyncio.run(rodar()))
+    server.rate_429 = 1.0
+    inicio = time.perf_counter()
+    assert all(ok for _, ok, _ in asyncio.run(rodar()))
+    assert time.perf_counter() - inicio < 1.0
@@ -0,0 +1,151 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Sink: qualquer chamável que recebe o registro (dict) de um vídeo já finalizado
+TraceSink = Callable[[Dict], None]
+
+_current_trace: ContextVar[Optional['VideoTrace']] = ContextVar('current_trace', default=None)
+
+
+class VideoTrace:
+    """Etapas cronometradas do processamento de um vídeo.
+
+    ``attrs`` guarda os dados gerais (estratégia, idioma, sucesso...) e ``stages``
+    as etapas na ordem em que terminaram, com início relativo e duração em segundos.
+    """
+
+    __slots__ = ('video_id', 'started_at', 'attrs', 'stages', '_t0')
+
+    def __init__(self, video_id: Optional[str], **attrs):
+        self.video_id = video_id
+        self.started_at = time.time()
+        self.attrs: Dict = dict(attrs)
+        self.stages: List[Dict] = []
+        self._t0 = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict:
+        return {
+            'video_id': self.video_id,
+            'started_at': round(self.started_at, 3),
+            'total': round(time.perf_counter() - self._t0, 6),
+            **self.attrs,
+            'stages': self.stages,
+        }
+
+
+class _NullTrace:
+    """Trace usado quando não há sink: não mede nem guarda nada."""
+
+    __slots__ = ()
+    video_id = None
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+@contextmanager
+def stage(name: str, **attrs) -> Iterator[Dict]:
+    """Cronometra uma etapa do trace ativo no contexto atual (thread ou task asyncio).
+
+    Entrega um dict em que o bloco pode anotar detalhes da etapa. Se o bloco
+    terminar com exceção, o nome dela fica em ``error`` e a exceção segue adiante.
+    Sem trace ativo, não mede nada.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+
+    inicio = time.perf_counter()
+    span = {'stage': name, 'start': round(inicio - trace._t0, 6), **attrs}
+    try:
+        yield span
+    except BaseException as e:
+        span['error'] = type(e).__name__
+        raise
+    finally:
+        span['duration'] = round(time.perf_counter() - inicio, 6)
+        trace.stages.append(span)
+
+
+def current_trace() -> Optional[VideoTrace]:
+    """Trace ativo no contexto atual, se houver."""
+    return _current_trace.get()
+
+
+class Tracer:
+    """Abre um trace por vídeo e entrega o registro final ao sink.
+
+    Sem sink, ``trace`` devolve um trace nulo e as etapas viram no-ops.
+    """
+
+    def __init__(self, sink: Optional[TraceSink] = None):
+        self.sink = sink
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    @contextmanager
+    def trace(self, video_id: Optional[str], **attrs) -> Iterator[Union[VideoTrace, _NullTrace]]:
+        if self.sink is None:
+            yield NULL_TRACE
+            return
+
+        trace = VideoTrace(video_id, **attrs)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.set(error=type(e).__name__)
+            raise
+        finally:
+            _current_trace.reset(token)
+            try:
+                self.sink(trace.to_dict())
+            except Exception as e:
+                logger.warning("⚠️  Falha ao gravar trace de %s: %s", video_id, e)
+
+
+class JsonLinesSink:
+    """Sink que grava um objeto JSON por linha (um por vídeo) num arquivo.
+
+    O arquivo é aberto em modo append; a escrita é protegida por lock, então o
+    mesmo sink pode ser usado por vários workers.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def __call__(self, record: Dict):
+        linha = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            self._file.write(linha)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> 'JsonLinesSink':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,337 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+# Validade (em segundos) das respostas negativas, por classe de falha da API.
+# Vídeos removidos/privados raramente voltam; legendas automáticas podem surgir
+# dias depois do upload, então "sem transcrição" expira antes.
+NEGATIVE_TTLS = {
+    'VideoUnavailable': 30 * 24 * 3600,
+    'TranscriptsDisabled': 7 * 24 * 3600,
+    'NoTranscriptFound': 24 * 3600,
+    'NoTranscriptAvailable': 24 * 3600,
+}
+
+
+class TranscriptCache:
+    """Cache persistente de transcrições em SQLite.
+
+    As entradas são indexadas por (video_id, idioma, tipo de trilha) e expiram
+    depois de ``ttl`` segundos. Quando o total armazenado passa de ``max_bytes``,
+    as entradas menos usadas recentemente (LRU) são removidas.
+
+    Tipos de trilha usados pelos downloaders: 'manual', 'auto', 'translated' e 'ytdlp'.
+
+    Também guarda o cache negativo: vídeos em que todas as estratégias falharam
+    por um motivo permanente, com validade por classe de falha (``negative_ttls``,
+    padrão ``NEGATIVE_TTLS``). Motivos fora da tabela não são guardados.
+
+    E as listagens de playlists e canais (IDs na ordem listada), para que uma
+    nova execução só precise buscar os vídeos adicionados depois.
+
+    O total de bytes fica numa tabela de uma linha mantida por triggers, então
+    ``put`` não soma a tabela inteira. Os acessos dos acertos (ordem LRU) são
+    gravados em lotes de ``touch_batch``, não um commit por ``get``.
+    """
+
+    def __init__(self, path: Union[str, Path] = "transcricoes/cache.sqlite3",
+                 ttl: Optional[float] = 30 * 24 * 3600, max_bytes: int = 500 * 1024 * 1024,
+                 negative_ttls: Optional[Dict[str, float]] = None, touch_batch: int = 256):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.negative_ttls = dict(NEGATIVE_TTLS if negative_ttls is None else negative_ttls)
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.touch_batch = max(1, touch_batch)
+        # Acessos ainda não gravados: (accessed_at, video_id, language, track_type)
+        self._touches = []
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # O INSERT OR REPLACE só dispara o trigger de DELETE com recursive_triggers
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id    TEXT NOT NULL,
+                language    TEXT NOT NULL,
+                track_type  TEXT NOT NULL,
+                text        TEXT NOT NULL,
+                metadata    TEXT,
+                size        INTEGER NOT NULL,
+                created_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (video_id, language, track_type)
+            );
+            CREATE INDEX IF NOT EXISTS idx_transcripts_accessed ON transcripts (accessed_at);
+            CREATE INDEX IF NOT EXISTS idx_transcripts_created ON transcripts (created_at);
+            CREATE TABLE IF NOT EXISTS failures (
+                video_id   TEXT PRIMARY KEY,
+                reason     TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_failures_expires ON failures (expires_at);
+            CREATE TABLE IF NOT EXISTS cache_size (
+                id    INTEGER PRIMARY KEY CHECK (id = 0),
+                total INTEGER NOT NULL
+            );
+            CREATE TRIGGER IF NOT EXISTS transcripts_size_insert AFTER INSERT ON transcripts BEGIN
+                UPDATE cache_size SET total = total + NEW.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS transcripts_size_delete AFTER DELETE ON transcripts BEGIN
+                UPDATE cache_size SET total = total - OLD.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS transcripts_size_update AFTER UPDATE OF size ON transcripts BEGIN
+                UPDATE cache_size SET total = total - OLD.size + NEW.size WHERE id = 0;
+            END;
+            CREATE TABLE IF NOT EXISTS expansions (
+                source     TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL,
+                complete   INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS expansion_items (
+                source   TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                video_id TEXT NOT NULL,
+                PRIMARY KEY (source, video_id)
+            );
+        """)
+        # Caches criados antes do contador: uma única soma, na primeira abertura
+        if self._conn.execute("SELECT 1 FROM cache_size WHERE id = 0").fetchone() is None:
+            self._conn.execute(
+                "INSERT INTO cache_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM transcripts"
+            )
+        self._conn.commit()
+
+    def get(self, video_id: str, language: Optional[str] = None,
+            track_type: Optional[str] = None) -> Optional[Dict]:
+        """Busca uma transcrição válida no cache.
+
+        Sem idioma/tipo, devolve a entrada mais recente do vídeo. Retorna um dict
+        com as chaves text, language, track_type e metadata, ou None.
+        """
+        query = "SELECT language, track_type, text, metadata, created_at FROM transcripts WHERE video_id = ?"
+        params = [video_id]
+        if language is not None:
+            query += " AND language = ?"
+            params.append(language)
+        if track_type is not None:
+            query += " AND track_type = ?"
+            params.append(track_type)
+        query += " ORDER BY created_at DESC"
+
+        now = time.time()
+        with self._lock:
+            for lang, tipo, text, metadata, created_at in self._conn.execute(query, params).fetchall():
+                if self.ttl is not None and now - created_at > self.ttl:
+                    self._conn.execute(
+                        "DELETE FROM transcripts WHERE video_id = ? AND language = ? AND track_type = ?",
+                        (video_id, lang, tipo)
+                    )
+                    continue
+
+                self._touches.append((now, video_id, lang, tipo))
+                if len(self._touches) >= self.touch_batch:
+                    self._flush_touches()
+                self._conn.commit()
+                self.hits += 1
+                return {
+                    'text': text,
+                    'language': lang,
+                    'track_type': tipo,
+                    'metadata': json.loads(metadata) if metadata else {},
+                }
+
+            self._conn.commit()
+            self.misses += 1
+            return None
+
+    def has(self, video_id: str) -> bool:
+        """Indica se há alguma transcrição válida do vídeo, sem ler o texto nem contar acesso."""
+        query = "SELECT 1 FROM transcripts WHERE video_id = ?"
+        params = [video_id]
+        if self.ttl is not None:
+            query += " AND created_at >= ?"
+            params.append(time.time() - self.ttl)
+        with self._lock:
+            return self._conn.execute(query + " LIMIT 1", params).fetchone() is not None
+
+    def put(self, video_id: str, text: str, language: str = "unknown",
+            track_type: str = "unknown", metadata: Optional[Dict] = None):
+        """Armazena uma transcrição e aplica a remoção LRU se o limite de bytes for excedido."""
+        if not text:
+            return
+
+        size = len(text.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts "
+                "(video_id, language, track_type, text, metadata, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (video_id, language or "unknown", track_type or "unknown", text,
+                 json.dumps(metadata, ensure_ascii=False) if metadata else None, size, now, now)
+            )
+            # O vídeo tem transcrição: deixa de ser um resultado negativo
+            self._conn.execute("DELETE FROM failures WHERE video_id = ?", (video_id,))
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touches(self):
+        """Grava os acessos pendentes dos acertos (ordem LRU). Chamado com o lock; o commit fica com quem chamou."""
+        if not self._touches:
+            return
+        self._conn.executemany(
+            "UPDATE transcripts SET accessed_at = MAX(accessed_at, ?) "
+            "WHERE video_id = ? AND language = ? AND track_type = ?", self._touches
+        )
+        self._touches = []
+
+    def put_failure(self, video_id: str, reason: str) -> bool:
+        """Marca o vídeo como indisponível pelo motivo ``reason`` (nome da exceção da API).
+
+        Retorna False, sem gravar nada, se o motivo não tiver validade configurada.
+        """
+        ttl = self.negative_ttls.get(reason)
+        if not ttl:
+            return False
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO failures (video_id, reason, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (video_id, reason, now, now + ttl)
+            )
+            self._conn.commit()
+        return True
+
+    def get_failure(self, video_id: str) -> Optional[Dict]:
+        """Resultado negativo válido do vídeo ({reason, created_at, expires_at}), ou None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reason, created_at, expires_at FROM failures WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] < time.time():
+                self._conn.execute("DELETE FROM failures WHERE video_id = ?", (video_id,))
+                self._conn.commit()
+                return None
+            self.negative_hits += 1
+            return {'reason': row[0], 'created_at': row[1], 'expires_at': row[2]}
+
+    def get_expansion(self, source: str) -> Optional[Dict]:
+        """Listagem guardada de uma playlist/canal ({video_ids, fetched_at, complete}), ou None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, complete FROM expansions WHERE source = ?", (source,)
+            ).fetchone()
+            if row is None:
+                return None
+            video_ids = [video_id for video_id, in self._conn.execute(
+                "SELECT video_id FROM expansion_items WHERE source = ? ORDER BY position", (source,)
+            )]
+        return {'video_ids': video_ids, 'fetched_at': row[0], 'complete': bool(row[1])}
+
+    def add_expansion_ids(self, source: str, video_ids: Iterable[str]):
+        """Acrescenta IDs à listagem da playlist/canal (IDs já guardados são ignorados)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO expansions (source, fetched_at, complete) VALUES (?, ?, 0)",
+                (source, time.time())
+            )
+            proxima = self._conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM expansion_items WHERE source = ?", (source,)
+            ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO expansion_items (source, position, video_id) VALUES (?, ?, ?)",
+                ((source, proxima + i, video_id) for i, video_id in enumerate(video_ids))
+            )
+            self._conn.commit()
+
+    def finish_expansion(self, source: str):
+        """Marca a listagem da playlist/canal como completa agora."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO expansions (source, fetched_at, complete) VALUES (?, ?, 1)",
+                (source, time.time())
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        """Remove entradas expiradas e, depois, as menos acessadas até caber em max_bytes."""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM transcripts WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.execute("DELETE FROM failures WHERE expires_at < ?", (time.time(),))
+
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        # A ordem LRU precisa dos acessos ainda não gravados
+        self._flush_touches()
+        cursor = self._conn.execute(
+            "SELECT video_id, language, track_type, size FROM transcripts ORDER BY accessed_at ASC"
+        )
+        remover = []
+        for video_id, lang, tipo, size in cursor:
+            if total <= self.max_bytes:
+                break
+            remover.append((video_id, lang, tipo))
+            total -= size
+
+        self._conn.executemany(
+            "DELETE FROM transcripts WHERE video_id = ? AND language = ? AND track_type = ?", remover
+        )
+
+    def invalidate(self, video_id: str):
+        """Remove todas as entradas de um vídeo, inclusive a negativa."""
+        with self._lock:
+            self._conn.execute("DELETE FROM transcripts WHERE video_id = ?", (video_id,))
+            self._conn.execute("DELETE FROM failures WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        """Total de bytes de texto armazenados."""
+        with self._lock:
+            return self._total_bytes()
+
+    def stats(self) -> Dict:
+        """Estatísticas de uso do cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+            failures = self._conn.execute(
+                "SELECT COUNT(*) FROM failures WHERE expires_at >= ?", (time.time(),)
+            ).fetchone()[0]
+            expansions = self._conn.execute("SELECT COUNT(*) FROM expansions").fetchone()[0]
+        return {
+            'entries': entries,
+            'bytes': self.total_bytes(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'failures': failures,
+            'negative_hits': self.negative_hits,
+            'expansions': expansions,
+        }
+
+    def flush(self):
+        """Grava os acessos pendentes dos acertos."""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,138 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Union, overload
+
+
+class TranscriptCue:
+    """Visão de uma cue dentro de um CompactTranscript (não copia os dados)."""
+
+    __slots__ = ('_transcript', '_index')
+
+    def __init__(self, transcript: 'CompactTranscript', index: int):
+        self._transcript = transcript
+        self._index = index
+
+    @property
+    def start(self) -> float:
+        return self._transcript.starts[self._index]
+
+    @property
+    def duration(self) -> float:
+        return self._transcript.durations[self._index]
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    @property
+    def text(self) -> str:
+        return self._transcript.cue_text(self._index)
+
+    def __repr__(self) -> str:
+        return f"TranscriptCue(start={self.start!r}, duration={self.duration!r}, text={self.text!r})"
+
+
+class CompactTranscript:
+    """Transcrição em colunas: tempos em ``array('d')`` e texto num único buffer.
+
+    Substitui a lista de dicts por cue (um dict, dois floats e uma string por
+    trecho) por três arrays e um ``bytearray`` UTF-8 com offsets. O texto corrido
+    só é montado quando pedido (``text()`` ou ``iter_text()``).
+
+    Pode ser carregado do resultado da youtube-transcript-api (``from_api``) ou
+    das cues do ``subtitle_parser`` (``from_cues``).
+    """
+
+    __slots__ = ('starts', 'durations', '_offsets', '_buffer')
+
+    def __init__(self):
+        self.starts = array('d')
+        self.durations = array('d')
+        # _offsets[i]:_offsets[i + 1] é o texto da cue i dentro de _buffer
+        self._offsets = array('Q', [0])
+        self._buffer = bytearray()
+
+    def append(self, start: float, duration: float, text: str):
+        """Adiciona uma cue. O texto deve chegar já normalizado."""
+        self.starts.append(start)
+        self.durations.append(duration)
+        self._buffer += text.encode('utf-8')
+        self._offsets.append(len(self._buffer))
+
+    @classmethod
+    def from_api(cls, transcript_data: Iterable[Dict]) -> 'CompactTranscript':
+        """Carrega a lista [{'text', 'start', 'duration'}] da youtube-transcript-api.
+
+        Quebras de linha e espaços repetidos viram um espaço; trechos vazios são descartados.
+        """
+        transcript = cls()
+        for entry in transcript_data:
+            if isinstance(entry, dict) and 'text' in entry:
+                texto = ' '.join(entry['text'].split())
+                if texto:
+                    transcript.append(float(entry.get('start', 0.0)),
+                                      float(entry.get('duration', 0.0)), texto)
+        return transcript
+
+    @classmethod
+    def from_cues(cls, cues: Iterable) -> 'CompactTranscript':
+        """Carrega cues com ``start``, ``end`` e ``text`` (ex.: ``subtitle_parser.iter_cues``)."""
+        transcript = cls()
+        for cue in cues:
+            transcript.append(cue.start, cue.end - cue.start, cue.text)
+        return transcript
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @overload
+    def __getitem__(self, index: int) -> TranscriptCue: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[TranscriptCue]: ...
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [TranscriptCue(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice de cue fora do intervalo")
+        return TranscriptCue(self, index)
+
+    def __iter__(self) -> Iterator[TranscriptCue]:
+        for i in range(len(self)):
+            yield TranscriptCue(self, i)
+
+    def cue_text(self, index: int) -> str:
+        """Texto de uma cue, decodificado do buffer."""
+        return self._buffer[self._offsets[index]:self._offsets[index + 1]].decode('utf-8')
+
+    def iter_text(self, chunk_size: int = 1 << 16) -> Iterator[str]:
+        """Gera o texto corrido (cues separadas por espaço) em pedaços de ~``chunk_size`` bytes."""
+        buffer = memoryview(self._buffer)
+        partes = bytearray()
+        for i in range(len(self)):
+            if i:
+                partes += b' '
+            partes += buffer[self._offsets[i]:self._offsets[i + 1]]
+            # Corta só entre cues: nunca no meio de um caractere UTF-8
+            if len(partes) >= chunk_size:
+                yield partes.decode('utf-8')
+                partes = bytearray()
+        if partes:
+            yield partes.decode('utf-8')
+
+    def text(self) -> str:
+        """Texto corrido da transcrição."""
+        return ''.join(self.iter_text())
+
+    def __str__(self) -> str:
+        return self.text()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos dados (arrays e buffer de texto)."""
+        return (self.starts.itemsize * len(self.starts)
+                + self.durations.itemsize * len(self.durations)
+                + self._offsets.itemsize * len(self._offsets)
+                + len(self._buffer))
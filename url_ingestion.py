@@ -0,0 +1,205 @@
+import hashlib
+import io
+import logging
+import math
+import re
+import sys
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, IO, Iterable, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Forma canônica das URLs do lote (sem parâmetros como &t= ou &list=)
+CANONICAL_URL = "https://www.youtube.com/watch?v={video_id}"
+
+# Playlists e canais (@handle, /channel/, /c/, /user/), expandidos nos vídeos que contêm
+COLLECTION_URL_RE = re.compile(r'youtube\.com/(?:playlist\?(?:.*&)?list=|channel/|c/|user/|@)')
+
+# Só as primeiras linhas rejeitadas viram aviso; as demais são apenas contadas
+MAX_REJECTED_WARNINGS = 10
+
+
+def _hash64(video_id: str) -> int:
+    # 0 marca posição vazia na tabela
+    return int.from_bytes(hashlib.blake2b(video_id.encode(), digest_size=8).digest(), 'little') or 1
+
+
+class CompactIdSet:
+    """Conjunto de IDs guardados como hashes de 64 bits numa tabela aberta (``array('Q')``).
+
+    Ocupa ~16 bytes por ID (um ``set`` de str gasta ~100). A chance de dois IDs
+    distintos colidirem é desprezível: ~n²/2⁶⁵, ou 3 em um milhão para 10 milhões de IDs.
+    """
+
+    __slots__ = ('_table', '_mask', '_count')
+
+    def __init__(self, capacity: int = 1024):
+        tamanho = 1 << max(4, (2 * capacity - 1).bit_length())
+        self._table = array('Q', bytes(8 * tamanho))
+        self._mask = tamanho - 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, video_id: str) -> bool:
+        h = _hash64(video_id)
+        i = h & self._mask
+        while self._table[i]:
+            if self._table[i] == h:
+                return True
+            i = (i + 1) & self._mask
+        return False
+
+    def add(self, video_id: str) -> bool:
+        """Adiciona o ID; retorna False se ele já estava no conjunto."""
+        if 2 * (self._count + 1) > len(self._table):
+            self._grow()
+        return self._insert(_hash64(video_id))
+
+    def _insert(self, h: int) -> bool:
+        table, mask = self._table, self._mask
+        i = h & mask
+        while True:
+            atual = table[i]
+            if not atual:
+                table[i] = h
+                self._count += 1
+                return True
+            if atual == h:
+                return False
+            i = (i + 1) & mask
+
+    def _grow(self):
+        antiga = self._table
+        self._table = array('Q', bytes(16 * len(antiga)))
+        self._mask = len(self._table) - 1
+        self._count = 0
+        for h in antiga:
+            if h:
+                self._insert(h)
+
+    @property
+    def nbytes(self) -> int:
+        return self._table.itemsize * len(self._table)
+
+
+class BloomFilter:
+    """Filtro de Bloom com memória fixa para ``capacity`` IDs.
+
+    Até a capacidade, a fração de IDs novos tomados por repetidos (e pulados) fica
+    em ``error_rate``; 10 milhões de IDs a 1e-4 ocupam ~24 MB.
+    """
+
+    __slots__ = ('num_bits', 'num_hashes', '_bits')
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 1e-4):
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, video_id: str) -> Iterator[int]:
+        # Double hashing: k posições a partir de dois hashes de 64 bits
+        digest = hashlib.blake2b(video_id.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, video_id: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(video_id))
+
+    def add(self, video_id: str) -> bool:
+        """Adiciona o ID; retorna False se ele (provavelmente) já tinha sido visto."""
+        novo = False
+        bits = self._bits
+        for p in self._positions(video_id):
+            mascara = 1 << (p & 7)
+            if not bits[p >> 3] & mascara:
+                bits[p >> 3] |= mascara
+                novo = True
+        return novo
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+def create_id_filter(kind: str = 'set', capacity: int = 10_000_000):
+    """Estrutura de deduplicação: 'set' (hash de 64 bits, colisões desprezíveis), 'bloom' (memória fixa) ou 'none'."""
+    if kind == 'set':
+        return CompactIdSet()
+    if kind == 'bloom':
+        return BloomFilter(capacity)
+    if kind == 'none':
+        return None
+    raise ValueError(f"Deduplicação desconhecida: {kind}")
+
+
+def iter_source_lines(source: Union[str, Path, IO]) -> Iterator[str]:
+    """Linhas de um caminho, de ``-`` (stdin) ou de um arquivo já aberto, texto ou binário.
+
+    Nada é lido antes de a primeira linha ser pedida; bytes inválidos em UTF-8
+    viram caracteres de substituição em vez de interromper o lote.
+    """
+    if isinstance(source, (str, Path)):
+        if str(source) == '-':
+            yield from sys.stdin
+            return
+        with open(source, 'r', encoding='utf-8', errors='replace') as f:
+            yield from f
+        return
+
+    if isinstance(source, io.TextIOBase):
+        yield from source
+        return
+
+    # Binário (ex.: upload do Flask): decodifica linha a linha
+    for linha in source:
+        yield linha.decode('utf-8', errors='replace') if isinstance(linha, bytes) else linha
+
+
+def iter_video_urls(lines: Iterable[str], extract_video_id: Callable[[str], Optional[str]],
+                    id_filter=None, stats: Optional[Dict[str, int]] = None,
+                    expand: Optional[Callable[[str], Iterable[str]]] = None) -> Iterator[str]:
+    """Gera, sob demanda, as URLs canônicas dos vídeos das linhas, sem repetir IDs.
+
+    Linhas vazias e comentários (#) são pulados; linhas que não parecem URL do
+    YouTube são rejeitadas (só as primeiras geram aviso). Com ``expand``, URLs de
+    playlists e canais viram os IDs que ``expand(url)`` gerar, consumidos sob
+    demanda; as demais URLs do YouTube sem ID de vídeo passam como estão.
+    ``stats`` recebe as contagens 'urls', 'duplicates', 'rejected' e 'collections'.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(urls=0, duplicates=0, rejected=0, collections=0)
+
+    for linha_num, linha in enumerate(lines, 1):
+        linha = linha.strip()
+        if not linha or linha.startswith('#'):
+            continue
+
+        if 'youtube.com' not in linha and 'youtu.be' not in linha:
+            stats['rejected'] += 1
+            if stats['rejected'] <= MAX_REJECTED_WARNINGS:
+                logger.warning("⚠️  Linha %d ignorada (não parece URL do YouTube): %s", linha_num, linha[:200])
+            continue
+
+        video_id = extract_video_id(linha)
+        if video_id is not None:
+            video_ids: Iterable[str] = (video_id,)
+        elif expand is not None and COLLECTION_URL_RE.search(linha):
+            stats['collections'] += 1
+            video_ids = expand(linha)
+        else:
+            stats['urls'] += 1
+            yield linha
+            continue
+
+        for video_id in video_ids:
+            if id_filter is not None and not id_filter.add(video_id):
+                stats['duplicates'] += 1
+            else:
+                stats['urls'] += 1
+                yield CANONICAL_URL.format(video_id=video_id)
@@ -0,0 +1,391 @@
+# pip install aiohttp yt-dlp youtube-transcript-api
+import asyncio
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Dict, Union
+
+import aiohttp
+from youtube_transcript_api._errors import (
+    NoTranscriptFound, TranscriptsDisabled, VideoUnavailable, TooManyRequests, FailedToCreateConsentCookie
+)
+from youtube_transcript_api._html_unescaping import unescape
+from youtube_transcript_api._transcripts import TranscriptList, TranscriptListFetcher, _TranscriptParser
+
+from rate_limiter import AsyncRateLimiter, Throttled, backoff_delay
+from search_index import SearchIndex
+from tracing import TraceSink, current_trace, stage
+from transcript_cache import TranscriptCache
+from youtube_transcript import YouTubeTranscriptDownloader
+
+logger = logging.getLogger(__name__)
+
+WATCH_URL = 'https://www.youtube.com/watch?v={video_id}'
+CONSENT_ACTION = 'action="https://consent.youtube.com/s"'
+# URLs lidas do arquivo (e de playlists/canais expandidos) por ida ao executor
+INGESTION_CHUNK = 64
+
+
+class AsyncYouTubeTranscriptDownloader:
+    """Contraparte asyncio do YouTubeTranscriptDownloader.
+
+    O HTTP é feito com aiohttp e o yt-dlp roda via ``asyncio.create_subprocess_exec``,
+    então milhares de vídeos podem ficar em andamento no mesmo processo sem
+    bloquear o event loop. Extração de ID, parsing, gravação e o cache
+    (transcrições e vídeos indisponíveis) reaproveitam o downloader síncrono.
+
+    Uso:
+        async with AsyncYouTubeTranscriptDownloader(concurrency=50) as downloader:
+            transcript = await downloader.download_single_video(url)
+    """
+
+    def __init__(self, output_dir: str = "transcricoes", delay: int = 5,
+                 concurrency: int = 50, rate_limit: Optional[float] = None,
+                 ytdlp_path: str = 'yt-dlp', watch_url: str = WATCH_URL,
+                 http_timeout: float = 30, trace_sink: Optional[TraceSink] = None,
+                 search_index: Optional[SearchIndex] = None, max_retries: int = 3,
+                 backoff_base: float = 2.0, backoff_cap: float = 120.0,
+                 cache: Optional[TranscriptCache] = None, force_refresh: bool = False):
+        self.downloader = YouTubeTranscriptDownloader(
+            output_dir=output_dir, delay=delay, ytdlp_path=ytdlp_path, ytdlp_backend='subprocess',
+            trace_sink=trace_sink, search_index=search_index, cache=cache, force_refresh=force_refresh,
+        )
+        self.tracer = self.downloader.tracer
+        self.output_dir = self.downloader.output_dir
+        self.ytdlp_path = ytdlp_path
+        self.watch_url = watch_url
+        self.concurrency = max(1, concurrency)
+        self.http_timeout = http_timeout
+
+        if rate_limit is None and delay and delay > 0:
+            rate_limit = 1.0 / delay
+        self.rate_limiter = AsyncRateLimiter(rate_limit)
+        # Vídeos limitados (429/captcha) são tentados de novo com backoff exponencial e jitter
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> 'AsyncYouTubeTranscriptDownloader':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Fecha a sessão HTTP compartilhada."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Cria (uma vez) a sessão HTTP com pool de conexões limitado pela concorrência."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.http_timeout),
+                headers={'Accept-Language': 'en-US'},
+            )
+        return self._session
+
+    async def _run_in_executor(self, func, *args):
+        """Executa ``func`` no executor padrão levando o contexto (e o trace) da task."""
+        contexto = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(contexto.run, func, *args)
+        )
+
+    async def _http_get(self, url: str, video_id: str) -> str:
+        """GET assíncrono; 429 vira TooManyRequests como na youtube-transcript-api."""
+        async with self._get_session().get(url) as response:
+            if response.status == 429:
+                raise TooManyRequests(video_id)
+            response.raise_for_status()
+            return await response.text()
+
+    async def list_transcripts(self, video_id: str) -> TranscriptList:
+        """Lista as transcrições do vídeo sem bloquear o loop.
+
+        Baixa a página do vídeo via aiohttp e reaproveita o parser de legendas
+        da youtube-transcript-api para montar o TranscriptList.
+        """
+        url = self.watch_url.format(video_id=video_id)
+        html = await self._http_get(url, video_id)
+
+        if CONSENT_ACTION in html:
+            match = re.search('name="v" value="(.*?)"', html)
+            if match is None:
+                raise FailedToCreateConsentCookie(video_id)
+            self._get_session().cookie_jar.update_cookies({'CONSENT': 'YES+' + match.group(1)})
+            html = await self._http_get(url, video_id)
+            if CONSENT_ACTION in html:
+                raise FailedToCreateConsentCookie(video_id)
+
+        captions_json = TranscriptListFetcher(None)._extract_captions_json(unescape(html), video_id)
+        return TranscriptList.build(None, video_id, captions_json)
+
+    async def fetch_transcript(self, transcript) -> List[Dict]:
+        """Baixa o XML de timedtext de uma transcrição e devolve a lista de trechos."""
+        xml_data = await self._http_get(transcript._url, transcript.video_id)
+        return _TranscriptParser().parse(xml_data)
+
+    async def download_transcript_api(self, video_id: str, track_info: Optional[Dict] = None) -> Optional[str]:
+        """Baixa transcrição com a mesma ordem de candidatos da versão síncrona.
+
+        Como na versão síncrona, um vídeo limitado (429 ou captcha) espera
+        ``backoff_delay`` e a próxima janela do limitador antes de outra
+        tentativa, até ``max_retries``. ``track_info`` recebe o idioma e o tipo
+        de trilha obtidos ou, em falha permanente, ``failure`` (cache negativo).
+        """
+        if track_info is None:
+            track_info = {}
+        for tentativa in range(self.max_retries + 1):
+            try:
+                return await self._download_transcript_api_once(video_id, track_info)
+            except Throttled as e:
+                if tentativa >= self.max_retries:
+                    logger.error("🐢 YouTube continua limitando após %d tentativas: %s", tentativa + 1, e)
+                    return None
+                espera = backoff_delay(tentativa, self.backoff_base, self.backoff_cap)
+                logger.warning("🐢 Limitado pelo YouTube (%s); nova tentativa em %.1f s", e, espera)
+                with stage('backoff', attempt=tentativa + 1) as span:
+                    await asyncio.sleep(espera)
+                    span['limiter_wait'] = round(await self.rate_limiter.acquire(), 3)
+        return None
+
+    async def _download_transcript_api_once(self, video_id: str, track_info: Dict) -> Optional[str]:
+        """Uma tentativa de ``download_transcript_api``; levanta ``Throttled`` se o YouTube limitar."""
+        try:
+            with stage('listing'):
+                transcript_list = await self.list_transcripts(video_id)
+
+            # Preferência e fallbacks resolvidos em memória, sem nova listagem
+            candidatos = self.downloader.iter_transcript_candidates(transcript_list)
+            for tentativa, (transcript, idioma, tipo) in enumerate(candidatos, 1):
+                try:
+                    etapa = 'translation' if tipo == 'translated' else 'fetch'
+                    with stage(etapa, language=idioma, track_type=tipo, attempt=tentativa):
+                        transcript_data = await self.fetch_transcript(transcript)
+                    if transcript_data:
+                        trace = current_trace()
+                        if trace is not None:
+                            trace.set(language=idioma, track_type=tipo)
+                        track_info.update(language=idioma, track_type=tipo)
+                        return self.downloader.process_transcript_data(transcript_data, video_id)
+                except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                    logger.warning("   ❌ Falhou para %s (%s, %s): %s...", idioma, tipo, video_id, str(e)[:100])
+
+            return None
+
+        except (NoTranscriptFound, TranscriptsDisabled, VideoUnavailable) as e:
+            logger.warning("❌ %s para %s", type(e).__name__, video_id)
+            track_info['failure'] = type(e).__name__
+            return None
+        except TooManyRequests as e:
+            # Na listagem ou no fetch de qualquer trilha: o vídeo inteiro é tentado de novo
+            raise Throttled(type(e).__name__) from e
+        except Exception as e:
+            logger.error("❌ Erro inesperado (%s): %s - %s...", video_id, type(e).__name__, str(e)[:100])
+            return None
+
+    async def _run_ytdlp(self, args: List[str], timeout: float) -> Tuple[int, str]:
+        """Executa o yt-dlp como subprocesso asyncio; mata o processo em caso de timeout."""
+        process = await asyncio.create_subprocess_exec(
+            self.ytdlp_path, *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        return process.returncode, stdout.decode('utf-8', errors='replace')
+
+    async def download_with_ytdlp(self, url: str, video_id: str,
+                                  track_info: Optional[Dict] = None) -> Optional[str]:
+        """Baixa legendas usando yt-dlp (subprocesso assíncrono) como fallback.
+
+        Se ``track_info`` for passado, recebe o idioma e o tipo de trilha obtidos.
+        """
+        # Pasta própria do vídeo: achar a legenda não depende do tamanho da pasta de saída
+        pasta = Path(tempfile.mkdtemp(prefix='ytdlp_', dir=self.output_dir))
+        try:
+            with stage('ytdlp_metadata', backend='subprocess'):
+                returncode, stdout = await self._run_ytdlp(['--dump-json', '--no-download', url], timeout=30)
+            if returncode == 0:
+                video_info = json.loads(stdout)
+                title = self.downloader.clean_filename(video_info.get('title', video_id))
+            else:
+                title = video_id
+
+            for lang in ['pt', 'pt-BR']:
+                output_template = str(pasta / f"{title}_[{video_id}].%(ext)s")
+                with stage('ytdlp_subtitles', backend='subprocess', language=lang):
+                    returncode, _ = await self._run_ytdlp([
+                        '--write-auto-sub',
+                        '--write-sub',
+                        '--sub-lang', lang,
+                        '--skip-download',
+                        '--output', output_template,
+                        url
+                    ], timeout=60)
+
+                if returncode == 0:
+                    for file in sorted(pasta.iterdir()):
+                        if file.suffix in ['.vtt', '.srt']:
+                            # Mantém a legenda na pasta de saída, como no downloader síncrono
+                            destino = self.output_dir / file.name
+                            os.replace(file, destino)
+                            if track_info is not None:
+                                track_info.update(language=lang, track_type='ytdlp')
+                            # Parsing de arquivos grandes fora do loop
+                            return await self._run_in_executor(self.downloader.parse_subtitle_file, destino, video_id)
+
+            return None
+
+        except asyncio.TimeoutError:
+            logger.warning("❌ yt-dlp timeout (%s)", video_id)
+            return None
+        except Exception as e:
+            logger.error("❌ Erro no yt-dlp (%s): %s...", video_id, str(e)[:100])
+            return None
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    async def download_single_video(self, url: str) -> Optional[str]:
+        """Baixa transcrição de um único vídeo usando múltiplas estratégias.
+
+        Como na versão síncrona, o cache de transcrições e o de vídeos
+        indisponíveis são consultados antes; só quem vai à rede aguarda o limitador.
+        """
+        if not url:
+            logger.error("❌ URL não fornecida")
+            return None
+
+        video_id = self.downloader.extract_video_id(url)
+        if not video_id:
+            logger.error("❌ Não foi possível extrair ID do vídeo de: %s", url)
+            return None
+
+        with self.tracer.trace(video_id) as trace:
+            # Cache (SQLite) no executor: acertos e indisponíveis conhecidos não vão à rede
+            transcript, encerrado = await self._run_in_executor(self.downloader._lookup_cache, video_id, trace)
+            if encerrado:
+                trace.set(success=transcript is not None)
+                return transcript
+
+            with stage('pacing') as span:
+                span['waited'] = round(await self.rate_limiter.acquire(), 3)
+
+            track_info: Dict = {}
+            transcript = await self.download_transcript_api(video_id, track_info)
+            trace.set(strategy='api')
+            if not transcript:
+                transcript = await self.download_with_ytdlp(url, video_id, track_info)
+                trace.set(strategy='ytdlp')
+
+            if transcript:
+                await self._run_in_executor(self.downloader._store_in_cache, video_id, transcript, track_info)
+            saved = bool(transcript) and await self._run_in_executor(
+                self.downloader.store_transcript, video_id, transcript
+            )
+            if not transcript:
+                await self._run_in_executor(self.downloader._store_failure, video_id, track_info.get('failure'))
+            trace.set(success=saved)
+
+        if saved:
+            return transcript
+
+        logger.warning("❌ Todas as estratégias falharam para %s", video_id)
+        return None
+
+    async def process_urls(self, urls: Union[Iterable[str], AsyncIterator[str]]) -> List[Tuple[str, bool, str]]:
+        """Processa várias URLs (iterável síncrono ou assíncrono) com ``concurrency`` workers.
+
+        Os workers consomem uma fila de no máximo ``2 × concurrency`` URLs, então a
+        entrada é lida conforme eles ficam livres e nunca há uma task por URL.
+        Retorna as tuplas (url, sucesso, detalhe) na ordem de entrada.
+        """
+        resultados: List[Optional[Tuple[str, bool, str]]] = []
+        fila: asyncio.Queue = asyncio.Queue(maxsize=2 * self.concurrency)
+
+        async def produtor():
+            try:
+                if hasattr(urls, '__aiter__'):
+                    async for url in urls:
+                        resultados.append(None)
+                        await fila.put((len(resultados) - 1, url))
+                else:
+                    for url in urls:
+                        resultados.append(None)
+                        await fila.put((len(resultados) - 1, url))
+            finally:
+                # Um marcador de fim por worker, mesmo se a leitura da entrada falhar
+                for _ in range(self.concurrency):
+                    await fila.put(None)
+
+        async def worker():
+            while True:
+                item = await fila.get()
+                if item is None:
+                    return
+                idx, url = item
+                resultados[idx] = await self._process_one(url)
+
+        await asyncio.gather(produtor(), *(worker() for _ in range(self.concurrency)))
+        return resultados
+
+    async def _process_one(self, url: str) -> Tuple[str, bool, str]:
+        """Baixa um vídeo do lote e devolve (url, sucesso, detalhe).
+
+        O limitador só é aguardado pelos vídeos que vão à rede (ver ``download_single_video``).
+        """
+        try:
+            transcript = await self.download_single_video(url)
+        except Exception as e:
+            return (url, False, f"Erro inesperado: {str(e)[:100]}")
+        if transcript:
+            return (url, True, f"Sucesso - {len(transcript)} chars")
+        return (url, False, "Falha ao obter transcrição")
+
+    async def iter_urls_from_file(self, filename: str = "urls.txt") -> AsyncIterator[str]:
+        """Gera as URLs de um arquivo sem bloquear o loop (ver ``iter_urls_from_file`` do síncrono).
+
+        A leitura, a deduplicação e a expansão de playlists/canais (que chama o
+        yt-dlp) rodam no executor, ``INGESTION_CHUNK`` URLs por vez.
+        """
+        urls = self.downloader.iter_urls_from_file(filename)
+        while True:
+            bloco = await self._run_in_executor(_take, urls, INGESTION_CHUNK)
+            if not bloco:
+                return
+            for url in bloco:
+                yield url
+
+    async def process_urls_from_file(self, filename: str = "urls.txt") -> List[Tuple[str, bool, str]]:
+        """Processa todas as URLs de um arquivo de forma assíncrona, lendo-o sob demanda."""
+        logger.info("🚀 Iniciando processamento assíncrono (%d simultâneas)", self.concurrency)
+        logger.info("=" * 70)
+
+        resultados = await self.process_urls(self.iter_urls_from_file(filename))
+        if not resultados:
+            logger.error("❌ Nenhuma URL válida encontrada no arquivo")
+            return []
+
+        self.downloader.print_summary(resultados)
+        return resultados
+
+
+def _take(iterator: Iterator[str], n: int) -> List[str]:
+    """Até ``n`` itens do iterador (lista vazia quando ele acaba)."""
+    return list(itertools.islice(iterator, n))
@@ -0,0 +1,263 @@
+# pip install yt-dlp
+import re
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import yt_dlp
+except ImportError:  # yt-dlp instalado só como executável: os downloaders usam o subprocesso
+    yt_dlp = None
+
+# Arquivos gerados pelo modo em lote: "<título>_[<id>].<idioma>.<ext>"
+BATCH_OUTPUT_TEMPLATE = '%(title)s_[%(id)s].%(ext)s'
+BATCH_FILE_PATTERN = re.compile(r'\[([0-9A-Za-z_-]{11})\]\.([^.]+)\.(vtt|srt)$')
+
+# ID de vídeo nas entradas da listagem "flat" (as demais são abas/playlists aninhadas)
+VIDEO_ID_RE = re.compile(r'^[0-9A-Za-z_-]{11}$')
+
+# Listagem sem resolver cada vídeo, com as páginas buscadas conforme as entradas são lidas
+FLAT_PARAMS = {'extract_flat': 'in_playlist', 'lazy_playlist': True}
+
+# Saída do executável na listagem: ID e canal (da entrada ou, em abas de canal, da playlist)
+FLAT_PRINT = '%(id)s\t%(channel_id,playlist_channel_id|)s'
+
+# Timeout (s) de cada operação de rede do yt-dlp em processo; o caminho via
+# subprocesso é limitado pelo timeout do subprocess.run
+SOCKET_TIMEOUT = 30
+
+# Campos do info_dict mantidos no cache (o dict completo tem centenas de KB por vídeo)
+INFO_FIELDS = ('id', 'title', 'duration', 'uploader', 'channel', 'channel_id', 'view_count', 'requested_subtitles')
+
+
+class YtDlpBackend:
+    """Executa o yt-dlp dentro do processo com instâncias ``YoutubeDL`` reutilizadas.
+
+    Cada chamada ao executável paga a inicialização do interpretador e dos
+    extratores; aqui as instâncias vivem enquanto o backend existir, e uma única
+    extração por vídeo devolve metadados e legendas. As instâncias ficam num pool
+    (o ``YoutubeDL`` não é thread-safe), então o backend pode ser compartilhado
+    entre workers e threads do Flask.
+    """
+
+    def __init__(self, languages: Optional[List[str]] = None, cache_size: int = 256,
+                 params: Optional[Dict] = None, socket_timeout: float = SOCKET_TIMEOUT):
+        if yt_dlp is None:
+            raise ImportError("yt-dlp não está instalado como módulo Python (pip install yt-dlp)")
+
+        self.languages = list(languages or ['pt', 'pt-BR', 'en'])
+        self.params = {
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+            'skip_download': True,
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'subtitleslangs': self.languages,
+            'subtitlesformat': 'vtt/srt/best',
+            'ignore_no_formats_error': True,
+            # Sem isso, uma conexão parada prende o worker para sempre
+            'socket_timeout': socket_timeout,
+        }
+        if params:
+            self.params.update(params)
+
+        self.cache_size = cache_size
+        self.extractions = 0
+        self._lock = threading.Lock()
+        self._pool: List = []
+        self._info_cache: 'OrderedDict[str, Dict]' = OrderedDict()
+
+    @contextmanager
+    def _acquire(self) -> Iterator:
+        """Empresta uma instância do YoutubeDL do pool (cria uma nova se estiver vazio)."""
+        with self._lock:
+            ydl = self._pool.pop() if self._pool else None
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(self.params)
+        try:
+            yield ydl
+        finally:
+            with self._lock:
+                self._pool.append(ydl)
+
+    def extract_info(self, url: str, video_id: Optional[str] = None) -> Dict:
+        """Extrai metadados e legendas disponíveis de um vídeo (uma extração, com cache)."""
+        key = video_id or url
+        with self._lock:
+            info = self._info_cache.get(key)
+            if info is not None:
+                self._info_cache.move_to_end(key)
+                return info
+
+        with self._acquire() as ydl:
+            full_info = ydl.extract_info(url, download=False)
+
+        info = {campo: full_info.get(campo) for campo in INFO_FIELDS}
+        with self._lock:
+            self.extractions += 1
+            self._info_cache[key] = info
+            while len(self._info_cache) > self.cache_size:
+                self._info_cache.popitem(last=False)
+        return info
+
+    def get_subtitles(self, url: str, video_id: Optional[str] = None,
+                      languages: Optional[List[str]] = None) -> List[Dict]:
+        """Retorna as legendas [{'language', 'ext', 'data'}] na ordem dos idiomas pedidos.
+
+        Reaproveita a extração de ``extract_info``; só o conteúdo das legendas
+        é baixado aqui, sem gravar arquivos.
+        """
+        info = self.extract_info(url, video_id)
+        requested = info.get('requested_subtitles') or {}
+
+        legendas = []
+        for lang in languages or self.languages:
+            sub = requested.get(lang)
+            if not sub:
+                continue
+            data = sub.get('data')
+            if data is None:
+                with self._acquire() as ydl:
+                    data = ydl.urlopen(sub['url']).read().decode('utf-8', errors='replace')
+            legendas.append({'language': lang, 'ext': sub.get('ext', 'vtt'), 'data': data})
+        return legendas
+
+    def get_subtitles_many(self, items: List[Tuple[str, str]],
+                           languages: Optional[List[str]] = None,
+                           errors: Optional[Dict[str, Exception]] = None) -> Dict[str, List[Dict]]:
+        """Legendas de vários vídeos (url, video_id) com uma extração cada, na mesma sessão.
+
+        Vídeos cuja extração falha ficam de fora do resultado; ``errors`` (se
+        passado) recebe a exceção de cada um.
+        """
+        legendas = {}
+        for url, video_id in items:
+            try:
+                legendas[video_id] = self.get_subtitles(url, video_id, languages)
+            except Exception as e:
+                if errors is not None:
+                    errors[video_id] = e
+        return legendas
+
+    def iter_flat_ids(self, url: str, on_channel: Optional[Callable[[str, str], None]] = None,
+                      _depth: int = 0, _channel: Optional[str] = None) -> Iterator[str]:
+        """IDs dos vídeos de uma playlist ou canal, página a página, sem extrair cada vídeo.
+
+        Canais sem aba na URL listam as abas (Vídeos, Shorts, Ao vivo) como
+        playlists aninhadas, que são percorridas em seguida. Quando a listagem
+        traz o canal, ``on_channel(video_id, channel_id)`` é chamado antes de
+        gerar o ID.
+        """
+        with yt_dlp.YoutubeDL({**self.params, **FLAT_PARAMS}) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+            canal = info.get('channel_id') or _channel
+            for entry in info.get('entries') or ():
+                if not entry:
+                    continue
+                video_id = entry.get('id') or ''
+                if VIDEO_ID_RE.match(video_id):
+                    canal_video = entry.get('channel_id') or canal
+                    if on_channel and canal_video:
+                        on_channel(video_id, canal_video)
+                    yield video_id
+                elif entry.get('url') and _depth < 1:
+                    yield from self.iter_flat_ids(entry['url'], on_channel, _depth + 1, canal)
+
+    def forget(self, key: str):
+        """Remove um vídeo do cache de metadados."""
+        with self._lock:
+            self._info_cache.pop(key, None)
+
+
+def create_backend(kind: str = 'auto', ytdlp_path: str = 'yt-dlp',
+                   languages: Optional[List[str]] = None) -> Optional[YtDlpBackend]:
+    """Cria o backend em processo conforme ``kind`` ('auto', 'inprocess' ou 'subprocess').
+
+    Retorna None quando o caminho via subprocesso deve ser usado: 'subprocess',
+    yt-dlp indisponível como módulo ou, em 'auto', um executável customizado.
+    """
+    if kind == 'subprocess' or yt_dlp is None:
+        return None
+    if kind == 'auto' and ytdlp_path != 'yt-dlp':
+        return None
+    return YtDlpBackend(languages=languages)
+
+
+def iter_flat_playlist(url: str, backend: Optional[YtDlpBackend] = None, ytdlp_path: str = 'yt-dlp',
+                       on_channel: Optional[Callable[[str, str], None]] = None) -> Iterator[str]:
+    """IDs dos vídeos de uma playlist ou canal, gerados à medida que o yt-dlp lista as páginas.
+
+    Usa o backend em processo quando houver; senão, lê a saída do executável
+    (``--flat-playlist --print``) linha a linha. Fechar o gerador antes do fim
+    interrompe a listagem. ``on_channel(video_id, channel_id)`` recebe o canal
+    de cada vídeo quando a listagem o informa.
+    """
+    if backend is not None:
+        yield from backend.iter_flat_ids(url, on_channel)
+        return
+
+    cmd = [ytdlp_path, '--flat-playlist', '--lazy-playlist', '--print', FLAT_PRINT, '--no-warnings', url]
+    # stderr vai para um arquivo: um pipe cheio travaria o yt-dlp no meio da listagem
+    erros = tempfile.TemporaryFile(mode='w+')
+    processo = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=erros, text=True)
+    try:
+        for linha in processo.stdout:
+            video_id, _, canal = linha.strip().partition('\t')
+            if VIDEO_ID_RE.match(video_id):
+                if on_channel and canal and canal != 'NA':
+                    on_channel(video_id, canal)
+                yield video_id
+        if processo.wait() != 0:
+            erros.seek(0)
+            raise RuntimeError(f"yt-dlp falhou ao listar {url}: {erros.read().strip()[:200]}")
+    finally:
+        if processo.poll() is None:
+            processo.kill()
+            processo.wait()
+        processo.stdout.close()
+        erros.close()
+
+
+def download_subtitles_batch(ytdlp_path: str, urls: List[str], languages: List[str],
+                             output_dir: Path, timeout_per_video: float = 60) -> Dict[str, List[Tuple[str, Path]]]:
+    """Baixa legendas de vários vídeos e idiomas numa única invocação do executável.
+
+    Passa todas as URLs e a lista combinada de ``--sub-lang`` para o yt-dlp e
+    depois mapeia os arquivos gerados em ``output_dir`` de volta para os IDs.
+    Retorna {video_id: [(idioma, arquivo), ...]} na ordem de ``languages``.
+    """
+    cmd = [
+        ytdlp_path,
+        '--write-auto-sub',
+        '--write-sub',
+        '--sub-lang', ','.join(languages),
+        '--skip-download',
+        '--ignore-errors',
+        '--no-warnings',
+        '--output', str(output_dir / BATCH_OUTPUT_TEMPLATE),
+        *urls
+    ]
+
+    try:
+        # Com --ignore-errors o código de saída é 1 se algum vídeo falhar; o que
+        # importa são os arquivos gerados
+        subprocess.run(cmd, capture_output=True, text=True, timeout=timeout_per_video * max(1, len(urls)))
+    except subprocess.TimeoutExpired:
+        pass
+
+    arquivos: Dict[str, List[Tuple[str, Path]]] = {}
+    for file in output_dir.iterdir():
+        match = BATCH_FILE_PATTERN.search(file.name)
+        if match:
+            video_id, lang, _ = match.groups()
+            arquivos.setdefault(video_id, []).append((lang, file))
+
+    ordem = {lang: i for i, lang in enumerate(languages)}
+    for lista in arquivos.values():
+        lista.sort(key=lambda item: ordem.get(item[0], len(ordem)))
+    return arquivos